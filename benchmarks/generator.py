@@ -0,0 +1,254 @@
+"""Deterministic generator for synthetic Java monorepos.
+
+The same config and seed always produce byte-identical trees, so benchmark
+results can be compared across commits and machines.
+"""
+import argparse
+import os
+import random
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Tuple
+
+EXTERNAL_IMPORTS = [
+    "java.util.List",
+    "java.util.Map",
+    "java.util.ArrayList",
+    "java.util.HashMap",
+    "java.util.Optional",
+    "java.util.stream.Collectors",
+    "java.io.IOException",
+    "com.google.common.collect.ImmutableList",
+    "com.google.common.base.Preconditions",
+    "org.apache.commons.lang3.StringUtils",
+    "org.slf4j.Logger",
+    "org.slf4j.LoggerFactory",
+]
+
+MAVEN_DEPENDENCIES = [
+    ("com.google.guava", "guava", "32.1.2-jre"),
+    ("org.apache.commons", "commons-lang3", "3.12.0"),
+    ("org.slf4j", "slf4j-api", "2.0.9"),
+    ("junit", "junit", "4.13.2"),
+]
+
+BAZEL_DEPENDENCIES = [
+    "@maven//:com_google_guava_guava",
+    "@maven//:org_apache_commons_commons_lang3",
+    "@maven//:org_slf4j_slf4j_api",
+]
+
+@dataclass
+class MonorepoConfig:
+    files: int = 1000
+    modules: int = 10
+    # Directory depth of module roots below the repository root
+    module_depth: int = 2
+    # "maven", "bazel" or "mixed" (alternating per module)
+    build_system: str = "mixed"
+    # Methods per class follow a log-normal distribution (long tail of huge classes)
+    mean_methods: float = 8.0
+    methods_sigma: float = 0.8
+    max_methods: int = 400
+    statements_per_method: int = 6
+    # Extra package-private classes per file
+    extra_classes: int = 0
+    # Average number of imports per file and the share pointing outside the repo
+    import_fanout: int = 6
+    external_import_ratio: float = 0.4
+    seed: int = 0
+
+def _module_dirs(rng: random.Random, config: MonorepoConfig) -> List[str]:
+    dirs = []
+    for i in range(config.modules):
+        parts = [f"group{rng.randrange(max(1, config.modules // 3))}" for _ in range(max(0, config.module_depth - 1))]
+        parts.append(f"module{i}")
+        dirs.append(os.path.join(*parts))
+    return dirs
+
+def _pom(group_id: str, artifact_id: str, modules: List[str], dependencies: List[Tuple[str, str, str]]) -> str:
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<project xmlns="http://maven.apache.org/POM/4.0.0">',
+        '    <modelVersion>4.0.0</modelVersion>',
+        f'    <groupId>{group_id}</groupId>',
+        f'    <artifactId>{artifact_id}</artifactId>',
+        '    <version>1.0.0</version>',
+    ]
+    if modules:
+        lines.append('    <packaging>pom</packaging>')
+        lines.append('    <modules>')
+        lines.extend(f'        <module>{module}</module>' for module in modules)
+        lines.append('    </modules>')
+    if dependencies:
+        lines.append('    <dependencies>')
+        for dep_group, dep_artifact, dep_version in dependencies:
+            lines.extend([
+                '        <dependency>',
+                f'            <groupId>{dep_group}</groupId>',
+                f'            <artifactId>{dep_artifact}</artifactId>',
+                f'            <version>{dep_version}</version>',
+                '        </dependency>',
+            ])
+        lines.append('    </dependencies>')
+    lines.append('</project>')
+    return "\n".join(lines) + "\n"
+
+def _build(name: str, deps: List[str]) -> str:
+    dep_lines = "\n".join(f'        "{dep}",' for dep in deps)
+    return (
+        "java_library(\n"
+        f'    name = "{name}",\n'
+        '    srcs = glob(["src/main/java/**/*.java"]),\n'
+        "    deps = [\n"
+        f"{dep_lines}\n"
+        "    ],\n"
+        ")\n"
+    )
+
+def _method(rng: random.Random, config: MonorepoConfig, index: int, callees: List[str]) -> str:
+    lines = [
+        "    /**",
+        f"     * Synthetic method {index}.",
+        "     */",
+        f"    public int method{index}(int value, String label) {{",
+        "        int result = value;",
+    ]
+    for s in range(config.statements_per_method):
+        choice = rng.random()
+        if callees and choice < 0.3:
+            lines.append(f"        result += new {rng.choice(callees)}().method0(result, label);")
+        elif choice < 0.5:
+            lines.append(f"        result += helper{rng.randrange(3)}(result);")
+        elif choice < 0.7:
+            lines.append(f'        label = label + "{s}";')
+        else:
+            lines.append(f"        result = result * {rng.randrange(2, 9)} % 1000003;")
+    lines.append("        return result + label.length();")
+    lines.append("    }")
+    return "\n".join(lines)
+
+def _java_file(rng: random.Random, config: MonorepoConfig, package: str, name: str,
+               internal: List[Tuple[str, str]]) -> str:
+    fanout = max(0, int(rng.gauss(config.import_fanout, config.import_fanout / 3)))
+    external_count = int(round(fanout * config.external_import_ratio))
+    imports = sorted(set(rng.sample(EXTERNAL_IMPORTS, min(external_count, len(EXTERNAL_IMPORTS)))))
+
+    callees = []
+    candidates = [c for c in internal if c[1] != name]
+    for pkg, cls in rng.sample(candidates, min(fanout - external_count, len(candidates))) if candidates else []:
+        if cls in callees:
+            continue
+        callees.append(cls)
+        if pkg != package:
+            imports.append(f"{pkg}.{cls}")
+
+    method_count = int(rng.lognormvariate(0, config.methods_sigma) * config.mean_methods)
+    method_count = max(1, min(config.max_methods, method_count))
+
+    parts = [
+        "/*",
+        " * Copyright (c) Synthetic Corp. Licensed under the Apache License, Version 2.0.",
+        " */",
+        f"package {package};",
+        "",
+    ]
+    parts.extend(f"import {imp};" for imp in imports)
+    parts.append("")
+    extends = f" extends {callees[0]}" if callees and rng.random() < 0.2 else ""
+    parts.append(f"public class {name}{extends} {{")
+    parts.append(f"    private final String id = \"{name}\";")
+    parts.append("")
+    for h in range(3):
+        parts.append(f"    private int helper{h}(int x) {{ return x + {h}; }}")
+    parts.append("")
+    for m in range(method_count):
+        parts.append(_method(rng, config, m, callees))
+        parts.append("")
+    parts.append("}")
+
+    for e in range(config.extra_classes):
+        parts.append("")
+        parts.append(f"class {name}Extra{e} {{")
+        parts.append(f"    int value() {{ return {e}; }}")
+        parts.append("}")
+    return "\n".join(parts) + "\n"
+
+def generate_monorepo(root: str, config: MonorepoConfig) -> Dict[str, int]:
+    """Writes a synthetic monorepo under root and returns summary counts."""
+    rng = random.Random(config.seed)
+    os.makedirs(root, exist_ok=True)
+
+    module_dirs = _module_dirs(rng, config)
+    maven_modules = []
+    bazel_modules = []
+    for i, module_dir in enumerate(module_dirs):
+        if config.build_system == "maven" or (config.build_system == "mixed" and i % 2 == 0):
+            maven_modules.append(module_dir)
+        else:
+            bazel_modules.append(module_dir)
+
+    if maven_modules:
+        with open(os.path.join(root, "pom.xml"), "w", encoding="utf-8") as f:
+            f.write(_pom("com.synth", "synth-parent", sorted(maven_modules), []))
+
+    # Assign files to modules and packages up front so imports can point anywhere
+    layout: List[Tuple[str, str, str]] = [] # (module_dir, package, class name)
+    for i in range(config.files):
+        module_index = rng.randrange(len(module_dirs))
+        package = f"com.synth.m{module_index}.p{rng.randrange(4)}"
+        layout.append((module_dirs[module_index], package, f"Class{i}"))
+    internal = [(package, name) for _, package, name in layout]
+
+    for module_index, module_dir in enumerate(module_dirs):
+        module_path = os.path.join(root, module_dir)
+        os.makedirs(module_path, exist_ok=True)
+        if module_dir in maven_modules:
+            deps = rng.sample(MAVEN_DEPENDENCIES, rng.randrange(1, len(MAVEN_DEPENDENCIES) + 1))
+            with open(os.path.join(module_path, "pom.xml"), "w", encoding="utf-8") as f:
+                f.write(_pom("com.synth", f"module{module_index}", [], deps))
+        else:
+            deps = rng.sample(BAZEL_DEPENDENCIES, rng.randrange(1, len(BAZEL_DEPENDENCIES) + 1))
+            with open(os.path.join(module_path, "BUILD"), "w", encoding="utf-8") as f:
+                f.write(_build(f"module{module_index}", deps))
+
+    total_bytes = 0
+    for module_dir, package, name in layout:
+        package_dir = os.path.join(root, module_dir, "src", "main", "java", *package.split('.'))
+        os.makedirs(package_dir, exist_ok=True)
+        content = _java_file(rng, config, package, name, internal)
+        with open(os.path.join(package_dir, name + ".java"), "w", encoding="utf-8") as f:
+            f.write(content)
+        total_bytes += len(content.encode("utf-8"))
+
+    return {
+        "files": config.files,
+        "modules": len(module_dirs),
+        "maven_modules": len(maven_modules),
+        "bazel_modules": len(bazel_modules),
+        "source_bytes": total_bytes,
+    }
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = MonorepoConfig()
+    for name, value in asdict(defaults).items():
+        flag = "--" + name.replace('_', '-')
+        if name == "build_system":
+            parser.add_argument(flag, choices=["maven", "bazel", "mixed"], default=value)
+        else:
+            parser.add_argument(flag, type=type(value), default=value)
+
+def config_from_args(args: argparse.Namespace) -> MonorepoConfig:
+    return MonorepoConfig(**{name: getattr(args, name) for name in asdict(MonorepoConfig())})
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Java monorepo")
+    parser.add_argument("root", help="Directory to generate into")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    summary = generate_monorepo(args.root, config_from_args(args))
+    print(f"Generated {summary['files']} files in {summary['modules']} modules "
+          f"({summary['source_bytes'] / 1e6:.1f} MB) under {args.root}")
+
+if __name__ == "__main__":
+    main()
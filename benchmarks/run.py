@@ -0,0 +1,196 @@
+"""Reproducible benchmark harness.
+
+Generates a synthetic monorepo, measures the pipeline and optionally compares
+the results against a saved baseline:
+
+    python -m benchmarks.run --files 2000 --results bench.json
+    python -m benchmarks.run --files 2000 --baseline bench.json --threshold 0.15
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from typing import Dict, List, Tuple
+
+from benchmarks.generator import MonorepoConfig, generate_monorepo, add_config_arguments, config_from_args
+from src.utils.paths import ARTIFACT_DIR, artifact_path
+from src.utils.resources import available_cpus
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Metric name -> True when higher is better
+DIRECTIONS = {
+    "files_per_s": True,
+    "wall_s": False,
+    "peak_rss_mb": False,
+    "output_bytes": False,
+}
+
+def _dir_bytes(path: str) -> int:
+    """Bytes of the chunk output under path, without the run's artifacts (metrics, indexes)."""
+    total = 0
+    for root, dirs, filenames in os.walk(path):
+        dirs[:] = [d for d in dirs if d != ARTIFACT_DIR]
+        for name in filenames:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+def run_end_to_end(source_dir: str, output_dir: str, workers: int, extra_args: List[str]) -> Dict[str, float]:
+    """Runs src/main.py in a child process and measures wall time, peak RSS and per-stage time.
+
+    Stage times are the workers' own per-file timings (the --metrics report),
+    summed over all files and workers, in seconds.
+    """
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    # Run from the source's parent with relative paths so output paths (and sizes)
+    # don't depend on where the work directory lives
+    cwd = os.path.dirname(os.path.abspath(source_dir))
+    cmd = [sys.executable, os.path.join(REPO_ROOT, "src", "main.py"), os.path.basename(source_dir),
+           "--output", os.path.relpath(output_dir, cwd), "--no-tui", "--workers", str(workers), "--metrics"] + extra_args
+
+    with tempfile.TemporaryFile() as stderr:
+        t0 = time.perf_counter()
+        proc = subprocess.Popen(cmd, env=env, cwd=cwd, stdout=subprocess.DEVNULL, stderr=stderr)
+        # wait4 reports the child's rusage, which includes the pool workers it reaped
+        _, status, rusage = os.wait4(proc.pid, 0)
+        wall = time.perf_counter() - t0
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        if proc.returncode != 0:
+            stderr.seek(0)
+            raise RuntimeError(f"Benchmark run failed:\n{stderr.read().decode('utf-8', errors='replace')}")
+
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak_rss = rusage.ru_maxrss / (1024 * 1024) if sys.platform == "darwin" else rusage.ru_maxrss / 1024
+    with open(artifact_path(output_dir, "metrics.json"), 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    stages = {stage: summary["sum_ms"] / 1000 for stage, summary in report["stages"].items()}
+    return {"wall_s": wall, "peak_rss_mb": peak_rss, "stages": stages}
+
+def run_benchmark(config: MonorepoConfig, workers: int, work_dir: str, extra_args: List[str]) -> Dict:
+    source_dir = os.path.join(work_dir, "repo")
+    e2e_out = os.path.join(work_dir, "out")
+
+    t0 = time.perf_counter()
+    summary = generate_monorepo(source_dir, config)
+    generate_s = time.perf_counter() - t0
+
+    runs = {}
+    stages = {}
+    for mode in ("cold", "warm"):
+        # The warm run reuses the cold run's output directory, so every file is a cache hit
+        result = run_end_to_end(source_dir, e2e_out, workers, extra_args)
+        stages[mode] = result.pop("stages")
+        result["files_per_s"] = config.files / result["wall_s"] if result["wall_s"] else 0.0
+        result["output_bytes"] = _dir_bytes(e2e_out)
+        runs[mode] = result
+
+    return {
+        "config": asdict(config),
+        "workers": workers,
+        "extra_args": extra_args,
+        "environment": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "usable_cpus": available_cpus(),
+        },
+        "corpus": dict(summary, generate_s=generate_s),
+        "runs": runs,
+        "stages": stages,
+    }
+
+def _flatten(results: Dict) -> Dict[str, Tuple[float, bool]]:
+    """Returns comparable metrics as name -> (value, higher_is_better)."""
+    metrics = {}
+    for mode, run in results["runs"].items():
+        for name, higher_is_better in DIRECTIONS.items():
+            if name in run:
+                metrics[f"{mode}.{name}"] = (run[name], higher_is_better)
+    for mode, stages in results["stages"].items():
+        for stage, seconds in stages.items():
+            metrics[f"{mode}.stage.{stage}_s"] = (seconds, False)
+    return metrics
+
+def compare(results: Dict, baseline: Dict, threshold: float, min_seconds: float = 0.05) -> List[str]:
+    """Returns a description of every metric that regressed by more than threshold.
+
+    Stage timings below min_seconds in both runs are ignored as noise.
+    """
+    if results["config"] != baseline["config"]:
+        print("Warning: baseline was generated with a different corpus config; comparison may be meaningless.")
+
+    current = _flatten(results)
+    previous = _flatten(baseline)
+    regressions = []
+    for name, (value, higher_is_better) in sorted(current.items()):
+        if name not in previous:
+            continue
+        base = previous[name][0]
+        if name.endswith("_s") and ".stage." in name and max(value, base) < min_seconds:
+            continue
+        if base == 0:
+            continue
+        change = (value - base) / base
+        regressed = change < -threshold if higher_is_better else change > threshold
+        marker = "REGRESSION" if regressed else "ok"
+        print(f"  {name:<32} {base:>12.4f} -> {value:>12.4f} ({change:+.1%}) {marker}")
+        if regressed:
+            regressions.append(f"{name}: {base:.4f} -> {value:.4f} ({change:+.1%})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the code chunker on a synthetic monorepo")
+    add_config_arguments(parser)
+    parser.add_argument("--workers", "-w", type=int, default=available_cpus(), help="Workers for the end-to-end runs (default: usable CPUs)")
+    parser.add_argument("--results", default="bench-results.json", help="Where to save the results JSON")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative regression (0.10 = 10%%)")
+    parser.add_argument("--work-dir", help="Keep the generated repo and outputs here instead of a temp dir")
+    parser.add_argument("main_args", nargs=argparse.REMAINDER, help="Extra arguments for src/main.py (after --)")
+    args = parser.parse_args()
+
+    extra_args = [a for a in args.main_args if a != "--"]
+    config = config_from_args(args)
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="code-graph-bench-")
+    try:
+        if args.work_dir and os.path.exists(work_dir):
+            shutil.rmtree(work_dir)
+        os.makedirs(work_dir, exist_ok=True)
+        results = run_benchmark(config, args.workers, work_dir, extra_args)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(args.results, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+    for mode, run in results["runs"].items():
+        print(f"{mode:>5}: {run['files_per_s']:.1f} files/s, {run['wall_s']:.2f}s wall, "
+              f"peak RSS {run['peak_rss_mb']:.0f} MB, {run['output_bytes'] / 1e6:.1f} MB out")
+    for mode, stages in results["stages"].items():
+        breakdown = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in stages.items() if seconds)
+        print(f"{mode:>5} stages (summed over workers): {breakdown}")
+    print(f"Results written to {args.results}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"Comparing against {args.baseline} (threshold {args.threshold:.0%}):")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("No regressions.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Throughput of the sink API (src/core/sinks.py).
+
+Chunks a synthetic monorepo once, then replays its chunks through a
+SinkWriter into the in-memory stand-in sinks with a simulated per-batch
+latency, for sync and async sends at several concurrency limits:
+
+    python -m benchmarks.sinks --files 1000 --latency-ms 20 --concurrency 1,4,16
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.generator import generate_monorepo, add_config_arguments, config_from_args
+from src.core.chunker import StandardChunker
+from src.core.interfaces import Chunk, walk_chunks
+from src.core.languages.java_parser import JavaParser
+from src.core.sinks import AsyncMemorySink, MemorySink, SinkWriter
+
+def chunk_corpus(source_dir: str) -> List[List[Chunk]]:
+    """The chunks of every Java file under source_dir, one list per file."""
+    parser = JavaParser()
+    chunker = StandardChunker()
+    files = []
+    for root, dirs, filenames in os.walk(source_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        for name in sorted(filenames):
+            if name.endswith(".java"):
+                file_path = os.path.join(root, name)
+                with open(file_path, 'rb') as f:
+                    files.append(chunker.chunk(parser.parse(f.read(), file_path), [], file_path))
+    return files
+
+def run_sink(files: List[List[Chunk]], mode: str, concurrency: int, latency_s: float, batch_size: int) -> Dict[str, float]:
+    sink = AsyncMemorySink(latency_s) if mode == "async" else MemorySink(latency_s)
+    writer = SinkWriter(sink, max_batch_chunks=batch_size, concurrency=concurrency)
+    t0 = time.perf_counter()
+    for chunks in files:
+        writer.write(chunks, "")
+    writer.close()
+    wall = time.perf_counter() - t0
+    return {"mode": mode, "concurrency": concurrency, "wall_s": wall, "batches": writer.batches_sent,
+            "chunks_per_s": writer.chunks_sent / wall if wall else 0.0}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sink throughput on a synthetic monorepo")
+    add_config_arguments(parser)
+    parser.add_argument("--latency-ms", type=float, default=20, help="Simulated round trip of one batch")
+    parser.add_argument("--batch-size", type=int, default=64, help="Max chunks per batch")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency limits to measure")
+    parser.add_argument("--results", help="Also save the results JSON here")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="code-graph-sink-bench-")
+    try:
+        generate_monorepo(work_dir, config_from_args(args))
+        files = chunk_corpus(work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    total = sum(1 for chunks in files for _ in walk_chunks(chunks))
+    print(f"{len(files)} files, {total} chunks, batches of up to {args.batch_size}, {args.latency_ms:g} ms per batch")
+
+    results = []
+    # Without latency: the overhead of batching and handing off
+    for mode in ("sync", "async"):
+        results.append(run_sink(files, mode, 4, 0.0, args.batch_size))
+    for concurrency in (int(n) for n in args.concurrency.split(',')):
+        for mode in ("sync", "async"):
+            results.append(run_sink(files, mode, concurrency, args.latency_ms / 1000, args.batch_size))
+    for i, r in enumerate(results):
+        latency = 0 if i < 2 else args.latency_ms
+        print(f"{r['mode']:>5}, concurrency {r['concurrency']:>3}, {latency:g} ms: {r['chunks_per_s']:>10.0f} chunks/s "
+              f"({r['batches']} batches in {r['wall_s']:.2f}s)")
+
+    if args.results:
+        with open(args.results, "w", encoding="utf-8") as f:
+            json.dump({"latency_ms": args.latency_ms, "batch_size": args.batch_size, "chunks": total,
+                       "runs": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -28,7 +28,7 @@ else
     echo "Detected Generic System"
 fi
 
-echo "Available CPU Cores: $CORES"
+echo "Host CPU Cores: $CORES"
 echo "--------------------------------"
 
 # Function to check if a command exists
@@ -103,5 +103,5 @@ fi
 echo "Resolved Python: $PYTHON_EXEC"
 
 # Run py-spy
-# We pass --workers explicitly based on detection, but user args (ARGS) come last so they can override
-py-spy record --native -o "$OUTPUT_PROFILE" -- "$PYTHON_EXEC" src/main.py --workers "$CORES" "${ARGS[@]}"
+# The worker count is left to the tool: nproc reports the host's CPUs inside containers
+py-spy record --native -o "$OUTPUT_PROFILE" -- "$PYTHON_EXEC" src/main.py "${ARGS[@]}"
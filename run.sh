@@ -5,7 +5,16 @@
 # Set PYTHONPATH to include the current directory
 export PYTHONPATH=.
 
+# Subcommands (e.g. graph queries) don't process files; run them directly
+case "$1" in
+    graph|merge|index-jars|search)
+        exec uv run python src/main.py "$@"
+        ;;
+esac
+
 # Detect System Info for Efficiency Reporting
+# (reported on stderr, so stdout stays clean for --stream)
+{
 echo "--- Code Chunker Environment ---"
 
 if [[ "$OSTYPE" == "linux-gnu"* ]]; then
@@ -26,11 +35,12 @@ else
     echo "Detected Generic System"
 fi
 
-echo "Available CPU Cores: $CORES"
-echo "Code Chunker will automatically optimize worker count for this system."
+echo "Host CPU Cores: $CORES"
+echo "Code Chunker sizes its workers from the usable CPUs (cgroup quota, affinity) and memory limit."
 echo "--------------------------------"
+} >&2
 
 # Run the tool using uv
 # uv automatically manages the virtual environment and dependencies
-# We pass --workers explicitly based on our detection, but allow user to override (last arg wins)
-uv run python src/main.py --workers "$CORES" "$@"
+# The worker count is left to the tool: nproc reports the host's CPUs inside containers
+uv run python src/main.py "$@"
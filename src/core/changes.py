@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from src.core.interfaces import Chunk, walk_chunks
+from src.utils.paths import output_rel_path
+
+CHANGE_KINDS = ["added", "modified", "unchanged", "removed"]
+
+_WHITESPACE = re.compile(r'\s+')
+
+# Key that opens the code in a file written by JSONWriter.write_streamed
+STREAMED_CODE_KEY = b'\n  "code": '
+
+def content_hash(code: str, keep_indent: bool = False) -> str:
+    """SHA-256 of code with whitespace runs collapsed, so reindenting or reflowing doesn't count as a change.
+
+    With keep_indent (languages where indentation is syntax, like Python),
+    line breaks and each line's indentation relative to the least indented
+    line after the first are kept; only blank lines and other whitespace
+    runs are collapsed, so a dedent that moves a statement out of a block is
+    a change but reindenting a whole method is not.
+    """
+    if not keep_indent:
+        return hashlib.sha256(_WHITESPACE.sub(' ', code).strip().encode('utf-8')).hexdigest()
+    lines = [line.rstrip() for line in code.strip().splitlines()]
+    lines = [line for line in lines if line]
+    # The first line starts at the chunk's start, the rest keep their indentation in the file
+    margin = min((len(line) - len(line.lstrip()) for line in lines[1:]), default=0)
+    normalized = []
+    for i, line in enumerate(lines):
+        body = line.lstrip()
+        indent = len(line) - len(body) - (margin if i else 0)
+        normalized.append(' ' * max(indent, 0) + _WHITESPACE.sub(' ', body))
+    return hashlib.sha256('\n'.join(normalized).encode('utf-8')).hexdigest()
+
+class ContentHasher:
+    """content_hash of code that arrives in pieces."""
+    def __init__(self):
+        self._hash = hashlib.sha256()
+        self._started = False
+        # A whitespace run is only written once more text follows it (the end is stripped)
+        self._space = False
+
+    def update(self, piece: str) -> None:
+        text = _WHITESPACE.sub(' ', piece)
+        if text.startswith(' '):
+            self._space = self._space or self._started
+            text = text[1:]
+        if not text:
+            return
+        trailing = text.endswith(' ')
+        text = text.rstrip(' ')
+        if text:
+            if self._space:
+                text = ' ' + text
+            self._hash.update(text.encode('utf-8'))
+            self._started = True
+            self._space = False
+        self._space = self._space or trailing
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+def change_of(chunk_id: str, digest: str, previous: Dict[str, str]) -> str:
+    """"added", "modified" or "unchanged" for a chunk with this hash."""
+    old = previous.get(chunk_id)
+    if old is None:
+        return "added"
+    return "unchanged" if old == digest else "modified"
+
+def chunk_hashes(data: Dict[str, Any]) -> Dict[str, str]:
+    """Chunk ID -> content hash of a chunk and its children, as loaded from a previous JSON output file."""
+    hashes = {}
+    stack = [data]
+    while stack:
+        chunk = stack.pop()
+        if chunk.get('id') is not None:
+            hashes[chunk['id']] = chunk.get('content_hash') or ""
+        stack.extend(chunk.get('children') or [])
+    return hashes
+
+def read_streamed_output(json_path: str, max_header_bytes: int = 1 << 20) -> Optional[Tuple[Dict[str, Any], Dict[str, str]]]:
+    """(top-level fields, chunk ID -> content hash) of a file written by JSONWriter.write_streamed.
+
+    Reads the header and then one child per line, so memory is bounded by the
+    largest method rather than the file. Returns None for files in the
+    regular layout, which need json.load.
+    """
+    try:
+        f = open(json_path, 'rb')
+    except OSError:
+        return None
+    with f:
+        head = b""
+        while STREAMED_CODE_KEY not in head:
+            data = f.read(1 << 16)
+            if not data or len(head) > max_header_bytes:
+                return None
+            head += data
+        end = head.index(STREAMED_CODE_KEY)
+        try:
+            header = json.loads(head[:end].rstrip(b',') + b"\n}")
+        except ValueError:
+            return None
+        if not (header.get("metadata") or {}).get("streamed"):
+            return None
+        hashes = {header["id"]: header.get("content_hash") or ""}
+
+        # Skip the rest of the code line without reading it whole
+        f.seek(end + len(STREAMED_CODE_KEY))
+        while True:
+            line = f.readline(1 << 16)
+            if not line or line.endswith(b"\n"):
+                break
+        for line in f:
+            line = line.strip().rstrip(b",")
+            if line.startswith(b"{"):
+                hashes.update(chunk_hashes(json.loads(line)))
+        return header, hashes
+
+def read_output(json_path: str) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """(top-level fields, chunk ID -> content hash) of a previous JSON output file in either layout.
+
+    Raises OSError or ValueError if it can't be read.
+    """
+    streamed = read_streamed_output(json_path)
+    if streamed is not None:
+        return streamed
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data, chunk_hashes(data)
+
+def tag_changes(chunks: List[Chunk], previous: Optional[Dict[str, str]]) -> List[str]:
+    """Sets each chunk's change against the previous run's hashes; returns the IDs that disappeared.
+
+    previous is None when the file wasn't in the previous output, which makes every chunk added.
+    """
+    previous = previous or {}
+    seen = set()
+    for chunk in walk_chunks(chunks):
+        seen.add(chunk.id)
+        chunk.change = change_of(chunk.id, chunk.content_hash, previous)
+    return sorted(chunk_id for chunk_id in previous if chunk_id not in seen)
+
+class ChangeFeed:
+    """Writes the chunks added, modified or removed by a run as NDJSON lines.
+
+    Unchanged chunks are counted but not written, so consumers only see deltas.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._tmp_path = f"{path}.tmp.{os.getpid()}"
+        self._file = open(self._tmp_path, 'w', encoding='utf-8')
+        self.counts = {kind: 0 for kind in CHANGE_KINDS}
+
+    def record(self, file_path: str, chunks: List[Chunk], removed: List[str]) -> None:
+        for chunk in walk_chunks(chunks):
+            if chunk.change:
+                self.counts[chunk.change] += 1
+                if chunk.change != "unchanged":
+                    self._emit(chunk.change, chunk.id, file_path, chunk.kind, chunk.content_hash)
+        for chunk_id in removed:
+            self.counts["removed"] += 1
+            self._emit("removed", chunk_id, file_path, None, None)
+
+    def _emit(self, change: str, chunk_id: str, file_path: str, kind: Optional[str], digest: Optional[str]) -> None:
+        self._file.write(json.dumps({"change": change, "id": chunk_id, "file_path": file_path,
+                                     "kind": kind, "content_hash": digest}) + "\n")
+
+    def close(self) -> None:
+        # Only a complete feed replaces the previous run's
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+def track_changes(result_iter: Iterator[Tuple[str, List[Chunk], Dict]],
+                  feed: ChangeFeed) -> Iterator[Tuple[str, List[Chunk], Dict]]:
+    """Records worker results in the feed (removed IDs travel in stats["removed_chunks"]) on their way to the writer."""
+    for file_path, chunks, stats in result_iter:
+        removed = stats.pop("removed_chunks", [])
+        if chunks or removed:
+            feed.record(file_path, chunks, removed)
+        yield file_path, chunks, stats
+
+def removed_files(output_dir: str, previous_files: List[str], current_files: List[str]) -> Iterator[Tuple[str, List[str]]]:
+    """(file path, chunk IDs) of files in the previous run's output that are no longer scanned."""
+    current = set(current_files)
+    for file_path in previous_files:
+        if file_path in current:
+            continue
+        json_path = os.path.join(output_dir, output_rel_path(file_path) + ".json")
+        try:
+            _, hashes = read_output(json_path)
+        except (OSError, ValueError):
+            continue
+        yield file_path, sorted(hashes)
@@ -1,80 +1,125 @@
-from src.core.interfaces import Chunker, Chunk, ParsedResult, Dependency
-from typing import List, Optional, Any
-import os
+from src.core.interfaces import Chunker, Chunk, ParsedResult, StreamedParse, Dependency, ClassNode, MethodNode
+from src.core.languages import language_spec
+from src.core.changes import content_hash
+from typing import Iterator, List, Optional, Any, Set, Tuple, Union
 
-class StandardChunker(Chunker):
-    def chunk(self, parsed_result: ParsedResult, dependencies: List[Dependency], file_path: str, metadata: Optional[Any] = None) -> List[Chunk]:
-        ext = os.path.splitext(file_path)[1].lower()
-        language = "unknown"
-        if ext == ".java":
-            language = "java"
-        elif ext in [".py"]:
-            language = "python"
-        elif ext in [".go"]:
-            language = "go"
+def method_id(class_chunk_id: str, method: MethodNode, overloads: bool, taken: Set[str]) -> str:
+    """`<class id>::name`, plus `(param types)` where overloading is possible.
+
+    IDs only depend on the method's own declaration, so they stay the same when
+    other members are added, removed or reordered. Remaining clashes (e.g. a
+    Python property getter and setter) get `#2`, `#3`, ... in source order.
+    """
+    chunk_id = f"{class_chunk_id}::{method.name}"
+    if overloads:
+        chunk_id += "(" + ",".join("".join(t.split()) for t in method.parameter_types) + ")"
+    base, n = chunk_id, 1
+    while chunk_id in taken:
+        n += 1
+        chunk_id = f"{base}#{n}"
+    taken.add(chunk_id)
+    return chunk_id
 
-        chunks = []
+def file_members(parsed_result: ParsedResult) -> List[Union[ClassNode, MethodNode]]:
+    """The top-level classes and functions of a file in source order: the children of its file chunk."""
+    return sorted(parsed_result.classes + parsed_result.functions, key=lambda node: node.start_byte)
 
-        # If we have parsed classes (currently only populated for Java), create hierarchical chunks
-        if parsed_result.classes:
-            # We process all classes found, but typically there's one main class.
-            # If the requirement is strict 1 source file -> 1 JSON file,
-            # and that JSON file has a top-level object (Class Chunk).
-            # We will return the first class as the primary chunk.
+class StandardChunker(Chunker):
+    def chunk(self, parsed_result: ParsedResult, dependencies: List[Dependency], file_path: str, metadata: Optional[Any] = None) -> List[Chunk]:
+        """One chunk per file (one output file per source file).
 
-            # Note: If there are multiple top-level classes (e.g. package-private ones),
-            # we might lose them if we only return one.
-            # But adhering to "top level object will represent class level chunk" implies singular.
-            # We'll stick to the first one for now.
+        A file holding a single class (or Go type) and nothing else but its
+        package, imports and comments becomes that class's chunk, with its
+        methods as children. Any other file becomes a `file` chunk of the
+        whole file, so module-level code is kept; its children are a chunk per
+        top-level class (with its methods) and per top-level function.
+        """
+        spec = language_spec(file_path)
+        language = spec.name if spec else "unknown"
+        keep_indent = bool(spec and spec.significant_indent)
+        overloads = bool(spec and spec.overloads)
 
-            main_class = parsed_result.classes[0]
+        if len(parsed_result.classes) == 1 and not parsed_result.functions and not parsed_result.top_level_code:
+            return [self._class_tree(parsed_result.classes[0], parsed_result.imports, dependencies, file_path,
+                                     language, metadata, overloads, keep_indent)]
 
-            class_chunk_id = f"{file_path}::{main_class.name}"
-            class_chunk = Chunk(
-                id=class_chunk_id,
-                file_path=file_path,
-                language=language,
-                kind="class",
-                code=main_class.code,
-                metadata=metadata,
-                package=main_class.package,
-                extends=main_class.extends,
-                implements=main_class.implements,
-                imports=parsed_result.imports, # File level imports apply to the class
-                dependencies=dependencies
-            )
+        file_chunk = Chunk(
+            id=file_path,
+            file_path=file_path,
+            language=language,
+            kind="file",
+            code=parsed_result.code,
+            imports=parsed_result.imports,
+            dependencies=dependencies,
+            metadata=metadata,
+            content_hash=content_hash(parsed_result.code, keep_indent)
+        )
+        # Class names and function names share the file's namespace
+        taken: Set[str] = set()
+        for node in file_members(parsed_result):
+            if isinstance(node, ClassNode):
+                child = self._class_tree(node, parsed_result.imports, dependencies, file_path, language, None,
+                                         overloads, keep_indent)
+                child.parent_id = file_chunk.id
+                taken.add(child.id)
+            else:
+                child = self._method_chunk(node, file_chunk, overloads, taken, keep_indent, kind="function")
+            file_chunk.children.append(child)
+        return [file_chunk]
 
-            # Create Method Chunks
-            for method in main_class.methods:
-                method_chunk_id = f"{class_chunk_id}::{method.name}"
-                method_chunk = Chunk(
-                    id=method_chunk_id,
-                    file_path=file_path,
-                    language=language,
-                    kind="method",
-                    code=method.code,
-                    signature=method.signature,
-                    is_override=method.is_override,
-                    parent_id=class_chunk_id,
-                    imports=method.used_imports
-                    # dependencies for methods: could filter file deps if we knew which apply
-                )
-                class_chunk.children.append(method_chunk)
+    def _class_tree(self, class_node: ClassNode, imports: List[str], dependencies: List[Dependency], file_path: str,
+                    language: str, metadata: Optional[Any], overloads: bool, keep_indent: bool) -> Chunk:
+        """A class chunk with its method chunks."""
+        class_chunk = self._class_chunk(class_node, imports, dependencies, file_path, language, metadata)
+        class_chunk.content_hash = content_hash(class_node.code, keep_indent)
+        taken: Set[str] = set()
+        for method in class_node.methods:
+            class_chunk.children.append(self._method_chunk(method, class_chunk, overloads, taken, keep_indent))
+        return class_chunk
 
-            chunks.append(class_chunk)
+    def chunk_stream(self, parsed: StreamedParse, dependencies: List[Dependency], file_path: str,
+                     metadata: Optional[Any] = None) -> Tuple[Chunk, Iterator[Chunk]]:
+        """The class chunk (without code, children or content hash) and its method chunks as they are parsed."""
+        spec = language_spec(file_path)
+        language = spec.name if spec else "unknown"
+        class_chunk = self._class_chunk(parsed.main_class, parsed.imports, dependencies, file_path, language, metadata)
+        overloads = bool(spec and spec.overloads)
+        taken: Set[str] = set()
+        methods = (self._method_chunk(method, class_chunk, overloads, taken) for method in parsed.methods)
+        return class_chunk, methods
 
-        else:
-            # Fallback for files where no classes were parsed (e.g. interfaces/enums not yet handled, or other languages)
-            chunk = Chunk(
-                id=file_path,
-                file_path=file_path,
-                language=language,
-                kind="file",
-                code=parsed_result.code,
-                imports=parsed_result.imports,
-                dependencies=dependencies,
-                metadata=metadata
-            )
-            chunks.append(chunk)
+    def _class_chunk(self, main_class: ClassNode, imports: List[str], dependencies: List[Dependency],
+                     file_path: str, language: str, metadata: Optional[Any]) -> Chunk:
+        return Chunk(
+            id=f"{file_path}::{main_class.name}",
+            file_path=file_path,
+            language=language,
+            kind="class",
+            code=main_class.code,
+            metadata=metadata,
+            name=main_class.name,
+            package=main_class.package,
+            extends=main_class.extends,
+            implements=main_class.implements,
+            imports=imports, # File level imports apply to the class
+            dependencies=dependencies
+        )
 
-        return chunks
+    def _method_chunk(self, method: MethodNode, class_chunk: Chunk, overloads: bool, taken: Set[str],
+                      keep_indent: bool = False, kind: str = "method") -> Chunk:
+        return Chunk(
+            id=method_id(class_chunk.id, method, overloads, taken),
+            file_path=class_chunk.file_path,
+            language=class_chunk.language,
+            kind=kind,
+            code=method.code,
+            name=method.name,
+            signature=method.signature,
+            is_override=method.is_override,
+            parameter_types=method.parameter_types,
+            calls=method.calls,
+            parent_id=class_chunk.id,
+            imports=method.used_imports,
+            content_hash=content_hash(method.code, keep_indent)
+            # dependencies for methods: could filter file deps if we knew which apply
+        )
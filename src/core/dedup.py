@@ -0,0 +1,205 @@
+import re
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from src.core.interfaces import Chunk, walk_chunks
+
+# Chunks compared for duplicates
+_CODE_KINDS = ("method", "function")
+
+# Identifiers, numbers, string literals and single operator characters
+_TOKEN = re.compile(r'[A-Za-z_$][\w$]*|\d[\w.]*|"(?:\\.|[^"\\])*"|\S')
+
+_SHINGLE_BASE = np.uint64(1_000_003)
+
+def tokenize(code: str) -> List[str]:
+    return _TOKEN.findall(code)
+
+class MinHasher:
+    """MinHash signatures of token shingles, hashed with NumPy.
+
+    Every process must use the same num_perm and seed so signatures are
+    comparable; both are fixed per run and the permutations are derived
+    deterministically from them.
+    """
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # (a * x + b) >> 32 with odd a: multiply-shift hashing, one per permutation
+        self.a = rng.integers(1, 1 << 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+        self._token_ids: Dict[str, int] = {}
+
+    def _token_hashes(self, tokens: List[str]) -> np.ndarray:
+        ids = self._token_ids
+        if len(ids) > 1_000_000:
+            ids.clear()
+        values = []
+        for token in tokens:
+            value = ids.get(token)
+            if value is None:
+                value = ids[token] = zlib.crc32(token.encode('utf-8')) + 1
+            values.append(value)
+        return np.array(values, dtype=np.uint64)
+
+    def shingles(self, code: str) -> np.ndarray:
+        """Distinct 64-bit hashes of the overlapping token k-grams of code."""
+        hashes = self._token_hashes(tokenize(code))
+        k = min(self.shingle_size, len(hashes))
+        if k == 0:
+            return hashes
+        count = len(hashes) - k + 1
+        # Polynomial rolling hash over each window, computed for all windows at once
+        with np.errstate(over='ignore'):
+            acc = np.zeros(count, dtype=np.uint64)
+            for j in range(k):
+                acc = acc * _SHINGLE_BASE + hashes[j:j + count]
+        return np.unique(acc)
+
+    def signature(self, code: str) -> Optional[np.ndarray]:
+        shingles = self.shingles(code)
+        if len(shingles) == 0:
+            return None
+        signature = np.full(self.num_perm, np.iinfo(np.uint32).max, dtype=np.uint32)
+        # Bound the (num_perm x block) temporary for very long methods
+        block = max(1, (1 << 20) // self.num_perm)
+        with np.errstate(over='ignore'):
+            for start in range(0, len(shingles), block):
+                x = shingles[start:start + block]
+                hashed = (self.a[:, None] * x[None, :] + self.b[:, None]) >> np.uint64(32)
+                np.minimum(signature, hashed.min(axis=1).astype(np.uint32), out=signature)
+        return signature
+
+def method_signatures(chunks: List[Chunk], hasher: MinHasher) -> Dict[str, bytes]:
+    """Signatures of all method and function chunks, keyed by chunk ID (computed in the workers)."""
+    signatures = {}
+    for chunk in walk_chunks(chunks):
+        if chunk.kind not in _CODE_KINDS:
+            continue
+        signature = hasher.signature(chunk.code)
+        if signature is not None:
+            signatures[chunk.id] = signature.tobytes()
+    return signatures
+
+class _BandTable:
+    """uint64 -> int32 open-addressing hash table in NumPy arrays (~24 bytes per entry).
+
+    A dict of Python ints costs around 100 bytes per entry, which adds up to
+    gigabytes with several bands over millions of methods.
+    """
+    def __init__(self, capacity: int = 1 << 16):
+        self.keys = np.zeros(capacity, dtype=np.uint64)
+        self.values = np.zeros(capacity, dtype=np.int32)
+        self.size = 0
+
+    def _slot(self, key: int) -> int:
+        mask = len(self.keys) - 1
+        slot = (key * 0x9E3779B97F4A7C15 >> 20) & mask
+        keys = self.keys
+        while keys[slot] and keys[slot] != key:
+            slot = (slot + 1) & mask
+        return slot
+
+    def get(self, key: int) -> Optional[int]:
+        slot = self._slot(key)
+        return int(self.values[slot]) if self.keys[slot] else None
+
+    def setdefault(self, key: int, value: int) -> None:
+        slot = self._slot(key)
+        if self.keys[slot]:
+            return
+        self.keys[slot] = key
+        self.values[slot] = value
+        self.size += 1
+        if self.size * 2 > len(self.keys):
+            self._grow()
+
+    def _grow(self) -> None:
+        occupied = self.keys != 0
+        old_keys, old_values = self.keys[occupied], self.values[occupied]
+        self.keys = np.zeros(len(self.keys) * 2, dtype=np.uint64)
+        self.values = np.zeros(len(self.values) * 2, dtype=np.int32)
+        self.size = 0
+        for key, value in zip(old_keys.tolist(), old_values.tolist()):
+            self.setdefault(key, value)
+
+class DuplicateIndex:
+    """Groups near-duplicate methods with LSH banding over their MinHash signatures.
+
+    The first method seen with a given content becomes the canonical one; a
+    later method is its duplicate when they share a band and their estimated
+    Jaccard similarity reaches threshold. With 16 bands of 4 rows, pairs at
+    0.8 similarity share a band with probability > 0.999. Only canonical
+    methods are indexed, at well under 1 KB each.
+    """
+    def __init__(self, num_perm: int = 64, bands: int = 16, threshold: float = 0.8):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.tables = [_BandTable() for _ in range(bands)]
+        self.signatures = np.zeros((1024, num_perm), dtype=np.uint32)
+        self.canonical_ids: List[str] = []
+        self.methods = 0
+        self.duplicates = 0
+
+    def _band_keys(self, signature: np.ndarray) -> List[int]:
+        # Never 0, which marks empty slots
+        return [zlib.crc32(signature[i * self.rows:(i + 1) * self.rows].tobytes()) << 8 | (i + 1)
+                for i in range(self.bands)]
+
+    def add(self, chunk_id: str, signature: np.ndarray) -> Optional[Tuple[str, float]]:
+        """Registers a method; returns (canonical ID, similarity) if it's a near-duplicate."""
+        self.methods += 1
+        keys = self._band_keys(signature)
+        candidates = {c for c in (table.get(key) for table, key in zip(self.tables, keys)) if c is not None}
+        if candidates:
+            indexes = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            similarity = (self.signatures[indexes] == signature).mean(axis=1)
+            best = int(similarity.argmax())
+            if similarity[best] >= self.threshold:
+                self.duplicates += 1
+                return self.canonical_ids[indexes[best]], float(similarity[best])
+
+        index = len(self.canonical_ids)
+        if index == len(self.signatures):
+            self.signatures = np.concatenate([self.signatures, np.zeros_like(self.signatures)])
+        self.signatures[index] = signature
+        self.canonical_ids.append(chunk_id)
+        for table, key in zip(self.tables, keys):
+            table.setdefault(key, index)
+        return None
+
+    def apply(self, chunks: List[Chunk], signatures: Dict[str, bytes], suppress: bool = False) -> None:
+        """Marks the methods of one file canonical or duplicate in their metadata; optionally drops duplicates."""
+        # Children are filtered before the walk descends into them
+        for chunk in walk_chunks(chunks):
+            kept = []
+            for child in chunk.children:
+                raw = signatures.get(child.id)
+                if raw is None:
+                    kept.append(child)
+                    continue
+                match = self.add(child.id, np.frombuffer(raw, dtype=np.uint32))
+                metadata = dict(child.metadata or {})
+                if match is None:
+                    metadata["dedup"] = "canonical"
+                else:
+                    metadata.update(dedup="duplicate", duplicate_of=match[0], similarity=round(match[1], 3))
+                    if suppress:
+                        continue
+                child.metadata = metadata
+                kept.append(child)
+            chunk.children = kept
+
+def dedup_results(result_iter: Iterator[Tuple[str, List[Chunk], Dict]], index: DuplicateIndex,
+                  suppress: bool = False) -> Iterator[Tuple[str, List[Chunk], Dict]]:
+    """Applies the index to worker results (signatures travel in stats["minhash"]) on their way to the writer."""
+    for file_path, chunks, stats in result_iter:
+        signatures = stats.pop("minhash", None)
+        if signatures:
+            index.apply(chunks, signatures, suppress=suppress)
+        yield file_path, chunks, stats
@@ -0,0 +1,222 @@
+import hashlib
+import mmap
+import os
+import sqlite3
+import struct
+import zipfile
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.core.interfaces import Dependency
+
+INDEX_NAME = "classes.idx"
+CATALOG_NAME = "catalog.sqlite"
+
+# Header: magic, slot count (a power of two), offset of the artifact names
+_MAGIC = b"CGCLIDX1"
+_HEADER = struct.Struct("<8sQQ")
+# Slot: 64-bit key hash (0 = empty), artifact number
+_SLOT = struct.Struct("<QI")
+
+def default_index_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "code-graph", "classes")
+
+def default_maven_repo() -> str:
+    return os.path.join(os.path.expanduser("~"), ".m2", "repository")
+
+def _key_hash(key: str) -> int:
+    # Keys are only compared by this hash; a false match needs a 64-bit collision
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+def artifact_of_jar(repo_dir: str, jar_path: str) -> Optional[Tuple[str, str]]:
+    """(groupId:artifactId, version) from a jar's place in a Maven repository layout.
+
+    Jars with a classifier (sources, javadoc, tests, ...) and files outside
+    the layout return None.
+    """
+    parts = os.path.relpath(jar_path, repo_dir).split(os.sep)
+    if len(parts) < 4:
+        return None
+    *group, artifact, version, name = parts
+    if name != f"{artifact}-{version}.jar":
+        return None
+    return f"{'.'.join(group)}:{artifact}", version
+
+def jar_keys(jar_path: str) -> List[str]:
+    """Index keys of a jar: its top-level class names, and `<package>.*` for each package."""
+    keys = set()
+    try:
+        with zipfile.ZipFile(jar_path) as jar:
+            names = jar.namelist()
+    except (OSError, zipfile.BadZipFile):
+        return []
+    for name in names:
+        if not name.endswith(".class") or '$' in name or name.startswith("META-INF/"):
+            continue
+        class_name = name[:-len(".class")].replace('/', '.')
+        if class_name.endswith(("package-info", "module-info")):
+            continue
+        keys.add(class_name)
+        if '.' in class_name:
+            keys.add(class_name.rsplit('.', 1)[0] + ".*")
+    return sorted(keys)
+
+def update_class_index(repo_dir: str, index_dir: str) -> Dict[str, int]:
+    """Brings the index of repo_dir's jars up to date; returns jar counts by change.
+
+    Jars are listed in a SQLite catalog with their size and mtime, so only
+    new or rewritten jars are opened. When anything changed, the lookup file
+    is rewritten from the catalog and atomically replaced.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(index_dir, CATALOG_NAME))
+    try:
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jars (id INTEGER PRIMARY KEY, path TEXT UNIQUE, size INTEGER,
+                                             mtime_ns INTEGER, artifact TEXT);
+            CREATE TABLE IF NOT EXISTS entries (jar INTEGER, key TEXT);
+            CREATE INDEX IF NOT EXISTS entries_jar ON entries (jar);
+        """)
+        known = {path: (jar_id, size, mtime_ns)
+                 for jar_id, path, size, mtime_ns in conn.execute("SELECT id, path, size, mtime_ns FROM jars")}
+        counts = {"jars": 0, "added": 0, "updated": 0, "removed": 0}
+        seen = set()
+        with conn:
+            for root, dirs, files in os.walk(repo_dir):
+                dirs.sort()
+                for name in sorted(files):
+                    if not name.endswith(".jar"):
+                        continue
+                    path = os.path.join(root, name)
+                    coordinates = artifact_of_jar(repo_dir, path)
+                    if coordinates is None:
+                        continue
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    seen.add(path)
+                    counts["jars"] += 1
+                    old = known.get(path)
+                    if old is not None and old[1:] == (st.st_size, st.st_mtime_ns):
+                        continue
+                    if old is not None:
+                        conn.execute("DELETE FROM entries WHERE jar = ?", (old[0],))
+                        conn.execute("UPDATE jars SET size = ?, mtime_ns = ? WHERE id = ?",
+                                     (st.st_size, st.st_mtime_ns, old[0]))
+                        jar_id = old[0]
+                        counts["updated"] += 1
+                    else:
+                        jar_id = conn.execute("INSERT INTO jars (path, size, mtime_ns, artifact) VALUES (?, ?, ?, ?)",
+                                              (path, st.st_size, st.st_mtime_ns, ":".join(coordinates))).lastrowid
+                        counts["added"] += 1
+                    conn.executemany("INSERT INTO entries (jar, key) VALUES (?, ?)",
+                                     ((jar_id, key) for key in jar_keys(path)))
+            for path, (jar_id, _, _) in known.items():
+                if path not in seen:
+                    conn.execute("DELETE FROM entries WHERE jar = ?", (jar_id,))
+                    conn.execute("DELETE FROM jars WHERE id = ?", (jar_id,))
+                    counts["removed"] += 1
+
+        index_path = os.path.join(index_dir, INDEX_NAME)
+        if counts["added"] or counts["updated"] or counts["removed"] or not os.path.exists(index_path):
+            _write_index(conn, index_path)
+        return counts
+    finally:
+        conn.close()
+
+def _write_index(conn: sqlite3.Connection, index_path: str) -> None:
+    # Artifacts are stored without their version (the repository usually holds
+    # several); when different artifacts ship the same key, the first by name wins
+    artifacts: Dict[str, int] = {}
+    entries: Dict[int, int] = {}
+    rows = conn.execute("SELECT e.key, j.artifact FROM entries e JOIN jars j ON e.jar = j.id ORDER BY j.artifact, j.path")
+    for key, coordinates in rows:
+        artifact = coordinates.rsplit(':', 1)[0]
+        number = artifacts.setdefault(artifact, len(artifacts))
+        entries.setdefault(_key_hash(key), number)
+
+    # Open addressing with linear probing at most half full
+    slots = 8
+    while slots < 2 * len(entries):
+        slots *= 2
+    mask = slots - 1
+    hashes = array('Q', bytes(8 * slots))
+    numbers = array('I', bytes(4 * slots))
+    for key_hash, number in entries.items():
+        i = key_hash & mask
+        while hashes[i]:
+            i = (i + 1) & mask
+        hashes[i] = key_hash
+        numbers[i] = number
+
+    names_offset = _HEADER.size + slots * _SLOT.size
+    tmp_path = f"{index_path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, slots, names_offset))
+        slot_bytes = bytearray(slots * _SLOT.size)
+        for i in range(slots):
+            _SLOT.pack_into(slot_bytes, i * _SLOT.size, hashes[i], numbers[i])
+        f.write(slot_bytes)
+        f.write("\n".join(artifacts).encode('utf-8'))
+    # Readers that have the old file mapped keep it until they close it
+    os.replace(tmp_path, index_path)
+
+class ClassIndex:
+    """Memory-mapped class/package -> artifact lookups (see update_class_index).
+
+    The file is shared through the page cache by every worker that opens it,
+    and a lookup is a hash and a few probes, without loading anything.
+    """
+    def __init__(self, index_path: str):
+        with open(index_path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._slots, names_offset = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC:
+            self._map.close()
+            raise ValueError(f"{index_path} is not a class index")
+        self._mask = self._slots - 1
+        self._artifacts = self._map[names_offset:].decode('utf-8').split("\n")
+
+    def lookup(self, key: str) -> Optional[str]:
+        """groupId:artifactId shipping a class (`a.b.C`) or package (`a.b.*`)."""
+        key_hash = _key_hash(key)
+        i = key_hash & self._mask
+        while True:
+            slot_hash, number = _SLOT.unpack_from(self._map, _HEADER.size + i * _SLOT.size)
+            if slot_hash == key_hash:
+                return self._artifacts[number]
+            if not slot_hash:
+                return None
+            i = (i + 1) & self._mask
+
+    def artifact_for_import(self, imp: str) -> Optional[str]:
+        """The artifact of an import as JavaParser reports it (`a.b.C`, `a.b.*`, `static a.b.C.m`)."""
+        name = imp[len("static "):] if imp.startswith("static ") else imp
+        if name.endswith(".*"):
+            found = self.lookup(name)
+            if found:
+                return found
+            # On-demand import of a class's members
+            name = name[:-2]
+        # Nested classes and static members: drop trailing segments until a class matches
+        for _ in range(3):
+            found = self.lookup(name)
+            if found or '.' not in name:
+                return found
+            name = name.rsplit('.', 1)[0]
+        return None
+
+    def close(self) -> None:
+        self._map.close()
+
+def import_artifacts(imports: Iterable[str], index: ClassIndex, dependencies: List[Dependency]) -> Dict[str, str]:
+    """Import -> owning artifact, with the version the file's Maven dependencies declare when they do."""
+    versions = {dep.name: dep.version for dep in dependencies if dep.type == "maven" and dep.version}
+    artifacts = {}
+    for imp in imports:
+        artifact = index.artifact_for_import(imp)
+        if artifact:
+            artifacts[imp] = f"{artifact}:{versions[artifact]}" if artifact in versions else artifact
+    return artifacts
@@ -0,0 +1,110 @@
+import multiprocessing
+import sys
+from multiprocessing.pool import ThreadPool
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+EXECUTORS = ["process", "thread", "inline"]
+
+# Below this many files, starting worker processes costs more than it saves
+INLINE_MAX_FILES = 64
+
+def gil_disabled() -> bool:
+    """True on free-threaded CPython builds running without the GIL."""
+    is_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_enabled is not None and not is_enabled()
+
+def choose_executor(requested: str, file_count: int, workers: int) -> str:
+    """Resolves "auto" to a concrete executor for this input size and interpreter."""
+    if requested != "auto":
+        return requested
+    if workers <= 1 or file_count <= INLINE_MAX_FILES:
+        return "inline"
+    if gil_disabled():
+        # Threads parse in parallel and skip pickling every Chunk
+        return "thread"
+    return "process"
+
+class InlinePool:
+    """Runs every task immediately in the calling thread.
+
+    Implements the part of the Pool interface bounded_imap and main() use, so
+    small inputs and debugging sessions skip worker startup and pickling.
+    """
+    def __init__(self, initializer: Optional[Callable] = None, initargs: Tuple = ()):
+        if initializer is not None:
+            initializer(*initargs)
+
+    def apply_async(self, func: Callable, args: Tuple = (), callback: Optional[Callable] = None,
+                    error_callback: Optional[Callable] = None) -> None:
+        try:
+            result = func(*args)
+        except Exception as e:
+            if error_callback is None:
+                raise
+            error_callback(e)
+            return
+        if callback is not None:
+            callback(result)
+
+    def close(self) -> None:
+        pass
+
+    def join(self) -> None:
+        pass
+
+    def terminate(self) -> None:
+        pass
+
+    def __enter__(self) -> "InlinePool":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.terminate()
+
+def create_pool(kind: str, workers: int, initializer: Callable, initargs: Tuple,
+                maxtasksperchild: Optional[int] = None) -> Any:
+    """Creates a Pool-compatible executor; maxtasksperchild only applies to processes."""
+    if kind == "process":
+        return multiprocessing.Pool(processes=workers, initializer=initializer, initargs=initargs,
+                                    maxtasksperchild=maxtasksperchild)
+    if kind == "thread":
+        # The initializer runs once in every thread, which keeps per-thread worker state
+        return ThreadPool(processes=workers, initializer=initializer, initargs=initargs)
+    if kind == "inline":
+        return InlinePool(initializer=initializer, initargs=initargs)
+    raise ValueError(f"unknown executor {kind!r}; expected one of {', '.join(EXECUTORS)}")
+
+class Autoscaler:
+    """Decides how many workers of a pool get work, from the CPU share of their tasks.
+
+    Pools can't be resized, so the pool is created at max_workers and the
+    in-flight limit passed to bounded_imap throttles it. Tasks that mostly
+    wait on I/O (cpu_ms well below their wall time) let up to max_workers
+    run at once; CPU-bound tasks bring it back down to one per CPU.
+    """
+    def __init__(self, cpus: int, max_workers: int, chunksize: int, smoothing: float = 0.2):
+        self.cpus = cpus
+        self.max_workers = max_workers
+        self.chunksize = chunksize
+        self.smoothing = smoothing
+        self.cpu_ratio = 1.0
+        self.active = min(cpus, max_workers)
+        self.min_active = self.max_active = self.active
+
+    def max_in_flight(self) -> int:
+        return self.active * self.chunksize
+
+    def observe(self, result_iter: Iterator[Tuple[str, List[Any], Dict[str, Any]]]) -> Iterator[Tuple[str, List[Any], Dict[str, Any]]]:
+        """Updates the target from every result while passing it through unchanged."""
+        for result in result_iter:
+            stats = result[2]
+            total_ms = stats.get("timings_ms", {}).get("total")
+            cpu_ms = stats.get("cpu_ms")
+            if total_ms and cpu_ms is not None:
+                ratio = min(1.0, cpu_ms / total_ms)
+                self.cpu_ratio += self.smoothing * (ratio - self.cpu_ratio)
+                target = round(self.cpus / max(self.cpu_ratio, 0.05))
+                self.active = max(1, min(self.max_workers, target))
+                self.min_active = min(self.min_active, self.active)
+                self.max_active = max(self.max_active, self.active)
+            yield result
@@ -0,0 +1,418 @@
+import sqlite3
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from src.core.interfaces import Writer, Chunk, Dependency, CallSite
+
+# Bump when the schema changes; older databases are recreated.
+SCHEMA_VERSION = 2
+
+# Raw references (imports, superclasses, interfaces, calls) are stored together with the
+# fully-qualified names they could refer to. Resolution joins those candidates
+# against the symbol table and materializes the winners in `edges`, so neighbor
+# and reverse-dependency lookups are single indexed queries. Methods are
+# indexed as "<class fqn>#<name>"; `arity` disambiguates overloads.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS symbols (
+    fqn TEXT NOT NULL,
+    chunk_id TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    arity INTEGER
+);
+CREATE INDEX IF NOT EXISTS symbols_fqn ON symbols (fqn);
+CREATE INDEX IF NOT EXISTS symbols_file ON symbols (file_path);
+
+CREATE TABLE IF NOT EXISTS refs (
+    id INTEGER PRIMARY KEY,
+    src_id TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    fallback TEXT NOT NULL,
+    artifact TEXT,
+    arity INTEGER
+);
+CREATE INDEX IF NOT EXISTS refs_file ON refs (file_path);
+
+CREATE TABLE IF NOT EXISTS candidates (
+    ref_id INTEGER NOT NULL,
+    fqn TEXT NOT NULL,
+    rank INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS candidates_ref ON candidates (ref_id);
+CREATE INDEX IF NOT EXISTS candidates_fqn ON candidates (fqn);
+
+CREATE TABLE IF NOT EXISTS edges (
+    src_id TEXT NOT NULL,
+    dst_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    ref_id INTEGER NOT NULL,
+    external INTEGER NOT NULL,
+    artifact TEXT
+);
+CREATE INDEX IF NOT EXISTS edges_src ON edges (src_id);
+CREATE INDEX IF NOT EXISTS edges_dst ON edges (dst_id);
+CREATE INDEX IF NOT EXISTS edges_ref ON edges (ref_id);
+"""
+
+# SQLite's default limit on bound parameters is 999
+_MAX_PARAMS = 900
+
+@dataclass
+class GraphEdge:
+    src: str
+    dst: str
+    kind: str # "imports", "extends", "implements", "calls", "instantiates"
+    external: bool = False
+    artifact: Optional[str] = None
+
+def _strip_generics(type_name: str) -> str:
+    name = type_name.split('<', 1)[0]
+    return name.replace('[]', '').strip()
+
+def _import_candidates(imp: str) -> Tuple[List[Tuple[str, int]], str]:
+    """Returns (candidate FQNs with rank, external fallback name) for an import."""
+    is_static = imp.startswith("static ")
+    name = imp[len("static "):].strip() if is_static else imp
+    if name.endswith(".*"):
+        name = name[:-2]
+        if not is_static:
+            # Package wildcards only matter for type resolution
+            return [], imp
+        return [(name, 0)], name
+    if is_static:
+        # static a.b.Owner.member -> edge to the owning class
+        name = name.rsplit('.', 1)[0]
+    return [(name, 0)], name
+
+def _type_candidates(type_name: str, package: str, imports: List[str]) -> Tuple[List[Tuple[str, int]], str]:
+    """Returns (candidate FQNs with rank, external fallback name) for a type reference.
+
+    Follows Java's lookup order: single-type imports, then the current package,
+    then on-demand (wildcard) imports, then java.lang.
+    """
+    name = _strip_generics(type_name)
+    if not name:
+        return [], type_name
+
+    explicit = {}
+    wildcards = []
+    for imp in imports:
+        if imp.startswith("static "):
+            continue
+        if imp.endswith(".*"):
+            wildcards.append(imp[:-2])
+        else:
+            explicit[imp.rsplit('.', 1)[-1]] = imp
+
+    head, _, rest = name.partition('.')
+    if head in explicit:
+        fqn = explicit[head] + ('.' + rest if rest else '')
+        return [(fqn, 0)], fqn
+
+    candidates = []
+    if rest:
+        # Already qualified (or a nested type of something in scope)
+        candidates.append((name, 0))
+    candidates.append((f"{package}.{name}" if package else name, 1))
+    for wildcard in wildcards:
+        candidates.append((f"{wildcard}.{name}", 2))
+    if not rest:
+        candidates.append((f"java.lang.{name}", 3))
+    return candidates, name
+
+def _artifact_for(fqn: str, dependencies: List[Dependency]) -> Optional[str]:
+    """Best-effort owning artifact: the Maven dependency with the longest groupId prefix."""
+    best = None
+    best_len = 0
+    for dep in dependencies:
+        if dep.type != "maven":
+            continue
+        group_id = dep.name.split(':', 1)[0]
+        if len(group_id) > best_len and (fqn == group_id or fqn.startswith(group_id + '.')):
+            best = f"{dep.name}:{dep.version}" if dep.version else dep.name
+            best_len = len(group_id)
+    return best
+
+def _batches(items: List, size: int = _MAX_PARAMS) -> Iterable[List]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+class GraphIndex(Writer):
+    """Repository-wide FQN index with type, import and call graph edges stored in SQLite.
+
+    Acts as a Writer so it can sit next to the output writers: each write
+    replaces the symbols and references of the written files and re-resolves
+    only the references affected by that change.
+    """
+    def __init__(self, db_path: str, commit_every: int = 500):
+        self.db_path = db_path
+        self.commit_every = commit_every
+        self._pending = 0
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            if version:
+                print(f"Graph index {db_path} has an old schema; recreating it. "
+                      "Rerun on a clean output directory to index cached files again.")
+            for table in ("symbols", "refs", "candidates", "edges"):
+                self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+        self.conn.executescript(SCHEMA)
+        self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def write(self, chunks: List[Chunk], output_path: str) -> None:
+        by_file: Dict[str, List[Chunk]] = {}
+        for chunk in chunks:
+            by_file.setdefault(chunk.file_path, []).append(chunk)
+        for file_path, file_chunks in by_file.items():
+            self.index_file(file_path, file_chunks)
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+    def index_file(self, file_path: str, chunks: List[Chunk]) -> None:
+        """Replaces everything known about file_path with the given chunks."""
+        affected_fqns = self._drop_file(file_path)
+
+        symbols = []
+        refs = []
+        for chunk in self._declarations(chunks):
+            class_fqn = self._symbol_fqn(chunk)
+            if class_fqn:
+                symbols.append((class_fqn, chunk.id, file_path, chunk.kind, None))
+                affected_fqns.add(class_fqn)
+            refs.extend(self._chunk_refs(chunk))
+
+            if not class_fqn:
+                continue
+            for child in chunk.children:
+                if child.kind != "method" or not child.name:
+                    continue
+                method_fqn = f"{class_fqn}#{child.name}"
+                symbols.append((method_fqn, child.id, file_path, child.kind, len(child.parameter_types)))
+                affected_fqns.add(method_fqn)
+                refs.extend(self._call_refs(child, chunk, class_fqn))
+
+        self.conn.executemany(
+            "INSERT INTO symbols (fqn, chunk_id, file_path, kind, arity) VALUES (?, ?, ?, ?, ?)", symbols)
+
+        ref_ids = []
+        for src_id, kind, candidates, fallback, artifact, arity in refs:
+            cur = self.conn.execute(
+                "INSERT INTO refs (src_id, file_path, kind, fallback, artifact, arity) VALUES (?, ?, ?, ?, ?, ?)",
+                (src_id, file_path, kind, fallback, artifact, arity))
+            ref_id = cur.lastrowid
+            ref_ids.append(ref_id)
+            self.conn.executemany(
+                "INSERT INTO candidates (ref_id, fqn, rank) VALUES (?, ?, ?)",
+                [(ref_id, fqn, rank) for fqn, rank in candidates])
+
+        self._resolve(set(ref_ids) | self._refs_to(affected_fqns))
+        self._maybe_commit()
+
+    def remove_file(self, file_path: str) -> None:
+        """Drops a deleted source file and re-resolves references that pointed into it."""
+        affected_fqns = self._drop_file(file_path)
+        self._resolve(self._refs_to(affected_fqns))
+        self._maybe_commit()
+
+    def retain(self, file_paths: Iterable[str]) -> None:
+        """Removes every indexed file not in file_paths (files that no longer exist)."""
+        keep = set(file_paths)
+        indexed = [row[0] for row in self.conn.execute("SELECT file_path FROM symbols UNION SELECT file_path FROM refs")]
+        for file_path in indexed:
+            if file_path not in keep:
+                self.remove_file(file_path)
+
+    def merge_from(self, db_path: str) -> None:
+        """Adds the files indexed in another graph database (e.g. of another shard).
+
+        References that could not be resolved inside that shard alone are
+        re-resolved against the combined symbol table.
+        """
+        self.conn.commit()
+        self.conn.execute("ATTACH DATABASE ? AS other", (db_path,))
+        try:
+            version = self.conn.execute("PRAGMA other.user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                raise ValueError(f"{db_path} has graph schema {version}, expected {SCHEMA_VERSION}")
+
+            files = [row[0] for row in self.conn.execute(
+                "SELECT file_path FROM other.symbols UNION SELECT file_path FROM other.refs")]
+            affected_fqns: Set[str] = set()
+            for file_path in files:
+                affected_fqns |= self._drop_file(file_path)
+
+            offset = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM refs").fetchone()[0]
+            self.conn.execute(
+                "INSERT INTO symbols (fqn, chunk_id, file_path, kind, arity) "
+                "SELECT fqn, chunk_id, file_path, kind, arity FROM other.symbols")
+            self.conn.execute(
+                "INSERT INTO refs (id, src_id, file_path, kind, fallback, artifact, arity) "
+                "SELECT id + ?, src_id, file_path, kind, fallback, artifact, arity FROM other.refs", (offset,))
+            self.conn.execute(
+                "INSERT INTO candidates (ref_id, fqn, rank) "
+                "SELECT ref_id + ?, fqn, rank FROM other.candidates", (offset,))
+
+            new_refs = {row[0] for row in self.conn.execute("SELECT id FROM refs WHERE id > ?", (offset,))}
+            affected_fqns |= {row[0] for row in self.conn.execute("SELECT DISTINCT fqn FROM other.symbols")}
+            self._resolve(new_refs | self._refs_to(affected_fqns))
+            self.conn.commit()
+        finally:
+            if self.conn.in_transaction:
+                self.conn.rollback()
+            self.conn.execute("DETACH DATABASE other")
+
+    def neighbors(self, chunk_id: str, kind: Optional[str] = None) -> List[GraphEdge]:
+        """Outgoing edges of a chunk."""
+        return self._edges("src_id", chunk_id, kind)
+
+    def dependents(self, target: str, kind: Optional[str] = None) -> List[GraphEdge]:
+        """Incoming edges of a chunk ID or external name (reverse dependencies)."""
+        return self._edges("dst_id", target, kind)
+
+    def lookup(self, fqn: str) -> List[str]:
+        """Returns the chunk IDs declaring the given fully-qualified name."""
+        rows = self.conn.execute("SELECT chunk_id FROM symbols WHERE fqn = ?", (fqn,))
+        return [row[0] for row in rows]
+
+    def _edges(self, column: str, value: str, kind: Optional[str]) -> List[GraphEdge]:
+        query = f"SELECT src_id, dst_id, kind, external, artifact FROM edges WHERE {column} = ?"
+        params: Tuple = (value,)
+        if kind:
+            query += " AND kind = ?"
+            params += (kind,)
+        return [GraphEdge(src=src, dst=dst, kind=k, external=bool(ext), artifact=art)
+                for src, dst, k, ext, art in self.conn.execute(query, params)]
+
+    def _declarations(self, chunks: List[Chunk]) -> Iterator[Chunk]:
+        """The class chunks of a file, also those under a file chunk; a file chunk without classes stands for itself."""
+        for chunk in chunks:
+            classes = [child for child in chunk.children if child.kind == "class"]
+            yield from classes or [chunk]
+
+    def _symbol_fqn(self, chunk: Chunk) -> Optional[str]:
+        if chunk.kind != "class" or not chunk.name:
+            return None
+        return f"{chunk.package}.{chunk.name}" if chunk.package else chunk.name
+
+    def _chunk_refs(self, chunk: Chunk) -> List[Tuple]:
+        refs = []
+        for imp in chunk.imports:
+            candidates, fallback = _import_candidates(imp)
+            if candidates:
+                artifact = chunk.import_artifacts.get(imp) or _artifact_for(fallback, chunk.dependencies)
+                refs.append((chunk.id, "imports", candidates, fallback, artifact, None))
+
+        types = []
+        if chunk.extends:
+            types.append(("extends", chunk.extends))
+        types.extend(("implements", name) for name in chunk.implements if name)
+        for kind, type_name in types:
+            candidates, fallback = _type_candidates(type_name, chunk.package, chunk.imports)
+            if candidates:
+                refs.append((chunk.id, kind, candidates, fallback,
+                             _artifact_for(fallback, chunk.dependencies), None))
+        return refs
+
+    def _call_refs(self, method: Chunk, owner: Chunk, class_fqn: str) -> List[Tuple]:
+        """Caller -> callee references of a method chunk, resolved in the context of its class."""
+        refs = []
+        for call in method.calls:
+            resolved = self._call_candidates(call, owner, class_fqn)
+            if resolved is None:
+                continue
+            kind, candidates, fallback = resolved
+            refs.append((method.id, kind, candidates, fallback,
+                         _artifact_for(fallback.split('#', 1)[0], owner.dependencies), call.arg_count))
+        return refs
+
+    def _call_candidates(self, call: CallSite, owner: Chunk, class_fqn: str) -> Optional[Tuple[str, List[Tuple[str, int]], str]]:
+        if not call.receiver:
+            # Receiver expression with an unknown static type
+            return None
+        if call.kind == "new":
+            candidates, fallback = _type_candidates(call.receiver, owner.package, owner.imports)
+            return "instantiates", candidates, fallback
+
+        suffix = f"#{call.name}"
+        super_candidates: List[Tuple[str, int]] = []
+        super_fallback = None
+        if owner.extends:
+            super_candidates, super_fallback = _type_candidates(owner.extends, owner.package, owner.imports)
+
+        if call.receiver == "this":
+            # Own methods first, then inherited ones
+            candidates = [(class_fqn + suffix, 0)] + [(fqn + suffix, rank + 1) for fqn, rank in super_candidates]
+            fallback = (super_fallback or class_fqn) + suffix
+        elif call.receiver == "super":
+            if not super_candidates:
+                return None
+            candidates = [(fqn + suffix, rank) for fqn, rank in super_candidates]
+            fallback = super_fallback + suffix
+        else:
+            type_candidates, type_fallback = _type_candidates(call.receiver, owner.package, owner.imports)
+            candidates = [(fqn + suffix, rank) for fqn, rank in type_candidates]
+            fallback = type_fallback + suffix
+        return "calls", candidates, fallback
+
+    def _drop_file(self, file_path: str) -> Set[str]:
+        """Deletes the file's symbols, refs and outgoing edges; returns the FQNs it declared."""
+        old_fqns = {row[0] for row in self.conn.execute(
+            "SELECT fqn FROM symbols WHERE file_path = ?", (file_path,))}
+        self.conn.execute(
+            "DELETE FROM edges WHERE ref_id IN (SELECT id FROM refs WHERE file_path = ?)", (file_path,))
+        self.conn.execute(
+            "DELETE FROM candidates WHERE ref_id IN (SELECT id FROM refs WHERE file_path = ?)", (file_path,))
+        self.conn.execute("DELETE FROM refs WHERE file_path = ?", (file_path,))
+        self.conn.execute("DELETE FROM symbols WHERE file_path = ?", (file_path,))
+        return old_fqns
+
+    def _refs_to(self, fqns: Set[str]) -> Set[int]:
+        ref_ids: Set[int] = set()
+        for batch in _batches(list(fqns)):
+            marks = ",".join("?" * len(batch))
+            ref_ids.update(row[0] for row in self.conn.execute(
+                f"SELECT ref_id FROM candidates WHERE fqn IN ({marks})", batch))
+        return ref_ids
+
+    def _resolve(self, ref_ids: Set[int]) -> None:
+        """Recomputes the edges of the given references."""
+        for batch in _batches(sorted(ref_ids)):
+            marks = ",".join("?" * len(batch))
+            self.conn.execute(f"DELETE FROM edges WHERE ref_id IN ({marks})", batch)
+
+            # ref_id -> (best rank, (chunk ID, arity) at that rank)
+            best: Dict[int, Tuple[int, List[Tuple[str, Optional[int]]]]] = {}
+            rows = self.conn.execute(
+                f"SELECT c.ref_id, c.rank, s.chunk_id, s.arity FROM candidates c "
+                f"JOIN symbols s ON s.fqn = c.fqn WHERE c.ref_id IN ({marks})", batch)
+            for ref_id, rank, chunk_id, arity in rows:
+                current = best.get(ref_id)
+                if current is None or rank < current[0]:
+                    best[ref_id] = (rank, [(chunk_id, arity)])
+                elif rank == current[0]:
+                    current[1].append((chunk_id, arity))
+
+            edges = []
+            rows = self.conn.execute(
+                f"SELECT id, src_id, kind, fallback, artifact, arity FROM refs WHERE id IN ({marks})", batch)
+            for ref_id, src_id, kind, fallback, artifact, arity in rows:
+                if ref_id in best:
+                    targets = best[ref_id][1]
+                    # Prefer overloads taking as many parameters as the call passes
+                    matching = [t for t in targets if t[1] is not None and t[1] == arity]
+                    edges.extend((src_id, dst, kind, ref_id, 0, None) for dst, _ in (matching or targets))
+                else:
+                    edges.append((src_id, fallback, kind, ref_id, 1, artifact))
+            self.conn.executemany(
+                "INSERT INTO edges (src_id, dst_id, kind, ref_id, external, artifact) VALUES (?, ?, ?, ?, ?, ?)",
+                edges)
+
+    def _maybe_commit(self) -> None:
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.conn.commit()
+            self._pending = 0
@@ -1,7 +1,9 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import List, Optional, Any, Tuple
+from typing import Dict, Iterator, List, Optional, Any, Tuple, TYPE_CHECKING
+if TYPE_CHECKING:
+    from src.core.streaming import SourceFile
 
 @dataclass
 class Dependency:
@@ -9,6 +11,16 @@ class Dependency:
     version: Optional[str] = None
     type: str = "unknown" # "maven", "bazel", etc.
 
+@dataclass
+class CallSite:
+    name: str
+    # Static type of the receiver when known: a type name, "this" (also used for
+    # unqualified calls) or "super". None when it cannot be determined locally.
+    # For object creation this is the instantiated type.
+    receiver: Optional[str] = None
+    arg_count: int = 0
+    kind: str = "call" # "call", "new"
+
 @dataclass
 class MethodNode:
     name: str
@@ -16,9 +28,13 @@ class MethodNode:
     code: str
     start_point: Tuple[int, int]
     end_point: Tuple[int, int]
+    # Offset of code in ParsedResult.code
+    start_byte: int = 0
     used_imports: List[str] = field(default_factory=list)
     is_override: bool = False
     annotations: List[str] = field(default_factory=list)
+    parameter_types: List[str] = field(default_factory=list)
+    calls: List[CallSite] = field(default_factory=list)
 
 @dataclass
 class ClassNode:
@@ -26,6 +42,8 @@ class ClassNode:
     code: str
     start_point: Tuple[int, int]
     end_point: Tuple[int, int]
+    # Offset of code in ParsedResult.code
+    start_byte: int = 0
     package: str = ""
     extends: Optional[str] = None
     implements: List[str] = field(default_factory=list)
@@ -36,7 +54,30 @@ class ClassNode:
 class ParsedResult:
     code: str
     imports: List[str]
+    # Top-level classes (Go: types), not nested ones
     classes: List[ClassNode] = field(default_factory=list)
+    # Top-level functions (Python: module-level defs, Go: functions without a receiver,
+    # and methods of types declared in other files as `Type.method`)
+    functions: List[MethodNode] = field(default_factory=list)
+    # Top-level code besides classes, functions, imports and comments (constants,
+    # statements, other kinds of types), which only a file chunk keeps
+    top_level_code: bool = False
+    # Sorted (start, end) offsets of every comment and of string literals spanning
+    # several lines, for normalization (see src/core/normalize.py); only with
+    # Parser.collect_trivia
+    comments: List[Tuple[int, int]] = field(default_factory=list)
+    multiline_strings: List[Tuple[int, int]] = field(default_factory=list)
+
+@dataclass
+class StreamedParse:
+    """What Parser.parse_stream found: the main class, with its code left in the file."""
+    imports: List[str]
+    # Without code or methods
+    main_class: ClassNode
+    # Byte range of the main class in the file
+    code_range: Tuple[int, int]
+    # The main class's methods, parsed as they are consumed
+    methods: Iterator[MethodNode]
 
 @dataclass
 class Chunk:
@@ -46,25 +87,58 @@ class Chunk:
     kind: str # "class", "method"
     code: str
     metadata: Optional[Any] = None
+    name: str = "" # Simple class or method name
     # Class details
     package: str = ""
     extends: Optional[str] = None
     implements: List[str] = field(default_factory=list)
     imports: List[str] = field(default_factory=list)
     dependencies: List[Dependency] = field(default_factory=list)
+    # Import -> owning artifact ("groupId:artifactId[:version]"), for imports
+    # found in the class index (see --import-artifacts)
+    import_artifacts: Dict[str, str] = field(default_factory=dict)
     # Method details
     signature: Optional[str] = None
     is_override: bool = False
+    parameter_types: List[str] = field(default_factory=list)
+    calls: List[CallSite] = field(default_factory=list)
+    # Change tracking: whitespace-normalized hash, and "added", "modified" or
+    # "unchanged" relative to the previous run's output (None if not tracked)
+    content_hash: str = ""
+    change: Optional[str] = None
+    # With --normalize: "<character offset in code>:<byte offset in the source file>" at the start
+    # of every piece of code, space-separated, to map normalized code back to the source
+    source_map: str = ""
     # Hierarchy
     parent_id: Optional[str] = None
     children: List[Chunk] = field(default_factory=list)
 
+def walk_chunks(chunks: List[Chunk]) -> Iterator[Chunk]:
+    """Every chunk of the trees, depth first: a file chunk's classes come with their methods."""
+    for chunk in chunks:
+        yield chunk
+        yield from walk_chunks(chunk.children)
+
 class Parser(ABC):
+    # Bump whenever the same input can parse differently, to invalidate cached results
+    version: str = "1"
+    # Also report ParsedResult.comments and multiline_strings; an extra pass over the
+    # syntax tree that only normalization needs
+    collect_trivia: bool = False
+
     @abstractmethod
     def parse(self, file_content: bytes, file_path: str) -> ParsedResult:
         """Parses the file content and returns the extracted code and imports."""
         pass
 
+    def parse_stream(self, source: SourceFile, file_path: str) -> Optional[StreamedParse]:
+        """Parses a large file piece by piece, never holding all of it or its syntax tree.
+
+        Returns None when the parser has no streaming mode or the file doesn't
+        fit it; callers then fall back to parse().
+        """
+        return None
+
 class DependencyResolver(ABC):
     @abstractmethod
     def resolve(self, file_path: str) -> List[Dependency]:
@@ -78,7 +152,14 @@ class Chunker(ABC):
         pass
 
 class Writer(ABC):
+    # Output bytes produced so far, reported in the run metrics
+    bytes_written: int = 0
+
     @abstractmethod
     def write(self, chunks: List[Chunk], output_path: str) -> None:
         """Writes the chunks to the output path."""
         pass
+
+    def close(self) -> None:
+        """Flushes any buffered state. Called once after the last write."""
+        pass
@@ -0,0 +1,70 @@
+import importlib
+import importlib.util
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from src.core.interfaces import Parser
+
+@dataclass
+class LanguageSpec:
+    name: str
+    extensions: List[str]
+    # "module:Class" of the Parser; imported on first use only
+    parser: str
+    # tree-sitter grammar package, checked without importing it
+    grammar: str
+    # Methods can share a name, so chunk IDs need the parameter types
+    overloads: bool = False
+    # Indentation is syntax, so change detection must not ignore it
+    significant_indent: bool = False
+
+LANGUAGES: Dict[str, LanguageSpec] = {}
+_BY_EXTENSION: Dict[str, LanguageSpec] = {}
+
+def register_language(spec: LanguageSpec) -> None:
+    LANGUAGES[spec.name] = spec
+    for ext in spec.extensions:
+        _BY_EXTENSION[ext] = spec
+
+register_language(LanguageSpec("java", [".java"], "src.core.languages.java_parser:JavaParser", "tree_sitter_java", overloads=True))
+register_language(LanguageSpec("python", [".py"], "src.core.languages.python_parser:PythonParser", "tree_sitter_python",
+                                  significant_indent=True))
+register_language(LanguageSpec("go", [".go"], "src.core.languages.go_parser:GoParser", "tree_sitter_go"))
+
+def language_spec(file_path: str) -> Optional[LanguageSpec]:
+    return _BY_EXTENSION.get(os.path.splitext(file_path)[1].lower())
+
+def language_for(file_path: str) -> Optional[str]:
+    spec = language_spec(file_path)
+    return spec.name if spec else None
+
+def is_available(language: str) -> bool:
+    """Whether the language's grammar package is installed."""
+    return importlib.util.find_spec(LANGUAGES[language].grammar) is not None
+
+def extensions_for(languages: List[str]) -> List[str]:
+    return sorted(ext for name in languages for ext in LANGUAGES[name].extensions)
+
+class ParserRegistry:
+    """Per-process parser instances, created the first time a file of their language shows up.
+
+    Workers that never see a language never import its grammar or compile its queries.
+    """
+    def __init__(self, collect_trivia: bool = False):
+        self.collect_trivia = collect_trivia
+        self._parsers: Dict[str, Parser] = {}
+
+    def get(self, file_path: str) -> Optional[Parser]:
+        """The parser for file_path, or None if its extension isn't registered."""
+        spec = language_spec(file_path)
+        if spec is None:
+            return None
+        parser = self._parsers.get(spec.name)
+        if parser is None:
+            module_name, class_name = spec.parser.split(':')
+            parser = self._parsers[spec.name] = getattr(importlib.import_module(module_name), class_name)()
+            parser.collect_trivia = self.collect_trivia
+        return parser
+
+    def loaded(self) -> List[str]:
+        return sorted(self._parsers)
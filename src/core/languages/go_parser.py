@@ -0,0 +1,178 @@
+import tree_sitter_go
+from tree_sitter import Language, Parser as TSParser, Query, QueryCursor, Node
+from src.core.interfaces import Parser, ParsedResult, ClassNode, MethodNode
+from src.core.languages.trivia import comment_and_string_ranges
+from src.core.streaming import ByteText
+from typing import Dict, List
+
+class GoParser(Parser):
+    """Maps Go onto the class model: struct and interface types are classes,
+    methods are attached to the type named by their receiver, and functions
+    without one are top-level functions. Methods whose type is declared in
+    another file of the package are top-level functions named `Type.method`."""
+    # 2: code sliced by byte offset (non-ASCII sources)
+    # 3: package-level types only, and functions
+    # 4: methods of types declared in other files, top_level_code
+    version = "4"
+
+    def __init__(self):
+        try:
+            self.language = Language(tree_sitter_go.language())
+            self.parser = TSParser(self.language)
+
+            # Pre-compile queries
+            self.import_query = Query(self.language, "(import_spec path: (_) @path)")
+            self.package_query = Query(self.language, "(package_clause (package_identifier) @package)")
+            self.type_query = Query(self.language, """
+                (type_declaration (type_spec name: (type_identifier) @name type: [(struct_type) (interface_type)]) @type)
+            """)
+            self.method_query = Query(self.language, "(method_declaration) @method")
+            self.function_query = Query(self.language, "(function_declaration) @function")
+            self.trivia_query = Query(self.language, "(comment) @comment (raw_string_literal) @string")
+
+        except Exception as e:
+            print(f"Error loading Go language: {e}")
+            raise e
+
+    def parse(self, file_content: bytes, file_path: str) -> ParsedResult:
+        tree = self.parser.parse(file_content)
+        root = tree.root_node
+
+        # Node offsets are bytes: slice the bytes, not the decoded text
+        code_str = ByteText(file_content)
+
+        imports = self._extract_imports(root, code_str)
+        package = self._extract_package(root, code_str)
+        methods_by_type = self._extract_methods(root, code_str, imports)
+        classes = self._extract_types(root, code_str, package, methods_by_type)
+        functions = self._extract_functions(root, code_str, imports)
+        # What is left belongs to types of other files
+        for receiver, methods in methods_by_type.items():
+            for method in methods:
+                method.name = f"{receiver}.{method.name}"
+                functions.append(method)
+        functions.sort(key=lambda f: f.start_byte)
+        result = ParsedResult(code=file_content.decode('utf-8', errors='replace'), imports=imports, classes=classes,
+                              functions=functions, top_level_code=self._has_top_level_code(root))
+        if self.collect_trivia:
+            result.comments, result.multiline_strings = comment_and_string_ranges(self.trivia_query, root)
+        return result
+
+    def _extract_package(self, root_node, code_str: str) -> str:
+        cursor = QueryCursor(self.package_query)
+        for node in cursor.captures(root_node).get('package', []):
+            return self._text(node, code_str)
+        return ""
+
+    def _extract_imports(self, root_node, code_str: str) -> List[str]:
+        cursor = QueryCursor(self.import_query)
+        nodes = sorted(cursor.captures(root_node).get('path', []), key=lambda n: n.start_byte)
+        return [self._text(node, code_str).strip('"`') for node in nodes]
+
+    def _extract_types(self, root_node, code_str: str, package: str,
+                       methods_by_type: Dict[str, List[MethodNode]]) -> List[ClassNode]:
+        """Struct and interface types; their methods are taken out of methods_by_type."""
+        classes = []
+        cursor = QueryCursor(self.type_query)
+        for _, captures in cursor.matches(root_node):
+            spec = captures['type'][0]
+            if spec.parent.parent != root_node:
+                # Declared inside a function
+                continue
+            name = self._text(captures['name'][0], code_str)
+            # Include the `type` keyword when the declaration holds a single spec
+            decl = spec.parent if spec.parent.type == 'type_declaration' and spec.parent.named_child_count == 1 else spec
+            classes.append(ClassNode(
+                name=name,
+                code=self._text(decl, code_str),
+                start_point=tuple(decl.start_point),
+                end_point=tuple(decl.end_point),
+                start_byte=decl.start_byte,
+                package=package,
+                methods=methods_by_type.pop(name, [])
+            ))
+        classes.sort(key=lambda c: c.start_point)
+        return classes
+
+    def _extract_methods(self, root_node, code_str: str, file_imports: List[str]) -> Dict[str, List[MethodNode]]:
+        methods: Dict[str, List[MethodNode]] = {}
+        cursor = QueryCursor(self.method_query)
+        for node in sorted(cursor.captures(root_node).get('method', []), key=lambda n: n.start_byte):
+            receiver = self._receiver_type(node, code_str)
+            if receiver:
+                methods.setdefault(receiver, []).append(self._parse_method_node(node, code_str, file_imports))
+        return methods
+
+    def _extract_functions(self, root_node, code_str: str, file_imports: List[str]) -> List[MethodNode]:
+        cursor = QueryCursor(self.function_query)
+        nodes = sorted(cursor.captures(root_node).get('function', []), key=lambda n: n.start_byte)
+        return [self._parse_method_node(node, code_str, file_imports) for node in nodes]
+
+    def _has_top_level_code(self, root_node) -> bool:
+        for node in root_node.named_children:
+            if node.type in ('package_clause', 'import_declaration', 'comment', 'function_declaration',
+                             'method_declaration'):
+                continue
+            # Struct and interface types are classes; aliases and other types are not
+            if node.type == 'type_declaration' and all(
+                    spec.type == 'type_spec' and spec.child_by_field_name('type').type in ('struct_type', 'interface_type')
+                    for spec in node.named_children if spec.type != 'comment'):
+                continue
+            return True
+        return False
+
+    def _receiver_type(self, method_node: Node, code_str: str) -> str:
+        receiver_node = method_node.child_by_field_name('receiver')
+        if not receiver_node:
+            return ""
+        for param in receiver_node.named_children:
+            type_node = param.child_by_field_name('type')
+            if type_node is None:
+                continue
+            # (s *Server), (s Server[T])
+            text = self._text(type_node, code_str).lstrip('*').strip()
+            return text.split('[', 1)[0]
+        return ""
+
+    def _parse_method_node(self, node: Node, code_str: str, file_imports: List[str]) -> MethodNode:
+        name_node = node.child_by_field_name('name')
+        name = self._text(name_node, code_str) if name_node else "unknown"
+
+        body_node = node.child_by_field_name('body')
+        end = body_node.start_byte if body_node else node.end_byte
+        signature = code_str[node.start_byte:end].strip()
+
+        method_code = self._text(node, code_str)
+        # Go code refers to imports by their last path element
+        used_imports = [imp for imp in file_imports if imp.rsplit('/', 1)[-1] + '.' in method_code]
+
+        return MethodNode(
+            name=name,
+            signature=signature,
+            code=method_code,
+            start_point=tuple(node.start_point),
+            end_point=tuple(node.end_point),
+            start_byte=node.start_byte,
+            used_imports=used_imports,
+            parameter_types=self._extract_parameter_types(node, code_str)
+        )
+
+    def _extract_parameter_types(self, method_node: Node, code_str: str) -> List[str]:
+        params_node = method_node.child_by_field_name('parameters')
+        types = []
+        if not params_node:
+            return types
+        for param in params_node.named_children:
+            type_node = param.child_by_field_name('type')
+            if type_node is None:
+                continue
+            type_text = self._text(type_node, code_str)
+            if param.type == 'variadic_parameter_declaration':
+                type_text = "..." + type_text
+            # `a, b int` declares two parameters of one type
+            names = param.children_by_field_name('name')
+            types.extend([type_text] * max(1, len(names)))
+        return types
+
+    def _text(self, node: Node, code_str: str) -> str:
+        return code_str[node.start_byte:node.end_byte]
@@ -1,9 +1,23 @@
 import tree_sitter_java
 from tree_sitter import Language, Parser as TSParser, Query, QueryCursor, Node
-from src.core.interfaces import Parser, ParsedResult, ClassNode, MethodNode
-from typing import List, Optional
+from src.core.interfaces import Parser, ParsedResult, StreamedParse, ClassNode, MethodNode, CallSite
+from src.core.languages.java_scanner import MemberLayout, scan_members
+from src.core.languages.trivia import comment_and_string_ranges
+from src.core.streaming import ByteText, SourceFile
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Members are parsed inside a stand-in class, a batch of about this many bytes at a time
+_STREAM_PREFIX = b"class __Stream__ {\n"
+_STREAM_SUFFIX = b"\n}"
+_STREAM_BATCH_BYTES = 256 * 1024
 
 class JavaParser(Parser):
+    # 2: imports and methods in source order
+    # 3: code sliced by byte offset (non-ASCII sources)
+    # 4: top-level classes only
+    # 5: top_level_code
+    version = "5"
+
     def __init__(self):
         try:
             self.language = Language(tree_sitter_java.language())
@@ -14,6 +28,16 @@ class JavaParser(Parser):
             self.package_query = Query(self.language, "(package_declaration) @package")
             self.class_query = Query(self.language, "(class_declaration) @class")
             self.method_query = Query(self.language, "(method_declaration) @method")
+            self.trivia_query = Query(self.language, "[(line_comment) (block_comment)] @comment (string_literal) @string")
+            self.call_query = Query(self.language, "(method_invocation) @call (object_creation_expression) @new")
+            self.field_query = Query(self.language, """
+                (field_declaration type: (_) @type declarator: (variable_declarator name: (identifier) @name))
+            """)
+            self.variable_query = Query(self.language, """
+                (formal_parameter type: (_) @type name: (identifier) @name)
+                (spread_parameter (_) @type (variable_declarator name: (identifier) @name))
+                (local_variable_declaration type: (_) @type declarator: (variable_declarator name: (identifier) @name))
+            """)
 
         except Exception as e:
             print(f"Error loading Java language: {e}")
@@ -23,15 +47,95 @@ class JavaParser(Parser):
         tree = self.parser.parse(file_content)
         root = tree.root_node
 
-        # Decode once
-        code_str = file_content.decode('utf-8', errors='replace')
+        # Node offsets are bytes: slice the bytes, not the decoded text
+        code_str = ByteText(file_content)
 
         imports = self._extract_imports(root, code_str)
         package = self._extract_package(root, code_str)
 
         classes = self._extract_classes(root, code_str, imports, package)
+        # Interfaces, enums and records aren't classes; a file chunk keeps them
+        top_level_code = any(node.type not in ('package_declaration', 'import_declaration', 'line_comment',
+                                               'block_comment', 'class_declaration') for node in root.named_children)
+        result = ParsedResult(code=file_content.decode('utf-8', errors='replace'), imports=imports, classes=classes,
+                              top_level_code=top_level_code)
+        if self.collect_trivia:
+            result.comments, result.multiline_strings = comment_and_string_ranges(self.trivia_query, root)
+        return result
+
+    def parse_stream(self, source: SourceFile, file_path: str) -> Optional[StreamedParse]:
+        """Parses the file's first top-level class without building a syntax tree of the whole file.
+
+        scan_members finds the byte range of every member of the class body;
+        the header (package, imports, class declaration) and then batches of
+        members are parsed separately, so the tree-sitter trees stay small.
+        Line and column numbers are mapped back to the file.
+        """
+        source.file.seek(0)
+        layout = scan_members(source.file)
+        if layout.body_start < 0 or layout.body_end < 0 or layout.more_types:
+            # Files with several top-level types go through parse()
+            return None
+
+        header = source.read(0, layout.body_start + 1) + b"}"
+        root = self.parser.parse(header).root_node
+        types = root.named_children
+        if not types or types[-1].type != 'class_declaration':
+            # Interfaces, enums and records go through parse()
+            return None
+        node = types[-1]
+        code_str = ByteText(header)
+        imports = self._extract_imports(root, code_str)
+        package = self._extract_package(root, code_str)
 
-        return ParsedResult(code=code_str, imports=imports, classes=classes)
+        main_class = self._class_header(node, code_str, package)
+        main_class.start_point = tuple(node.start_point)
+        main_class.end_point = layout.body_end_point
+        return StreamedParse(
+            imports=imports,
+            main_class=main_class,
+            code_range=(node.start_byte, layout.body_end),
+            methods=self._stream_methods(source, layout, imports)
+        )
+
+    def _stream_methods(self, source: SourceFile, layout: MemberLayout, file_imports: List[str]) -> Iterator[MethodNode]:
+        # Field types first, from the members ending in `;`
+        field_types: Dict[str, str] = {}
+        fields = [i for i in range(len(layout)) if layout.semicolon[i]]
+        pieces: List[bytes] = []
+        size = 0
+        for n, i in enumerate(fields):
+            pieces.append(source.read(layout.starts[i], layout.ends[i]))
+            size += len(pieces[-1])
+            if size >= _STREAM_BATCH_BYTES or n == len(fields) - 1:
+                data = _STREAM_PREFIX + b"\n".join(pieces) + _STREAM_SUFFIX
+                body = self._stream_body(data)
+                if body is not None:
+                    field_types.update(self._extract_typed_names(self.field_query, body, ByteText(data), scope=body))
+                pieces, size = [], 0
+
+        for i, j in layout.batches(_STREAM_BATCH_BYTES):
+            data = _STREAM_PREFIX + source.read(layout.starts[i], layout.ends[j - 1]) + _STREAM_SUFFIX
+            body = self._stream_body(data)
+            if body is None:
+                continue
+            code_str = ByteText(data)
+            origin = (layout.rows[i], layout.cols[i])
+            for child in body.named_children:
+                if child.type != 'method_declaration':
+                    continue
+                method = self._parse_method_node(child, code_str, file_imports, field_types)
+                method.start_byte += layout.starts[i] - len(_STREAM_PREFIX)
+                method.start_point = _shift(method.start_point, origin)
+                method.end_point = _shift(method.end_point, origin)
+                yield method
+
+    def _stream_body(self, data: bytes) -> Optional[Node]:
+        root = self.parser.parse(data).root_node
+        for node in root.named_children:
+            if node.type == 'class_declaration':
+                return node.child_by_field_name('body')
+        return None
 
     def _extract_package(self, root_node, code_str: str) -> str:
         cursor = QueryCursor(self.package_query)
@@ -49,7 +153,8 @@ class JavaParser(Parser):
         captures = cursor.captures(root_node)
 
         if 'import' in captures:
-             for node in captures['import']:
+             # Captures don't come in document order
+             for node in sorted(captures['import'], key=lambda n: n.start_byte):
                  text = code_str[node.start_byte:node.end_byte]
                  imports.append(text.replace('import ', '').replace(';', '').strip())
         return imports
@@ -60,12 +165,27 @@ class JavaParser(Parser):
         captures = cursor.captures(root_node)
 
         if 'class' in captures:
-            for node in captures['class']:
-                classes.append(self._parse_class_node(node, code_str, file_imports, package))
+            for node in sorted(captures['class'], key=lambda n: n.start_byte):
+                # Nested classes stay in their outer class's code
+                if node.parent == root_node:
+                    classes.append(self._parse_class_node(node, code_str, file_imports, package))
 
         return classes
 
     def _parse_class_node(self, node: Node, code_str: str, file_imports: List[str], package: str) -> ClassNode:
+        class_node = self._class_header(node, code_str, package)
+
+        # Methods
+        body_node = node.child_by_field_name('body')
+        if body_node:
+            field_types = self._extract_typed_names(self.field_query, body_node, code_str, scope=body_node)
+            class_node.methods = self._extract_methods(body_node, code_str, file_imports, field_types)
+
+        class_node.code = code_str[node.start_byte:node.end_byte]
+        return class_node
+
+    def _class_header(self, node: Node, code_str: str, package: str) -> ClassNode:
+        """The class declaration without its code or methods."""
         name_node = node.child_by_field_name('name')
         name = code_str[name_node.start_byte:name_node.end_byte] if name_node else "Anonymous"
 
@@ -98,39 +218,31 @@ class JavaParser(Parser):
                 if 'annotation' in child.type:
                      annotations.append(code_str[child.start_byte:child.end_byte])
 
-        # Methods
-        body_node = node.child_by_field_name('body')
-        methods = []
-        if body_node:
-            methods = self._extract_methods(body_node, code_str, file_imports)
-
-        class_code = code_str[node.start_byte:node.end_byte]
-
         return ClassNode(
             name=name,
-            code=class_code,
-            start_point=node.start_point,
-            end_point=node.end_point,
+            code="",
+            start_point=tuple(node.start_point),
+            end_point=tuple(node.end_point),
+            start_byte=node.start_byte,
             package=package,
             extends=superclass,
             implements=implements_list,
-            methods=methods,
             annotations=annotations
         )
 
-    def _extract_methods(self, class_body_node: Node, code_str: str, file_imports: List[str]) -> List[MethodNode]:
+    def _extract_methods(self, class_body_node: Node, code_str: str, file_imports: List[str], field_types: Dict[str, str]) -> List[MethodNode]:
         methods = []
         cursor = QueryCursor(self.method_query)
         captures = cursor.captures(class_body_node)
 
         if 'method' in captures:
-            for node in captures['method']:
+            for node in sorted(captures['method'], key=lambda n: n.start_byte):
                 if node.parent != class_body_node:
                     continue
-                methods.append(self._parse_method_node(node, code_str, file_imports))
+                methods.append(self._parse_method_node(node, code_str, file_imports, field_types))
         return methods
 
-    def _parse_method_node(self, node: Node, code_str: str, file_imports: List[str]) -> MethodNode:
+    def _parse_method_node(self, node: Node, code_str: str, file_imports: List[str], field_types: Dict[str, str]) -> MethodNode:
         name_node = node.child_by_field_name('name')
         name = code_str[name_node.start_byte:name_node.end_byte] if name_node else "unknown"
 
@@ -164,13 +276,126 @@ class JavaParser(Parser):
             if short_name in method_code:
                  used_imports.append(imp)
 
+        # Locals and parameters shadow fields
+        variable_types = dict(field_types)
+        variable_types.update(self._extract_typed_names(self.variable_query, node, code_str))
+
         return MethodNode(
             name=name,
             signature=signature,
             code=method_code,
-            start_point=node.start_point,
-            end_point=node.end_point,
+            start_point=tuple(node.start_point),
+            end_point=tuple(node.end_point),
+            start_byte=node.start_byte,
             used_imports=used_imports,
             is_override=is_override,
-            annotations=annotations
+            annotations=annotations,
+            parameter_types=self._extract_parameter_types(node, code_str),
+            calls=self._extract_calls(node, code_str, variable_types)
         )
+
+    def _extract_parameter_types(self, method_node: Node, code_str: str) -> List[str]:
+        params_node = method_node.child_by_field_name('parameters')
+        types = []
+        if not params_node:
+            return types
+        for child in params_node.named_children:
+            if child.type == 'formal_parameter':
+                type_node = child.child_by_field_name('type')
+                if type_node:
+                    types.append(self._type_text(type_node, code_str))
+            elif child.type == 'spread_parameter':
+                for part in child.named_children:
+                    if part.type != 'modifiers':
+                        types.append(self._type_text(part, code_str) + "...")
+                        break
+        return types
+
+    def _extract_typed_names(self, query: Query, node: Node, code_str: str, scope: Optional[Node] = None) -> Dict[str, str]:
+        """Maps declared variable names to their declared (non-generic) type names.
+
+        With a scope, only declarations that are direct children of it count
+        (e.g. fields of this class rather than of nested classes).
+        """
+        names = {}
+        cursor = QueryCursor(query)
+        for _, captures in cursor.matches(node):
+            type_nodes = captures.get('type')
+            name_nodes = captures.get('name')
+            if not type_nodes or not name_nodes:
+                continue
+            if scope is not None and type_nodes[0].parent.parent != scope:
+                continue
+            type_name = self._type_text(type_nodes[0], code_str).split('<', 1)[0]
+            if type_name == 'var':
+                continue
+            for name_node in name_nodes:
+                names[code_str[name_node.start_byte:name_node.end_byte]] = type_name
+        return names
+
+    def _extract_calls(self, method_node: Node, code_str: str, variable_types: Dict[str, str]) -> List[CallSite]:
+        cursor = QueryCursor(self.call_query)
+        captures = cursor.captures(method_node)
+
+        sites = []
+        for node in captures.get('call', []):
+            name_node = node.child_by_field_name('name')
+            if not name_node:
+                continue
+            receiver = self._receiver_type(node.child_by_field_name('object'), code_str, variable_types)
+            sites.append((node.start_byte, CallSite(
+                name=code_str[name_node.start_byte:name_node.end_byte],
+                receiver=receiver,
+                arg_count=self._arg_count(node),
+                kind="call"
+            )))
+        for node in captures.get('new', []):
+            type_node = node.child_by_field_name('type')
+            if not type_node:
+                continue
+            sites.append((node.start_byte, CallSite(
+                name="<init>",
+                receiver=self._type_text(type_node, code_str).split('<', 1)[0],
+                arg_count=self._arg_count(node),
+                kind="new"
+            )))
+
+        sites.sort(key=lambda site: site[0])
+        return [site for _, site in sites]
+
+    def _receiver_type(self, object_node: Optional[Node], code_str: str, variable_types: Dict[str, str]) -> Optional[str]:
+        if object_node is None or object_node.type == 'this':
+            return "this"
+        if object_node.type == 'super':
+            return "super"
+
+        text = code_str[object_node.start_byte:object_node.end_byte]
+        if object_node.type == 'identifier':
+            if text in variable_types:
+                return variable_types[text]
+            # Uppercase identifiers that aren't variables are static calls on a type
+            return text if text[:1].isupper() else None
+        if object_node.type == 'field_access':
+            owner = object_node.child_by_field_name('object')
+            field = object_node.child_by_field_name('field')
+            if owner is not None and owner.type == 'this' and field is not None:
+                return variable_types.get(code_str[field.start_byte:field.end_byte])
+            parts = text.split('.')
+            # Qualified type name such as java.util.Collections or Outer.Inner
+            if all(part.isidentifier() for part in parts) and parts[-1][:1].isupper() and parts[0] not in variable_types:
+                return text
+        return None
+
+    def _arg_count(self, node: Node) -> int:
+        args_node = node.child_by_field_name('arguments')
+        if not args_node:
+            return 0
+        return sum(1 for child in args_node.named_children if 'comment' not in child.type)
+
+    def _type_text(self, type_node: Node, code_str: str) -> str:
+        return " ".join(code_str[type_node.start_byte:type_node.end_byte].split())
+
+def _shift(point: Tuple[int, int], origin: Tuple[int, int]) -> Tuple[int, int]:
+    # From a batch (which starts on line 1 after the stand-in class header) back to the file
+    row, col = point
+    return (origin[0] + row - 1, origin[1] + col if row == 1 else col)
@@ -0,0 +1,196 @@
+import re
+from array import array
+from dataclasses import dataclass, field
+from typing import BinaryIO, Iterator, Tuple
+
+_BLOCK = 1 << 16
+
+# Everything the scan has to look at; identifiers and operators are skipped in C
+_TOKEN = re.compile(rb'"""|"|\'|//|/\*|[{}();]')
+_STRING_END = re.compile(rb'(?:[^"\\\n]|\\.)*"')
+_CHAR_END = re.compile(rb"(?:[^'\\\n]|\\.)*'")
+_TEXT_BLOCK_END = re.compile(rb'(?:[^"\\]|\\.|"(?!""))*"""', re.S)
+_NON_SPACE = re.compile(rb'\S')
+
+# A `}` followed by one of these doesn't end a member (`Runnable r = new Runnable() {...};`)
+_CONTINUATION = frozenset(b';,.)]')
+
+@dataclass
+class MemberLayout:
+    """Byte ranges of the direct members of a file's first top-level type body."""
+    # Offset of the `{` that opens the type body; everything before it is the header
+    body_start: int = -1
+    # Offset just past the `}` that closes it, and its line and column
+    body_end: int = -1
+    body_end_point: Tuple[int, int] = (0, 0)
+    starts: array = field(default_factory=lambda: array('q'))
+    ends: array = field(default_factory=lambda: array('q'))
+    # Line and byte column of every member start
+    rows: array = field(default_factory=lambda: array('q'))
+    cols: array = field(default_factory=lambda: array('q'))
+    # Members ending in `;` (fields, abstract methods) rather than `}`
+    semicolon: array = field(default_factory=lambda: array('b'))
+    # Another top-level type follows the first one
+    more_types: bool = False
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def batches(self, max_bytes: int) -> Iterator[Tuple[int, int]]:
+        """Runs of consecutive members [i, j) spanning about max_bytes (at least one member each)."""
+        i = 0
+        while i < len(self):
+            j = i + 1
+            while j < len(self) and self.ends[j] - self.starts[i] <= max_bytes:
+                j += 1
+            yield i, j
+            i = j
+
+def scan_members(f: BinaryIO) -> MemberLayout:
+    """Splits the body of the first top-level type in a Java file into its members.
+
+    A lexical scan that skips comments, strings, text blocks and character
+    literals and counts braces and parentheses: a member ends at a `;` or at
+    a `}` that returns to the body's depth, outside any parentheses. Reads the
+    file in blocks, so memory stays constant however large the file is; the
+    members are then small enough to parse one batch at a time. After the
+    body, the rest of the file is only scanned for another type body.
+    """
+    layout = MemberLayout()
+    buf = b""
+    base = 0  # absolute offset of buf[0]
+    pos = 0
+    eof = False
+    # Line counting up to buf[counted]
+    counted = 0
+    row = 0
+    line_start = 0
+    depth = 0
+    parens = 0
+    member_start = -1
+    member_point = (0, 0)
+
+    def refill() -> bool:
+        nonlocal buf, base, pos, eof, counted
+        if eof:
+            return False
+        data = f.read(_BLOCK)
+        if not data:
+            # Leave buf as it is: callers may still hold matches into it
+            eof = True
+            return False
+        # Count the lines about to be dropped, then drop what has been consumed
+        point(base + pos)
+        buf = buf[pos:] + data
+        base += pos
+        counted -= pos
+        pos = 0
+        return True
+
+    def point(offset: int) -> Tuple[int, int]:
+        # Offsets must not decrease between calls
+        nonlocal counted, row, line_start
+        end = offset - base
+        row += buf.count(b'\n', counted, end)
+        nl = buf.rfind(b'\n', counted, end)
+        if nl >= 0:
+            line_start = base + nl + 1
+        counted = end
+        return row, offset - line_start
+
+    def start_member(offset: int) -> None:
+        nonlocal member_start, member_point
+        member_start = offset
+        member_point = point(offset)
+
+    def emit(end: int, semicolon: bool) -> None:
+        if end > member_start:
+            layout.starts.append(member_start)
+            layout.ends.append(end)
+            layout.rows.append(member_point[0])
+            layout.cols.append(member_point[1])
+            layout.semicolon.append(semicolon)
+        start_member(end)
+
+    def skip(pattern: "re.Pattern", stops_at_newline: bool) -> None:
+        # Moves pos past the end of a literal that started just before pos
+        nonlocal pos
+        while True:
+            match = pattern.match(buf, pos)
+            if match:
+                pos = match.end()
+                return
+            newline = buf.find(b'\n', pos) if stops_at_newline else -1
+            if newline >= 0:
+                # Unterminated literal: resume on the next line, like the compiler's error recovery
+                pos = newline + 1
+                return
+            if not refill():
+                pos = len(buf)
+                return
+
+    def skip_to(terminator: bytes) -> None:
+        nonlocal pos
+        while True:
+            end = buf.find(terminator, pos)
+            if end >= 0:
+                pos = end + len(terminator)
+                return
+            # Keep the tail in case the terminator straddles the block boundary
+            pos = max(pos, len(buf) - len(terminator) + 1)
+            if not refill():
+                pos = len(buf)
+                return
+
+    refill()
+    while True:
+        match = _TOKEN.search(buf, pos)
+        # Multi-byte tokens need lookahead: don't act on a match at the very end of a block
+        if match is None or (match.start() > len(buf) - 3 and not eof):
+            if refill():
+                continue
+            if match is None:
+                break
+        token = match.group()
+        pos = match.end()
+        offset = base + match.start()
+        if token == b'"':
+            skip(_STRING_END, True)
+        elif token == b'"""':
+            skip(_TEXT_BLOCK_END, False)
+        elif token == b"'":
+            skip(_CHAR_END, True)
+        elif token == b'//':
+            skip_to(b'\n')
+        elif token == b'/*':
+            skip_to(b'*/')
+        elif token == b'(':
+            parens += 1
+        elif token == b')':
+            parens = max(0, parens - 1)
+        elif token == b'{':
+            depth += 1
+            if depth == 1 and parens == 0 and layout.body_end >= 0:
+                layout.more_types = True
+                return layout
+            if depth == 1 and parens == 0 and layout.body_start < 0:
+                layout.body_start = offset
+                start_member(offset + 1)
+        elif token == b'}':
+            depth -= 1
+            if layout.body_start < 0 or parens or layout.body_end >= 0:
+                continue
+            if depth == 0:
+                emit(offset, False)
+                layout.body_end = offset + 1
+                layout.body_end_point = point(offset + 1)
+            if depth == 1:
+                nxt = _NON_SPACE.search(buf, pos)
+                while nxt is None and refill():
+                    nxt = _NON_SPACE.search(buf, pos)
+                if nxt is None or nxt.group()[0] not in _CONTINUATION:
+                    emit(offset + 1, False)
+        elif token == b';':
+            if layout.body_start >= 0 and depth == 1 and parens == 0:
+                emit(offset + 1, True)
+    return layout
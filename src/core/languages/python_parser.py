@@ -0,0 +1,201 @@
+import tree_sitter_python
+from tree_sitter import Language, Parser as TSParser, Query, QueryCursor, Node
+from src.core.interfaces import Parser, ParsedResult, ClassNode, MethodNode
+from src.core.languages.trivia import comment_and_string_ranges
+from src.core.streaming import ByteText
+from typing import List, Optional
+
+class PythonParser(Parser):
+    # 2: code sliced by byte offset (non-ASCII sources)
+    # 3: top-level classes only, and module-level functions
+    # 4: top_level_code
+    version = "4"
+
+    def __init__(self):
+        try:
+            self.language = Language(tree_sitter_python.language())
+            self.parser = TSParser(self.language)
+
+            # Pre-compile queries
+            self.import_query = Query(self.language, """
+                (import_statement name: (dotted_name) @module)
+                (import_statement name: (aliased_import name: (dotted_name) @module))
+                (import_from_statement) @from
+            """)
+            self.class_query = Query(self.language, "(class_definition) @class")
+            self.function_query = Query(self.language, "(function_definition) @function")
+            self.trivia_query = Query(self.language, "(comment) @comment (string) @string")
+
+        except Exception as e:
+            print(f"Error loading Python language: {e}")
+            raise e
+
+    def parse(self, file_content: bytes, file_path: str) -> ParsedResult:
+        tree = self.parser.parse(file_content)
+        root = tree.root_node
+
+        # Node offsets are bytes: slice the bytes, not the decoded text
+        code_str = ByteText(file_content)
+
+        imports = self._extract_imports(root, code_str)
+        classes = self._extract_classes(root, code_str, imports)
+        functions = self._extract_functions(root, code_str, imports)
+        result = ParsedResult(code=file_content.decode('utf-8', errors='replace'), imports=imports, classes=classes,
+                              functions=functions, top_level_code=self._has_top_level_code(root))
+        if self.collect_trivia:
+            result.comments, result.multiline_strings = comment_and_string_ranges(self.trivia_query, root)
+        return result
+
+    def _extract_imports(self, root_node, code_str: str) -> List[str]:
+        """Imported names as dotted paths: `from a.b import c` -> "a.b.c", `import a.b` -> "a.b"."""
+        found = []
+        cursor = QueryCursor(self.import_query)
+        captures = cursor.captures(root_node)
+
+        for node in captures.get('module', []):
+            found.append((node.start_byte, self._text(node, code_str)))
+        for node in captures.get('from', []):
+            module_node = node.child_by_field_name('module_name')
+            module = self._text(module_node, code_str) if module_node else ""
+            names = node.children_by_field_name('name')
+            if not names:
+                # from module import *
+                found.append((node.start_byte, f"{module}.*"))
+            for name_node in names:
+                if name_node.type == 'aliased_import':
+                    name_node = name_node.child_by_field_name('name')
+                name = self._text(name_node, code_str)
+                separator = "" if module.endswith('.') else "."
+                found.append((name_node.start_byte, f"{module}{separator}{name}"))
+
+        found.sort()
+        return [name for _, name in found]
+
+    def _extract_classes(self, root_node, code_str: str, file_imports: List[str]) -> List[ClassNode]:
+        classes = []
+        cursor = QueryCursor(self.class_query)
+        captures = cursor.captures(root_node)
+
+        if 'class' in captures:
+            for node in sorted(captures['class'], key=lambda n: n.start_byte):
+                if not self._nested(node):
+                    classes.append(self._parse_class_node(node, code_str, file_imports))
+
+        return classes
+
+    def _extract_functions(self, root_node, code_str: str, file_imports: List[str]) -> List[MethodNode]:
+        """Functions defined at module level (also under `if` or `try`), with their decorators."""
+        functions = []
+        cursor = QueryCursor(self.function_query)
+        for node in sorted(cursor.captures(root_node).get('function', []), key=lambda n: n.start_byte):
+            if not self._nested(node):
+                outer = node.parent if node.parent.type == 'decorated_definition' else node
+                functions.append(self._parse_method_node(outer, node, code_str, file_imports))
+        return functions
+
+    def _has_top_level_code(self, root_node) -> bool:
+        """Whether the module holds more than imports, comments, classes and functions (docstrings count)."""
+        for node in root_node.named_children:
+            definition = self._unwrap_decorated(node)
+            if definition.type not in ('import_statement', 'import_from_statement', 'future_import_statement',
+                                       'comment', 'class_definition', 'function_definition'):
+                return True
+        return False
+
+    def _nested(self, node: Node) -> bool:
+        """Whether node is defined inside a class or function."""
+        parent = node.parent
+        while parent is not None:
+            if parent.type in ('class_definition', 'function_definition'):
+                return True
+            parent = parent.parent
+        return False
+
+    def _parse_class_node(self, node: Node, code_str: str, file_imports: List[str]) -> ClassNode:
+        name_node = node.child_by_field_name('name')
+        name = self._text(name_node, code_str) if name_node else "Anonymous"
+
+        # Base classes: the first one is treated as the superclass, the rest as mixins
+        bases = []
+        superclasses_node = node.child_by_field_name('superclasses')
+        if superclasses_node:
+            bases = [self._text(child, code_str) for child in superclasses_node.named_children
+                     if child.type != 'keyword_argument']
+
+        methods = []
+        body_node = node.child_by_field_name('body')
+        if body_node:
+            for child in body_node.named_children:
+                function_node = self._unwrap_decorated(child)
+                if function_node is not None and function_node.type == 'function_definition':
+                    methods.append(self._parse_method_node(child, function_node, code_str, file_imports))
+
+        outer = node.parent if node.parent and node.parent.type == 'decorated_definition' else node
+        return ClassNode(
+            name=name,
+            code=self._text(outer, code_str),
+            start_point=tuple(outer.start_point),
+            end_point=tuple(outer.end_point),
+            start_byte=outer.start_byte,
+            extends=bases[0] if bases else None,
+            implements=bases[1:],
+            methods=methods,
+            annotations=self._decorators(outer, code_str)
+        )
+
+    def _parse_method_node(self, node: Node, function_node: Node, code_str: str, file_imports: List[str]) -> MethodNode:
+        name_node = function_node.child_by_field_name('name')
+        name = self._text(name_node, code_str) if name_node else "unknown"
+
+        body_node = function_node.child_by_field_name('body')
+        end = body_node.start_byte if body_node else function_node.end_byte
+        signature = code_str[function_node.start_byte:end].strip().rstrip(':').strip()
+
+        annotations = self._decorators(node, code_str)
+        method_code = self._text(node, code_str)
+        used_imports = [imp for imp in file_imports
+                        if not imp.endswith('*') and imp.rsplit('.', 1)[-1] in method_code]
+
+        return MethodNode(
+            name=name,
+            signature=signature,
+            code=method_code,
+            start_point=tuple(node.start_point),
+            end_point=tuple(node.end_point),
+            start_byte=node.start_byte,
+            used_imports=used_imports,
+            is_override=any(a in ("@override", "@typing.override") for a in annotations),
+            annotations=annotations,
+            parameter_types=self._extract_parameter_types(function_node, code_str)
+        )
+
+    def _extract_parameter_types(self, function_node: Node, code_str: str) -> List[str]:
+        """Annotated types of the parameters after self/cls; unannotated ones are empty strings."""
+        params_node = function_node.child_by_field_name('parameters')
+        types = []
+        if not params_node:
+            return types
+        for child in params_node.named_children:
+            if child.type in ('typed_parameter', 'typed_default_parameter'):
+                type_node = child.child_by_field_name('type')
+                types.append(self._text(type_node, code_str) if type_node else "")
+            elif child.type in ('identifier', 'default_parameter', 'list_splat_pattern', 'dictionary_splat_pattern'):
+                types.append("")
+        # Drop the implicit receiver
+        first = params_node.named_children[0] if params_node.named_children else None
+        if first is not None and first.type == 'identifier' and self._text(first, code_str) in ('self', 'cls'):
+            types = types[1:]
+        return types
+
+    def _unwrap_decorated(self, node: Node) -> Optional[Node]:
+        if node.type == 'decorated_definition':
+            return node.child_by_field_name('definition')
+        return node
+
+    def _decorators(self, node: Node, code_str: str) -> List[str]:
+        if node.type != 'decorated_definition':
+            return []
+        return [self._text(child, code_str) for child in node.named_children if child.type == 'decorator']
+
+    def _text(self, node: Node, code_str: str) -> str:
+        return code_str[node.start_byte:node.end_byte]
@@ -0,0 +1,10 @@
+from typing import List, Tuple
+from tree_sitter import Node, Query, QueryCursor
+
+def comment_and_string_ranges(query: Query, root: Node) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+    """Sorted byte offsets of a query's `@comment` captures, and of its `@string` captures that span several lines."""
+    captures = QueryCursor(query).captures(root)
+    comments = sorted((node.start_byte, node.end_byte) for node in captures.get('comment', []))
+    strings = sorted((node.start_byte, node.end_byte) for node in captures.get('string', [])
+                     if node.start_point[0] != node.end_point[0])
+    return comments, strings
@@ -0,0 +1,325 @@
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from src.core.interfaces import Chunk, walk_chunks
+from src.utils.resources import peak_rss_bytes
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is +Inf
+BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+PERCENTILES = [50, 90, 95, 99]
+
+class StageHistogram:
+    """Latency distribution of one pipeline stage, in fixed buckets so memory doesn't grow with the run."""
+    def __init__(self):
+        self.count = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        self.count += 1
+        self.total_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+        for i, bound in enumerate(BUCKETS_MS):
+            if value_ms <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        summary = {
+            "count": self.count,
+            "sum_ms": self.total_ms,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "buckets_ms": {str(bound): count for bound, count in zip(BUCKETS_MS + ["+Inf"], self.buckets)},
+        }
+        for pct in PERCENTILES:
+            summary[f"p{pct}_ms"] = _bucket_percentile(summary["buckets_ms"], self.count, pct, self.max_ms)
+        return summary
+
+class RunMetrics:
+    """Aggregates the per-file stats returned by the workers into a run report."""
+    def __init__(self, workers: int, top_n: int = 10):
+        self.workers = workers
+        self.top_n = top_n
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.elapsed_s: Optional[float] = None
+        self.status_counts: Dict[str, int] = {}
+        self.stages: Dict[str, StageHistogram] = {}
+        self.busy_ms_by_pid: Dict[int, float] = {}
+        self.cpu_ms_by_pid: Dict[int, float] = {}
+        self.files_by_pid: Dict[int, int] = {}
+        self.peak_rss_by_pid: Dict[int, int] = {}
+        self.parent_peak_rss = 0
+        self.recycled_workers = 0
+        self.parse_cache_counts: Dict[str, int] = {"hit": 0, "miss": 0}
+        self.slowest: List[Tuple[float, str]] = []
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.chunks_out = 0
+        # Files chunked piece by piece, whose output the workers wrote themselves
+        self.streamed_files = 0
+        # Chunk code before and after --normalize
+        self.normalized_chars = [0, 0]
+
+    def track(self, result_iter: Iterator[Tuple[str, List[Chunk], Dict[str, Any]]]) -> Iterator[Tuple[str, List[Chunk], Dict[str, Any]]]:
+        """Records every result while passing it through unchanged."""
+        for result in result_iter:
+            self.record(*result)
+            yield result
+
+    def record(self, file_path: str, chunks: List[Chunk], stats: Dict[str, Any]) -> None:
+        status = stats.get("status", "unknown")
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        self.bytes_in += stats.get("bytes_in", 0)
+        self.bytes_out += stats.get("bytes_out", 0)
+        if stats.get("streamed"):
+            self.streamed_files += 1
+        if "normalized_chars" in stats:
+            self.normalized_chars[0] += stats["normalized_chars"][0]
+            self.normalized_chars[1] += stats["normalized_chars"][1]
+        self.chunks_out += sum(1 for _ in walk_chunks(chunks))
+
+        for stage, value_ms in stats.get("timings_ms", {}).items():
+            self.stages.setdefault(stage, StageHistogram()).observe(value_ms)
+
+        pid = stats.get("pid")
+        busy_ms = stats.get("timings_ms", {}).get("total", 0.0)
+        if pid is not None:
+            self.busy_ms_by_pid[pid] = self.busy_ms_by_pid.get(pid, 0.0) + busy_ms
+            self.cpu_ms_by_pid[pid] = self.cpu_ms_by_pid.get(pid, 0.0) + stats.get("cpu_ms", 0.0)
+            self.files_by_pid[pid] = self.files_by_pid.get(pid, 0) + 1
+            self.peak_rss_by_pid[pid] = max(self.peak_rss_by_pid.get(pid, 0), stats.get("peak_rss_bytes", 0))
+        if stats.get("recycled"):
+            self.recycled_workers += 1
+        if "parse_cache" in stats:
+            self.parse_cache_counts[stats["parse_cache"]] += 1
+
+        if status == "processed":
+            self.slowest.append((busy_ms, file_path))
+            # Keep the list short without sorting on every file
+            if len(self.slowest) > self.top_n * 8:
+                self.slowest.sort(reverse=True)
+                del self.slowest[self.top_n:]
+
+    def record_unchanged(self, files: int) -> None:
+        """Counts files that --fast-scan found unchanged and never dispatched."""
+        self.status_counts["unchanged"] = self.status_counts.get("unchanged", 0) + files
+
+    def finish(self, bytes_out: int = 0) -> None:
+        self.elapsed_s = time.perf_counter() - self._t0
+        self.bytes_out += bytes_out
+        self.parent_peak_rss = peak_rss_bytes()
+
+    def report(self) -> Dict[str, Any]:
+        elapsed_s = self.elapsed_s if self.elapsed_s is not None else time.perf_counter() - self._t0
+        files = sum(self.status_counts.values())
+
+        workers = {}
+        for pid, busy_ms in sorted(self.busy_ms_by_pid.items()):
+            workers[str(pid)] = {
+                "files": self.files_by_pid.get(pid, 0),
+                "busy_s": busy_ms / 1000,
+                "cpu_s": self.cpu_ms_by_pid.get(pid, 0.0) / 1000,
+                "utilization": busy_ms / 1000 / elapsed_s if elapsed_s else 0.0,
+                "peak_rss_mb": self.peak_rss_by_pid.get(pid, 0) / (1024 * 1024),
+            }
+        total_busy_s = sum(self.busy_ms_by_pid.values()) / 1000
+        stages = {stage: hist.summary() for stage, hist in sorted(self.stages.items())}
+
+        return {
+            "started_at": self.started_at,
+            "elapsed_s": elapsed_s,
+            "files": files,
+            "files_per_s": files / elapsed_s if elapsed_s else 0.0,
+            "status_counts": dict(self.status_counts),
+            "cache_hit_ratio": _cache_hit_ratio(self.status_counts),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "chunks_out": self.chunks_out,
+            "streamed_files": self.streamed_files,
+            "normalization": _normalization_summary(*self.normalized_chars),
+            "stages": stages,
+            "slowest_files": [
+                {"file": path, "total_ms": ms}
+                for ms, path in sorted(self.slowest, reverse=True)[:self.top_n]
+            ],
+            "pool_size": self.workers,
+            "workers": workers,
+            "worker_utilization": total_busy_s / (elapsed_s * self.workers) if elapsed_s and self.workers else 0.0,
+            "worker_cpu_ratio": _cpu_ratio(workers),
+            "io_wait_ratio": _io_wait_ratio(stages, workers),
+            "peak_rss_mb": {
+                "parent": (self.parent_peak_rss or peak_rss_bytes()) / (1024 * 1024),
+                "max_worker": max(self.peak_rss_by_pid.values(), default=0) / (1024 * 1024),
+            },
+            "recycled_workers": self.recycled_workers,
+            "parse_cache": _parse_cache_summary(self.parse_cache_counts["hit"], self.parse_cache_counts["miss"]),
+        }
+
+    def write_json(self, path: str) -> None:
+        _atomic_write(path, json.dumps(self.report(), indent=2))
+
+    def write_prometheus(self, path: str) -> None:
+        """Writes the report in the node_exporter textfile collector format."""
+        _atomic_write(path, to_prometheus(self.report()))
+
+def _cpu_ratio(workers: Dict[str, Dict[str, Any]]) -> float:
+    # Share of busy time spent on CPU rather than waiting (I/O, page faults, the GIL)
+    busy_s = sum(w["busy_s"] for w in workers.values())
+    return sum(w.get("cpu_s", 0.0) for w in workers.values()) / busy_s if busy_s else 0.0
+
+def _io_wait_ratio(stages: Dict[str, Dict[str, Any]], workers: Dict[str, Dict[str, Any]]) -> float:
+    # Share of busy time spent blocked on reading sources (what --prefetch hides)
+    busy_s = sum(w["busy_s"] for w in workers.values())
+    wait_s = stages.get("io_wait", {}).get("sum_ms", 0.0) / 1000
+    return wait_s / busy_s if busy_s else 0.0
+
+def _cache_hit_ratio(status_counts: Dict[str, int]) -> float:
+    # Files skipped by --fast-scan never reached a worker, but count as hits
+    hits = status_counts.get("cached", 0) + status_counts.get("unchanged", 0)
+    processed = status_counts.get("processed", 0)
+    return hits / (hits + processed) if hits + processed else 0.0
+
+def _normalization_summary(chars_in: int, chars_out: int) -> Dict[str, Any]:
+    return {"chars_in": chars_in, "chars_out": chars_out,
+            "saved_ratio": 1 - chars_out / chars_in if chars_in else 0.0}
+
+def _parse_cache_summary(hits: int, misses: int) -> Dict[str, Any]:
+    return {"hits": hits, "misses": misses, "hit_ratio": hits / (hits + misses) if hits + misses else 0.0}
+
+def _bucket_percentile(buckets: Dict[str, int], count: int, pct: float, max_ms: float) -> float:
+    # Upper bound of the bucket holding the nearest-rank value; exact values aren't kept
+    if not count:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * count)))
+    seen = 0
+    for bound, bucket_count in buckets.items():
+        seen += bucket_count
+        if seen >= rank:
+            return max_ms if bound == "+Inf" else min(float(bound), max_ms)
+    return max_ms
+
+def merge_reports(reports: List[Dict[str, Any]], top_n: int = 10) -> Dict[str, Any]:
+    """Combines the reports of runs that processed disjoint files in parallel (shards).
+
+    Counters are summed and wall time is the longest run. Stage percentiles
+    are estimated from the merged histogram buckets, as in a single report. Worker entries are
+    keyed by "<shard>:<pid>" since pids are only unique per machine.
+    """
+    elapsed_s = max((r["elapsed_s"] for r in reports), default=0.0)
+    status_counts: Dict[str, int] = {}
+    stages: Dict[str, Dict[str, Any]] = {}
+    workers: Dict[str, Any] = {}
+    slowest = []
+    for i, r in enumerate(reports):
+        for status, count in r["status_counts"].items():
+            status_counts[status] = status_counts.get(status, 0) + count
+        for stage, summary in r["stages"].items():
+            merged = stages.setdefault(stage, {"count": 0, "sum_ms": 0.0, "max_ms": 0.0,
+                                               "buckets_ms": {b: 0 for b in summary["buckets_ms"]}})
+            merged["count"] += summary["count"]
+            merged["sum_ms"] += summary["sum_ms"]
+            merged["max_ms"] = max(merged["max_ms"], summary["max_ms"])
+            for bound, count in summary["buckets_ms"].items():
+                merged["buckets_ms"][bound] = merged["buckets_ms"].get(bound, 0) + count
+        for pid, worker in r["workers"].items():
+            workers[f"{i}:{pid}"] = worker
+        slowest.extend(r["slowest_files"])
+
+    for summary in stages.values():
+        summary["mean_ms"] = summary["sum_ms"] / summary["count"] if summary["count"] else 0.0
+        for pct in PERCENTILES:
+            summary[f"p{pct}_ms"] = _bucket_percentile(summary["buckets_ms"], summary["count"], pct, summary["max_ms"])
+
+    files = sum(status_counts.values())
+    worker_slots = sum(r["elapsed_s"] * r["pool_size"] for r in reports)
+    return {
+        "started_at": min((r["started_at"] for r in reports), default=0.0),
+        "elapsed_s": elapsed_s,
+        "files": files,
+        "files_per_s": files / elapsed_s if elapsed_s else 0.0,
+        "status_counts": status_counts,
+        "cache_hit_ratio": _cache_hit_ratio(status_counts),
+        "bytes_in": sum(r["bytes_in"] for r in reports),
+        "bytes_out": sum(r["bytes_out"] for r in reports),
+        "chunks_out": sum(r["chunks_out"] for r in reports),
+        "streamed_files": sum(r.get("streamed_files", 0) for r in reports),
+        "normalization": _normalization_summary(
+            sum(r.get("normalization", {}).get("chars_in", 0) for r in reports),
+            sum(r.get("normalization", {}).get("chars_out", 0) for r in reports)),
+        "stages": dict(sorted(stages.items())),
+        "slowest_files": sorted(slowest, key=lambda f: -f["total_ms"])[:top_n],
+        "pool_size": sum(r["pool_size"] for r in reports),
+        "workers": workers,
+        "worker_utilization": sum(w["busy_s"] for w in workers.values()) / worker_slots if worker_slots else 0.0,
+        "worker_cpu_ratio": _cpu_ratio(workers),
+        "io_wait_ratio": _io_wait_ratio(stages, workers),
+        "peak_rss_mb": {
+            "parent": max((r["peak_rss_mb"]["parent"] for r in reports), default=0.0),
+            "max_worker": max((r["peak_rss_mb"]["max_worker"] for r in reports), default=0.0),
+        },
+        "recycled_workers": sum(r["recycled_workers"] for r in reports),
+        "parse_cache": _parse_cache_summary(sum(r["parse_cache"]["hits"] for r in reports),
+                                            sum(r["parse_cache"]["misses"] for r in reports)),
+        "shards": len(reports),
+    }
+
+def to_prometheus(report: Dict[str, Any], prefix: str = "code_graph") -> str:
+    lines = []
+
+    def metric(name: str, kind: str, help_text: str, samples: List[Tuple[str, float]]) -> None:
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{prefix}_{name}{labels} {value}")
+
+    metric("last_run_timestamp_seconds", "gauge", "Start time of the last run.",
+           [("", report["started_at"])])
+    metric("run_duration_seconds", "gauge", "Wall time of the last run.",
+           [("", report["elapsed_s"])])
+    metric("files", "gauge", "Files seen by the last run, by status.",
+           [(f'{{status="{status}"}}', count) for status, count in sorted(report["status_counts"].items())])
+    metric("cache_hit_ratio", "gauge", "Share of files served from the output cache or skipped as unchanged.",
+           [("", report["cache_hit_ratio"])])
+    metric("bytes_in", "gauge", "Source bytes read.", [("", report["bytes_in"])])
+    metric("bytes_out", "gauge", "Output bytes written.", [("", report["bytes_out"])])
+    metric("chunks_out", "gauge", "Chunks emitted.", [("", report["chunks_out"])])
+    metric("normalization_saved_ratio", "gauge", "Share of chunk code removed by --normalize.",
+           [("", report["normalization"]["saved_ratio"])])
+    metric("worker_utilization", "gauge", "Busy time of all workers divided by their available time.",
+           [("", report["worker_utilization"])])
+    metric("worker_cpu_ratio", "gauge", "CPU time of the workers divided by their busy time.",
+           [("", report["worker_cpu_ratio"])])
+    metric("io_wait_ratio", "gauge", "Time the workers spent waiting for source reads divided by their busy time.",
+           [("", report["io_wait_ratio"])])
+    metric("peak_rss_bytes", "gauge", "Peak resident memory of the parent and of the largest worker.",
+           [(f'{{process="{process}"}}', mb * 1024 * 1024) for process, mb in sorted(report["peak_rss_mb"].items())])
+    metric("recycled_workers", "gauge", "Workers replaced for exceeding the RSS limit.",
+           [("", report["recycled_workers"])])
+    metric("parse_cache_hit_ratio", "gauge", "Share of parsed files served from the shared parse cache.",
+           [("", report["parse_cache"]["hit_ratio"])])
+
+    lines.append(f"# HELP {prefix}_stage_duration_seconds Per-file latency of each pipeline stage.")
+    lines.append(f"# TYPE {prefix}_stage_duration_seconds histogram")
+    for stage, summary in report["stages"].items():
+        cumulative = 0
+        for bound, count in summary["buckets_ms"].items():
+            cumulative += count
+            le = "+Inf" if bound == "+Inf" else repr(float(bound) / 1000)
+            lines.append(f'{prefix}_stage_duration_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+        lines.append(f'{prefix}_stage_duration_seconds_sum{{stage="{stage}"}} {summary["sum_ms"] / 1000}')
+        lines.append(f'{prefix}_stage_duration_seconds_count{{stage="{stage}"}} {summary["count"]}')
+
+    return "\n".join(lines) + "\n"
+
+def _atomic_write(path: str, data: str) -> None:
+    # Readers (dashboards, textfile collectors) must never see a partial file
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
@@ -0,0 +1,285 @@
+import argparse
+import bisect
+import codecs
+import re
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+from src.core.chunker import file_members
+from src.core.interfaces import Chunk, ClassNode, ParsedResult
+
+# whitespace: trailing whitespace and blank lines
+# license: leading comments that mention a copyright or license
+# docs: doc comments (/** ... */) cut to their first sentence
+# comments: all comments (implies license and docs)
+NORMALIZE_OPTIONS = ["whitespace", "license", "docs", "comments"]
+
+_NON_ASCII = re.compile(rb'[\x80-\xff]+')
+_LICENSE = re.compile(r'copyright|licen[cs]e|spdx-license-identifier', re.IGNORECASE)
+_SENTENCE_END = re.compile(r'[.!?](?=\s|$)')
+
+Edit = Tuple[int, int, str]
+
+def parse_options(value: str) -> List[str]:
+    """`whitespace,docs` -> ["whitespace", "docs"]; `all` selects every option. Usable as an argparse type."""
+    options = []
+    for option in filter(None, (part.strip() for part in value.split(','))):
+        if option == "all":
+            return list(NORMALIZE_OPTIONS)
+        if option not in NORMALIZE_OPTIONS:
+            raise argparse.ArgumentTypeError(f"unknown normalization {option!r} (choose from {', '.join(NORMALIZE_OPTIONS + ['all'])})")
+        if option not in options:
+            options.append(option)
+    return options
+
+def summarize_doc(comment: str) -> str:
+    """The first sentence of a /** ... */ comment, on one line; "" if it has no text before its tags."""
+    words = []
+    for line in comment[3:-2].splitlines():
+        line = line.strip().lstrip('*').strip()
+        if line.startswith('@'):
+            break
+        words.extend(line.split())
+    text = " ".join(words)
+    end = _SENTENCE_END.search(text)
+    if end:
+        text = text[:end.end()]
+    return f"/** {text} */" if text else ""
+
+def parse_source_map(source_map: str) -> List[Tuple[int, int]]:
+    """A chunk's source_map as (character offset in code, byte offset in the source file) pairs."""
+    return [tuple(int(n) for n in entry.split(':')) for entry in source_map.split()]
+
+def source_offset(source_map: str, code: str, offset: int) -> int:
+    """Maps a character offset in a chunk's normalized code back to a byte offset in the source file."""
+    pairs = parse_source_map(source_map)
+    i = bisect.bisect_right([code_offset for code_offset, _ in pairs], offset) - 1
+    if i < 0:
+        return len(code[:offset].encode('utf-8'))
+    code_offset, file_offset = pairs[i]
+    return file_offset + len(code[code_offset:offset].encode('utf-8'))
+
+class Normalizer:
+    """Removes boilerplate from chunk code using the comment and string ranges the parser found.
+
+    Comments are only recognized as tree-sitter comment nodes, and nothing is
+    removed inside a string literal, so `//` in a string or whitespace in a
+    text block stays as it is.
+    """
+    def __init__(self, options: Iterable[str]):
+        self.options = frozenset(options)
+        if "comments" in self.options:
+            self.options |= {"license", "docs"}
+
+    def normalize(self, code: str, start: int, comments: Sequence[Tuple[int, int]],
+                  strings: Sequence[Tuple[int, int]],
+                  file_offset: Callable[[int], int] = lambda offset: offset) -> Tuple[str, str]:
+        """(normalized code, source map) of code that starts at offset start of the file.
+
+        Offsets are in characters of the decoded file (see SourceOffsets for
+        the byte offsets tree-sitter reports). comments and strings are
+        sorted (start, end) offsets in the file. The
+        source map has `<offset in the normalized code>:<file_offset(offset in the file)>`
+        for the start of every piece that was kept or inserted (see
+        parse_source_map); it is a string to stay small in indented JSON.
+        """
+        comments = _within(comments, start, start + len(code))
+        edits = self._comment_edits(code, comments)
+        if "whitespace" in self.options:
+            # Summarized comments are replaced whole, so nothing else may edit them
+            protected = sorted(_within(strings, start, start + len(code))
+                               + [(s, e) for s, e, replacement in edits if replacement])
+            edits.extend(_whitespace_edits(code, protected))
+        return _apply(code, edits, start, file_offset)
+
+    def _comment_edits(self, code: str, comments: List[Tuple[int, int]]) -> List[Edit]:
+        edits: List[Edit] = []
+        group: Optional[List[int]] = None
+        leading = True
+        last_end = 0
+        for s, e in comments:
+            leading = leading and not code[last_end:s].strip()
+            last_end = e
+            text = code[s:e]
+            if "comments" in self.options or ("license" in self.options and leading and _LICENSE.search(text)):
+                replacement = ""
+            elif "docs" in self.options and text.startswith("/**") and len(text) > 4:
+                replacement = summarize_doc(text)
+                if replacement == text:
+                    continue
+            else:
+                continue
+            if replacement:
+                edits.append((s, e, replacement))
+            elif group is not None and not code[group[1]:s].strip():
+                # Consecutive comments (a run of // lines) are removed together
+                group[1] = e
+                continue
+            if group is not None:
+                edits.append(_removal(code, *group))
+            group = [s, e] if not replacement else None
+        if group is not None:
+            edits.append(_removal(code, *group))
+        return edits
+
+def _within(ranges: Sequence[Tuple[int, int]], start: int, end: int) -> List[Tuple[int, int]]:
+    """Ranges inside [start, end), relative to start."""
+    found = []
+    for i in range(bisect.bisect_left(ranges, (start, start)), len(ranges)):
+        s, e = ranges[i]
+        if s >= end:
+            break
+        if e <= end:
+            found.append((s - start, e - start))
+    return found
+
+def _removal(code: str, s: int, e: int) -> Edit:
+    """Removes code[s:e] and, if that leaves its lines blank, the lines."""
+    line_start = code.rfind('\n', 0, s) + 1
+    line_end = code.find('\n', e)
+    if line_end < 0:
+        line_end = len(code)
+    if code[e:line_end].strip():
+        return s, e, ""
+    before = code[line_start:s]
+    if before.strip():
+        # Code before the comment: drop the comment and the whitespace around it
+        return line_start + len(before.rstrip()), line_end, ""
+    if line_end < len(code):
+        return line_start, line_end + 1, ""
+    # The last line: the newline to drop is the one before it
+    return max(line_start - 1, 0), line_end, ""
+
+def _whitespace_edits(code: str, protected: List[Tuple[int, int]]) -> List[Edit]:
+    starts = [s for s, _ in protected]
+
+    def is_protected(s: int, e: int) -> bool:
+        i = bisect.bisect_right(starts, s) - 1
+        if i >= 0 and protected[i][1] > s:
+            return True
+        return i + 1 < len(protected) and protected[i + 1][0] < e
+
+    edits = []
+    pos = 0
+    for line in code.split('\n'):
+        end = pos + len(line)
+        # Keep \r\n line endings
+        body = line[:-1] if line.endswith('\r') else line
+        kept = body.rstrip(' \t')
+        if not kept and end < len(code):
+            edit = (pos, end + 1, "")
+        elif len(kept) < len(body):
+            edit = (pos + len(kept), pos + len(body), "")
+        else:
+            edit = None
+        if edit is not None and not is_protected(edit[0], edit[1]):
+            edits.append(edit)
+        pos = end + 1
+    return edits
+
+def _apply(code: str, edits: List[Edit], start: int, file_offset: Callable[[int], int]) -> Tuple[str, str]:
+    pieces = []
+    source_map = []
+    length = 0
+    pos = 0
+    # Removals may overlap (a blank line inside a removed comment); replacements never do
+    for s, e, replacement in sorted(edits):
+        if e <= pos and not replacement:
+            continue
+        s = max(s, pos)
+        if s > pos:
+            source_map.append((length, start + pos))
+            pieces.append(code[pos:s])
+            length += s - pos
+        if replacement:
+            source_map.append((length, start + s))
+            pieces.append(replacement)
+            length += len(replacement)
+        pos = max(pos, e)
+    if pos < len(code):
+        source_map.append((length, start + pos))
+        pieces.append(code[pos:])
+    return "".join(pieces), " ".join(f"{code_offset}:{file_offset(offset)}" for code_offset, offset in source_map)
+
+class SourceOffsets:
+    """Converts between UTF-8 byte offsets in a file (as tree-sitter reports them) and
+    character offsets in its text decoded with errors='replace'.
+
+    Re-encoding the text doesn't give the file's bytes back when it had invalid
+    UTF-8, so the conversion works on the file's own bytes. ASCII bytes are never
+    part of a multi-byte sequence, so each run of other bytes decodes on its own.
+    """
+    def __init__(self, data: bytes):
+        self.data = data
+        # (start, end) of every run of non-ASCII bytes, in bytes and in characters
+        self.byte_runs: List[Tuple[int, int]] = []
+        self.char_runs: List[Tuple[int, int]] = []
+        if data.isascii():
+            return
+        shift = 0
+        for match in _NON_ASCII.finditer(data):
+            chars = len(match.group().decode('utf-8', errors='replace'))
+            self.byte_runs.append(match.span())
+            self.char_runs.append((match.start() - shift, match.start() - shift + chars))
+            shift += match.end() - match.start() - chars
+
+    def _chars(self, i: int, length: int) -> int:
+        """Characters completed within the first length bytes of run i."""
+        start = self.byte_runs[i][0]
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        return len(decoder.decode(self.data[start:start + length]))
+
+    def to_char(self, offset: int) -> int:
+        i = bisect.bisect_right(self.byte_runs, (offset, offset)) - 1
+        if i < 0:
+            return offset
+        (start, end), (char_start, char_end) = self.byte_runs[i], self.char_runs[i]
+        if offset >= end:
+            return char_end + offset - end
+        return char_start + self._chars(i, offset - start)
+
+    def to_byte(self, offset: int) -> int:
+        i = bisect.bisect_right(self.char_runs, (offset, offset)) - 1
+        if i < 0:
+            return offset
+        (start, end), (char_start, char_end) = self.byte_runs[i], self.char_runs[i]
+        if offset >= char_end:
+            return end + offset - char_end
+        length = 0
+        while self._chars(i, length) < offset - char_start:
+            length += 1
+        return start + length
+
+def normalize_chunks(chunks: List[Chunk], parsed: ParsedResult, normalizer: Normalizer,
+                     content: bytes) -> Tuple[int, int]:
+    """Normalizes the code of chunks made by StandardChunker from parsed; returns (chars before, chars after).
+
+    content is the file parsed was parsed from; source maps point at its bytes.
+    A class chunk is the file's only class and its children are that
+    class's methods in order; a file chunk covers the whole file and its
+    children are the file's classes and functions in order (file_members).
+    """
+    offsets = SourceOffsets(content)
+    to_char = offsets.to_char
+    comments = [(to_char(s), to_char(e)) for s, e in parsed.comments]
+    strings = [(to_char(s), to_char(e)) for s, e in parsed.multiline_strings]
+
+    def class_tree(chunk: Chunk, node: ClassNode) -> List[Tuple[Chunk, int]]:
+        return [(chunk, to_char(node.start_byte))] + [(child, to_char(method.start_byte))
+                                                      for child, method in zip(chunk.children, node.methods)]
+
+    before = after = 0
+    for chunk in chunks:
+        if chunk.kind == "class":
+            located = class_tree(chunk, parsed.classes[0])
+        else:
+            located = [(chunk, 0)]
+            for child, node in zip(chunk.children, file_members(parsed)):
+                if isinstance(node, ClassNode):
+                    located.extend(class_tree(child, node))
+                else:
+                    located.append((child, to_char(node.start_byte)))
+        for target, start in located:
+            before += len(target.code)
+            target.code, target.source_map = normalizer.normalize(target.code, start, comments, strings,
+                                                                        offsets.to_byte)
+            after += len(target.code)
+    return before, after
@@ -0,0 +1,199 @@
+import dataclasses
+import hashlib
+import json
+import os
+import threading
+import typing
+from typing import Any, Dict, Optional, Tuple
+from src.core.interfaces import Parser, ParsedResult, ClassNode, MethodNode, CallSite
+
+# Append-only log of written entries ("put <size> <path>") and cache hits
+# ("hit <size> <path>"), paths relative to the cache root, oldest first
+JOURNAL = "journal"
+# {"offset": journal bytes already counted, "bytes": size of the entries they list}
+JOURNAL_STATE = "journal.state"
+# A trim goes this far below the limit, so the next runs only read the journal's tail
+TRIM_TO = 0.9
+
+def default_cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "code-graph", "parse")
+
+def _schema_fingerprint() -> str:
+    # Entries of an older ParsedResult layout must never be loaded
+    fields = [(cls.__name__, tuple(f.name for f in dataclasses.fields(cls)))
+              for cls in (ParsedResult, ClassNode, MethodNode, CallSite)]
+    return hashlib.sha256(repr(fields).encode('utf-8')).hexdigest()[:12]
+
+_hints: Dict[type, Dict[str, Any]] = {}
+
+def _decode(tp: Any, value: Any) -> Any:
+    """Rebuilds a value of type tp from its JSON form; raises ValueError on anything else."""
+    if dataclasses.is_dataclass(tp):
+        hints = _hints.get(tp)
+        if hints is None:
+            hints = _hints[tp] = typing.get_type_hints(tp)
+        if not isinstance(value, dict) or set(value) != set(hints):
+            raise ValueError(f"not a {tp.__name__}")
+        return tp(**{name: _decode(hints[name], value[name]) for name in hints})
+    origin, args = typing.get_origin(tp), typing.get_args(tp)
+    if origin is typing.Union:
+        if value is None and type(None) in args:
+            return None
+        inner, = (arg for arg in args if arg is not type(None))
+        return _decode(inner, value)
+    if origin is list:
+        if not isinstance(value, list):
+            raise ValueError("not a list")
+        return [_decode(args[0], item) for item in value]
+    if origin is tuple:
+        if not isinstance(value, list) or len(value) != len(args):
+            raise ValueError("not a pair")
+        return tuple(_decode(arg, item) for arg, item in zip(args, value))
+    # bool is an int subclass, so compare exact types
+    if tp in (str, int, bool) and type(value) is tp:
+        return value
+    raise ValueError(f"not a {tp}")
+
+class ParseCache:
+    """Content-addressed store of ParsedResults, shared by all runs, checkouts and worktrees.
+
+    Entries are keyed by the source's SHA-256 and live in a namespace per parser
+    implementation (so per language), parser version and options, and result schema. Parse results don't
+    depend on the file's path, so a hit is valid for any copy of the content;
+    path-dependent fields (chunk IDs, dependencies) are filled in by the
+    chunker as usual. Entries are JSON and fully validated on load, so a bad entry
+    is only ever a miss. Writes are atomic, so concurrent workers and runs can
+    share one directory; writes and hits are appended to the journal evict() reads.
+    """
+    def __init__(self, root: str):
+        self.root = root
+        self._schema = _schema_fingerprint()
+
+    def _path(self, digest: str, parser: Parser) -> str:
+        trivia = "-trivia" if parser.collect_trivia else ""
+        namespace = f"{type(parser).__name__}-v{parser.version}{trivia}-{self._schema}"
+        return os.path.join(self.root, namespace, digest[:2], digest + ".json")
+
+    def _log(self, kind: str, size: int, path: str) -> None:
+        try:
+            # Lines this short are appended atomically, whichever process writes them
+            with open(os.path.join(self.root, JOURNAL), 'a', encoding='utf-8') as f:
+                f.write(f"{kind} {size} {os.path.relpath(path, self.root)}\n")
+        except OSError:
+            pass
+
+    def get(self, digest: str, parser: Parser) -> Optional[ParsedResult]:
+        path = self._path(digest, parser)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            result = _decode(ParsedResult, json.loads(data))
+        except (ValueError, TypeError, RecursionError):
+            # Truncated by a full disk or not written by us; drop it
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        self._log("hit", len(data), path)
+        return result
+
+    def put(self, digest: str, parser: Parser, result: ParsedResult) -> None:
+        path = self._path(digest, parser)
+        data = json.dumps(dataclasses.asdict(result), separators=(",", ":")).encode('utf-8')
+        tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            # The cache is an optimization; a failed write only costs a future parse
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        self._log("put", len(data), path)
+
+def _read_journal(path: str, offset: int = 0) -> Tuple[list, int]:
+    """(kind, size, relative path) entries of the journal from offset on, and the offset after them."""
+    entries = []
+    try:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return entries, offset
+    # A line still being appended is read next time
+    end = data.rfind(b"\n") + 1
+    for line in data[:end].decode('utf-8', errors='replace').splitlines():
+        parts = line.split(" ", 2)
+        # Anyone who can write the journal could otherwise point evict() at other files
+        if (len(parts) == 3 and parts[1].isdigit() and parts[2].endswith(".json")
+                and not os.path.isabs(parts[2]) and ".." not in parts[2].split(os.sep)):
+            entries.append((parts[0], int(parts[1]), parts[2]))
+    return entries, offset + end
+
+def evict(root: str, max_bytes: int) -> Tuple[int, int]:
+    """Deletes the least recently used entries (across all namespaces) until root is under max_bytes.
+
+    Only the journal lines written since the last call are read while the cache
+    stays under max_bytes; a trim reads the whole journal, deletes down to
+    TRIM_TO of max_bytes and compacts the journal. Returns (entries removed, bytes freed).
+    """
+    journal = os.path.join(root, JOURNAL)
+    state_path = os.path.join(root, JOURNAL_STATE)
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        offset, total = int(state["offset"]), int(state["bytes"])
+    except (OSError, ValueError, KeyError, TypeError):
+        offset = total = 0
+    new, offset = _read_journal(journal, offset)
+    # Rewrites of an entry are counted twice until the next trim, which only makes it come sooner
+    total += sum(size for kind, size, _ in new if kind == "put")
+
+    removed = freed = 0
+    if total > max_bytes:
+        # Moved aside first so lines appended meanwhile land in a new journal
+        trimmed = f"{journal}.trim.{os.getpid()}"
+        try:
+            os.replace(journal, trimmed)
+        except FileNotFoundError:
+            return 0, 0
+        lines, _ = _read_journal(trimmed)
+        # Least recently used first; a hit moves the entry to the end
+        sizes: Dict[str, int] = {}
+        for _, size, relpath in lines:
+            sizes.pop(relpath, None)
+            sizes[relpath] = size
+        total = sum(sizes.values())
+        for relpath in list(sizes):
+            if total <= max_bytes * TRIM_TO:
+                break
+            size = sizes.pop(relpath)
+            try:
+                os.remove(os.path.join(root, relpath))
+                removed += 1
+                freed += size
+            except FileNotFoundError:
+                pass
+            except OSError:
+                sizes[relpath] = size
+                continue
+            total -= size
+        with open(journal, 'a', encoding='utf-8') as f:
+            f.write("".join(f"put {size} {relpath}\n" for relpath, size in sizes.items()))
+            offset = f.tell()
+        os.remove(trimmed)
+
+    tmp_path = f"{state_path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"offset": offset, "bytes": total}, f)
+    os.replace(tmp_path, state_path)
+    return removed, freed
@@ -0,0 +1,155 @@
+import os
+import queue
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+def _run_batch(func: Callable[[Any], Any], batch: List[Any],
+               before_batch: Optional[Callable[[List[Any]], None]] = None) -> Tuple[List[Any], List[Any]]:
+    """(results, items left over): a result with a true `ends_batch` (ExitAfterResult) stops the batch."""
+    if before_batch is not None:
+        before_batch(batch)
+    results = []
+    for i, item in enumerate(batch):
+        result = func(item)
+        results.append(result)
+        if getattr(result, "ends_batch", False):
+            # The worker is about to exit; the rest of the batch goes to another one
+            return results, batch[i + 1:]
+    return results, []
+
+def bounded_imap(pool: Any, func: Callable[[Any], Any], items: Iterable[Any], max_in_flight: Union[int, Callable[[], int]],
+                 max_bytes: Optional[int] = None, size_of: Optional[Callable[[Any], int]] = None,
+                 chunksize: int = 1, ordered: bool = False,
+                 before_batch: Optional[Callable[[List[Any]], None]] = None) -> Iterator[Any]:
+    """Like Pool.imap_unordered, but with backpressure.
+
+    Pool.imap_unordered submits every task up front and buffers results in the
+    parent for as long as the consumer is slow. Here at most max_in_flight
+    items (and, with size_of, max_bytes of input) are submitted but not yet
+    consumed, so a slow consumer throttles the workers instead of growing the
+    parent's memory. Items are sent in batches of chunksize.
+
+    With ordered=True results are yielded in input order; results that finish
+    early wait in a reorder buffer that counts against the same limits.
+
+    A worker that ends its batch early (see ExitAfterResult) hands back the
+    items it didn't get to, and they are submitted again.
+
+    max_in_flight may be a callable, which is asked for the current limit
+    before every submission (see Autoscaler).
+
+    before_batch, if given, is called in the worker with each batch before
+    its items are processed, e.g. to start reading them ahead.
+    """
+    done: "queue.Queue" = queue.Queue()
+    it = iter(items)
+    exhausted = False
+    next_batch = 0
+    # batch index -> (item count, bytes)
+    in_flight: Dict[int, tuple] = {}
+    in_flight_items = 0
+    in_flight_bytes = 0
+    reorder: Dict[int, List[Any]] = {}
+    # Results of batches that were cut short and resubmitted, until the rest arrives
+    partial: Dict[int, List[Any]] = {}
+    next_to_yield = 0
+
+    def submit(index: int, batch: List[Any]) -> None:
+        pool.apply_async(_run_batch, (func, batch, before_batch),
+                         callback=lambda result, i=index: done.put((i, result, None)),
+                         error_callback=lambda error, i=index: done.put((i, None, error)))
+
+    def has_capacity() -> bool:
+        if in_flight_items == 0:
+            return True
+        limit = max_in_flight() if callable(max_in_flight) else max_in_flight
+        if in_flight_items + chunksize > limit:
+            return False
+        return max_bytes is None or in_flight_bytes < max_bytes
+
+    while True:
+        while not exhausted and has_capacity():
+            batch = []
+            batch_bytes = 0
+            for item in it:
+                batch.append(item)
+                if size_of is not None:
+                    batch_bytes += size_of(item)
+                if len(batch) >= chunksize:
+                    break
+            if not batch:
+                exhausted = True
+                break
+            index = next_batch
+            next_batch += 1
+            in_flight[index] = (len(batch), batch_bytes)
+            in_flight_items += len(batch)
+            in_flight_bytes += batch_bytes
+            submit(index, batch)
+            if len(batch) < chunksize:
+                exhausted = True
+
+        if not in_flight:
+            return
+
+        index, result, error = done.get()
+        if error is not None:
+            raise error
+        results, leftover = result
+
+        if leftover:
+            count, size = in_flight[index]
+            left_bytes = sum(size_of(item) for item in leftover) if size_of is not None else 0
+            in_flight[index] = (len(leftover), left_bytes)
+            in_flight_items -= count - len(leftover)
+            in_flight_bytes -= size - left_bytes
+            submit(index, leftover)
+            if not ordered:
+                yield from results
+            else:
+                partial.setdefault(index, []).extend(results)
+            continue
+
+        if not ordered:
+            count, size = in_flight.pop(index)
+            in_flight_items -= count
+            in_flight_bytes -= size
+            yield from results
+            continue
+
+        reorder[index] = partial.pop(index, []) + results
+        while next_to_yield in reorder:
+            count, size = in_flight.pop(next_to_yield)
+            in_flight_items -= count
+            in_flight_bytes -= size
+            yield from reorder.pop(next_to_yield)
+            next_to_yield += 1
+
+class ExitAfterResult(tuple):
+    """A worker result that makes the worker process exit once it has been sent.
+
+    multiprocessing.Pool has no way for a task to retire its own worker, but the
+    worker loop drops its reference to the result right after putting it on the
+    result queue. Exiting from __del__ at that point loses nothing, and the
+    pool replaces the worker as it does after maxtasksperchild. The parent only
+    ever sees a plain tuple.
+    """
+    # Tells _run_batch to stop taking items from the batch
+    ends_batch = True
+
+    def __new__(cls, values: Iterable[Any], on_exit: Optional[Callable[[], None]] = None):
+        self = super().__new__(cls, values)
+        self._pid = os.getpid()
+        self._on_exit = on_exit
+        return self
+
+    def __reduce__(self):
+        return (tuple, (tuple(self),))
+
+    def __del__(self):
+        if os.getpid() != self._pid:
+            return
+        try:
+            if self._on_exit is not None:
+                self._on_exit()
+        finally:
+            os._exit(0)
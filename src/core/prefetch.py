@@ -0,0 +1,102 @@
+import hashlib
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Iterable, Optional, Tuple
+
+@dataclass
+class SourceRead:
+    """A source file's size and checksum, and its content unless it was too large to keep."""
+    size: int
+    checksum: str
+    content: Optional[bytes] = None
+
+def read_source(file_path: str, max_bytes: Optional[int] = None) -> SourceRead:
+    """Reads and hashes a file in one pass.
+
+    Files of at least max_bytes are hashed block by block and their content
+    isn't kept (they are chunked piece by piece later).
+    """
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if max_bytes is None or size < max_bytes:
+            content = f.read()
+            return SourceRead(len(content), hashlib.sha256(content).hexdigest(), content)
+        if hasattr(os, "posix_fadvise"):
+            # Larger kernel readahead for the block-by-block passes
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        sha256_hash = hashlib.sha256()
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha256_hash.update(block)
+        return SourceRead(size, sha256_hash.hexdigest())
+
+class Prefetcher:
+    """Reads the next files a worker will process on background threads.
+
+    schedule() queues the files of a batch; at most depth of them are read
+    (and passed to warm, e.g. to fill the dependency resolvers' caches) ahead
+    of the one being processed. take() returns a file's SourceRead and how
+    long the caller blocked for it. Files that were never scheduled are read
+    synchronously.
+    """
+    def __init__(self, depth: int, max_bytes: Optional[int] = None,
+                 warm: Optional[Callable[[str], None]] = None):
+        self.depth = depth
+        self.max_bytes = max_bytes
+        self.warm = warm
+        self._executor = ThreadPoolExecutor(max_workers=depth, thread_name_prefix="prefetch")
+        self._queue: Deque[str] = deque()
+        self._pending: Dict[str, Future] = {}
+
+    def schedule(self, file_paths: Iterable[str]) -> None:
+        self._queue.extend(file_paths)
+        self._fill()
+
+    def take(self, file_path: str) -> Tuple[SourceRead, float]:
+        future = self._pending.pop(file_path, None)
+        if future is None:
+            self._drop(file_path)
+        # Keep depth reads in flight while this file is being processed
+        self._fill()
+        t0 = time.perf_counter()
+        try:
+            result = future.result() if future is not None else None
+        except Exception:
+            # Read again in the caller, which reports the error as usual
+            result = None
+        if result is None:
+            result = read_source(file_path, self.max_bytes)
+        return result, time.perf_counter() - t0
+
+    def discard(self, file_path: str) -> None:
+        """Forgets a scheduled file that won't be taken."""
+        self._pending.pop(file_path, None)
+        self._drop(file_path)
+        self._fill()
+
+    def close(self) -> None:
+        self._queue.clear()
+        self._pending.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _drop(self, file_path: str) -> None:
+        try:
+            self._queue.remove(file_path)
+        except ValueError:
+            pass
+
+    def _fill(self) -> None:
+        while self._queue and len(self._pending) < self.depth:
+            file_path = self._queue.popleft()
+            self._pending[file_path] = self._executor.submit(self._read, file_path)
+
+    def _read(self, file_path: str) -> SourceRead:
+        result = read_source(file_path, self.max_bytes)
+        if self.warm is not None:
+            try:
+                self.warm(file_path)
+            except Exception:
+                pass
+        return result
@@ -0,0 +1,108 @@
+import cProfile
+import glob
+import io
+import os
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from src.core.interfaces import Writer, Chunk
+
+class StageProfiler:
+    """cProfile (and optionally tracemalloc) collector for one process.
+
+    Each pipeline stage gets its own cProfile.Profile so hot functions can be
+    attributed to the stage that called them. Stats are dumped as
+    <out_dir>/<process>-<pid>.<stage>.prof and merged later by merge_profiles.
+    """
+    def __init__(self, out_dir: str, process_name: str = "worker", trace_memory: bool = False):
+        self.out_dir = out_dir
+        self.process_name = process_name
+        self.trace_memory = trace_memory
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        self._active: Optional[cProfile.Profile] = None
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        # Only one profiler can be active per thread, so suspend the enclosing stage
+        outer = self._active
+        if outer is not None:
+            outer.disable()
+        profile = self.profiles.get(name)
+        if profile is None:
+            profile = self.profiles[name] = cProfile.Profile()
+        self._active = profile
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._active = outer
+            if outer is not None:
+                outer.enable()
+
+    def dump(self) -> None:
+        os.makedirs(self.out_dir, exist_ok=True)
+        prefix = os.path.join(self.out_dir, f"{self.process_name}-{os.getpid()}")
+        for stage, profile in self.profiles.items():
+            profile.dump_stats(f"{prefix}.{stage}.prof")
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.take_snapshot().dump(f"{prefix}.tracemalloc")
+
+class ProfiledWriter(Writer):
+    """Attributes time spent in a writer to a stage of the parent's profiler."""
+    def __init__(self, writer: Writer, profiler: StageProfiler, stage: str = "write"):
+        self.writer = writer
+        self.profiler = profiler
+        self.stage_name = stage
+
+    @property
+    def bytes_written(self) -> int:
+        return self.writer.bytes_written
+
+    def write(self, chunks: List[Chunk], output_path: str) -> None:
+        with self.profiler.stage(self.stage_name):
+            self.writer.write(chunks, output_path)
+
+    def close(self) -> None:
+        with self.profiler.stage(self.stage_name):
+            self.writer.close()
+
+def merge_profiles(out_dir: str, top_n: int = 25) -> str:
+    """Merges all per-process dumps in out_dir into one .prof per stage plus report.txt.
+
+    Returns the path of the text report.
+    """
+    by_stage: Dict[str, List[str]] = {}
+    for path in sorted(glob.glob(os.path.join(out_dir, "*-*.*.prof"))):
+        stage = os.path.basename(path).rsplit('.', 2)[1]
+        by_stage.setdefault(stage, []).append(path)
+
+    report = io.StringIO()
+    report.write(f"Profile report ({sum(len(p) for p in by_stage.values())} dumps)\n")
+    for stage, paths in sorted(by_stage.items()):
+        stats = pstats.Stats(*paths, stream=report)
+        stats.dump_stats(os.path.join(out_dir, f"{stage}.prof"))
+        processes = len({os.path.basename(p).split('.', 1)[0] for p in paths})
+        report.write(f"\n=== Stage: {stage} ({processes} processes, {stats.total_tt:.3f}s) ===\n")
+        stats.strip_dirs().sort_stats(pstats.SortKey.TIME).print_stats(top_n)
+
+    snapshots = sorted(glob.glob(os.path.join(out_dir, "*.tracemalloc")))
+    if snapshots:
+        # Sum live allocations per source line across processes
+        totals: Dict[str, List[int]] = {}
+        for path in snapshots:
+            for stat in tracemalloc.Snapshot.load(path).statistics("lineno"):
+                entry = totals.setdefault(str(stat.traceback), [0, 0])
+                entry[0] += stat.size
+                entry[1] += stat.count
+        report.write(f"\n=== Allocations ({len(snapshots)} processes, live at exit) ===\n")
+        for location, (size, count) in sorted(totals.items(), key=lambda item: -item[1][0])[:top_n]:
+            report.write(f"{size / 1024:10.1f} KiB {count:8d} blocks  {location}\n")
+
+    report_path = os.path.join(out_dir, "report.txt")
+    with open(report_path, 'w', encoding='utf-8') as f:
+        f.write(report.getvalue())
+    return report_path
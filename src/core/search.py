@@ -0,0 +1,414 @@
+import heapq
+import json
+import os
+import re
+import shutil
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import numpy as np
+from src.core.interfaces import Chunk, Writer, walk_chunks
+
+_IDENTIFIER = re.compile(r'[A-Za-z_$][A-Za-z0-9_$]*|\d+')
+# Words inside an identifier: `HTTPServer` -> HTTP, Server; `user_id2` -> user, id, 2
+_WORD = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+')
+
+# Keywords that occur in nearly every chunk and only bloat the postings
+STOPWORDS = frozenset("""
+    abstract boolean break case catch char class const continue def default do double else elif enum extends
+    false final finally float for func go if implements import in int interface is long new none not null
+    package private protected public return self static string super switch this throw throws true try var
+    void while the and or of to
+""".split())
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Documents buffered in memory before they are written out as a segment
+SEGMENT_DOCS = 50_000
+# More segments than this get merged into one
+MAX_SEGMENTS = 8
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased identifiers plus their camelCase/snake_case words, minus stopwords."""
+    tokens = []
+    for identifier in _IDENTIFIER.findall(text):
+        words = _WORD.findall(identifier)
+        whole = identifier.lower()
+        for word in words:
+            word = word.lower()
+            if len(word) > 1 and word != whole and word not in STOPWORDS:
+                tokens.append(word)
+        if len(whole) > 1 and whole not in STOPWORDS:
+            tokens.append(whole)
+    return tokens
+
+def chunk_text(chunk: Chunk) -> str:
+    """What gets indexed for a chunk.
+
+    Methods, functions and plain file chunks are indexed by their code;
+    class chunks, and file chunks holding classes or functions, by their
+    declaration, imports and member signatures, since their members are
+    documents of their own.
+    """
+    if chunk.kind != "class" and not chunk.children:
+        return " ".join(filter(None, [chunk.name, chunk.signature or "", chunk.code]))
+    parts = [chunk.name, chunk.package, chunk.extends or ""] + chunk.implements + chunk.imports
+    parts.extend(child.signature or child.name for child in chunk.children)
+    return " ".join(filter(None, parts))
+
+def chunk_terms(chunk: Chunk) -> Dict[str, int]:
+    """Term frequencies of a chunk's document.
+
+    Method stubs of streamed files have no code; the worker counted their
+    terms while it had the code and left them in metadata["search_terms"].
+    """
+    terms = (chunk.metadata or {}).get("search_terms")
+    if terms is not None:
+        return terms
+    return Counter(tokenize(chunk_text(chunk)))
+
+@dataclass
+class SearchHit:
+    chunk_id: str
+    score: float
+
+class _Segment:
+    """One immutable segment on disk, memory-mapped for queries.
+
+    terms.bin/terms.off hold the sorted vocabulary, postings.off each term's
+    range in docs.bin (uint32 document numbers) and tfs.bin (uint16 term
+    frequencies). lens.bin has every document's length and ids.bin/ids.off
+    its chunk ID; meta.json the document range of every file.
+    """
+    def __init__(self, path: str, deleted: Optional[str]):
+        self.path = path
+        self.name = os.path.basename(path)
+        with open(os.path.join(path, "meta.json"), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.doc_count = self.meta["docs"]
+        self.term_offsets = self._load("terms.off", np.uint64)
+        self.terms = self._load("terms.bin", np.uint8)
+        self.postings = self._load("postings.off", np.uint64)
+        self.docs = self._load("docs.bin", np.uint32)
+        self.tfs = self._load("tfs.bin", np.uint16)
+        self.lens = self._load("lens.bin", np.uint32)
+        self.id_offsets = self._load("ids.off", np.uint64)
+        self.ids = self._load("ids.bin", np.uint8)
+        self.deleted_file = deleted
+        self.deleted = np.zeros(self.doc_count, dtype=bool)
+        if deleted:
+            self.deleted |= np.fromfile(os.path.join(os.path.dirname(path), deleted), dtype=bool)
+
+    def _load(self, name: str, dtype) -> np.ndarray:
+        file_path = os.path.join(self.path, name)
+        if os.path.getsize(file_path) == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(file_path, dtype=dtype, mode='r')
+
+    @property
+    def term_count(self) -> int:
+        return len(self.term_offsets) - 1
+
+    def term(self, i: int) -> bytes:
+        return self.terms[int(self.term_offsets[i]):int(self.term_offsets[i + 1])].tobytes()
+
+    def find(self, term: bytes) -> int:
+        """Index of term in the vocabulary, or -1 (binary search over the mapped file)."""
+        lo, hi = 0, self.term_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.term(mid) < term:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self.term_count and self.term(lo) == term else -1
+
+    def postings_of(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = int(self.postings[i]), int(self.postings[i + 1])
+        return self.docs[start:end], self.tfs[start:end]
+
+    def chunk_id(self, doc: int) -> str:
+        return self.ids[int(self.id_offsets[doc]):int(self.id_offsets[doc + 1])].tobytes().decode('utf-8')
+
+    def live_docs(self) -> int:
+        return self.doc_count - int(self.deleted.sum())
+
+    def live_length(self) -> int:
+        return int(self.lens[~self.deleted].sum()) if self.doc_count else 0
+
+class _SegmentBuilder:
+    """Writes one segment: terms in sorted order, then the document table."""
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path)
+        self._terms = open(os.path.join(path, "terms.bin"), 'wb')
+        self._docs = open(os.path.join(path, "docs.bin"), 'wb')
+        self._tfs = open(os.path.join(path, "tfs.bin"), 'wb')
+        self._term_offsets = array('Q', [0])
+        self._postings = array('Q', [0])
+
+    def add_term(self, term: bytes, docs: np.ndarray, tfs: np.ndarray) -> None:
+        self._terms.write(term)
+        self._term_offsets.append(self._term_offsets[-1] + len(term))
+        self._docs.write(docs.astype(np.uint32).tobytes())
+        self._tfs.write(tfs.astype(np.uint16).tobytes())
+        self._postings.append(self._postings[-1] + len(docs))
+
+    def finish(self, chunk_ids: List[str], lens: Iterable[int], files: Dict[str, List[int]]) -> None:
+        for f in (self._terms, self._docs, self._tfs):
+            f.close()
+        with open(os.path.join(self.path, "terms.off"), 'wb') as f:
+            self._term_offsets.tofile(f)
+        with open(os.path.join(self.path, "postings.off"), 'wb') as f:
+            self._postings.tofile(f)
+        lens = array('I', lens)
+        with open(os.path.join(self.path, "lens.bin"), 'wb') as f:
+            lens.tofile(f)
+        id_offsets = array('Q', [0])
+        with open(os.path.join(self.path, "ids.bin"), 'wb') as f:
+            for chunk_id in chunk_ids:
+                data = chunk_id.encode('utf-8')
+                f.write(data)
+                id_offsets.append(id_offsets[-1] + len(data))
+        with open(os.path.join(self.path, "ids.off"), 'wb') as f:
+            id_offsets.tofile(f)
+        with open(os.path.join(self.path, "meta.json"), 'w', encoding='utf-8') as f:
+            json.dump({"docs": len(chunk_ids), "total_len": sum(lens), "files": files}, f)
+
+class SearchIndex(Writer):
+    """Incremental BM25 index of chunk code and identifiers, kept in the output directory.
+
+    Every run adds a segment with the documents of the files it reprocessed
+    and marks their previous documents deleted, so the cost of an update
+    follows the files that changed. Segments are merged once there are more
+    than MAX_SEGMENTS. segments.json names the live segments and their
+    deletion bitmaps and is replaced atomically on close(), so readers
+    always see a complete index.
+    """
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        os.makedirs(index_dir, exist_ok=True)
+        self._state = _load_state(index_dir)
+        self._segments = [_Segment(os.path.join(index_dir, s["name"]), s.get("deleted"))
+                          for s in self._state["segments"]]
+        self._new_segments: List[str] = []
+        self._replaced: Set[str] = set()
+        self._reset_buffer()
+
+    def _reset_buffer(self) -> None:
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._ids: List[str] = []
+        self._lens: List[int] = []
+        self._files: Dict[str, List[int]] = {}
+
+    def write(self, chunks: List[Chunk], output_path: str) -> None:
+        for chunk in chunks:
+            self.add_file(chunk.file_path, list(walk_chunks([chunk])))
+
+    def add_file(self, file_path: str, chunks: List[Chunk]) -> None:
+        """Replaces the documents of file_path with these chunks."""
+        self._replaced.add(file_path)
+        start = len(self._ids)
+        for chunk in chunks:
+            doc = len(self._ids)
+            counts = chunk_terms(chunk)
+            self._ids.append(chunk.id)
+            self._lens.append(sum(counts.values()))
+            for term, tf in counts.items():
+                entry = self._postings.get(term)
+                if entry is None:
+                    entry = self._postings[term] = (array('I'), array('H'))
+                entry[0].append(doc)
+                entry[1].append(min(tf, 0xFFFF))
+        self._files.setdefault(file_path, [start, len(self._ids)])
+        if len(self._ids) >= SEGMENT_DOCS:
+            self._flush()
+
+    def retain(self, file_paths: Iterable[str]) -> None:
+        """Drops the documents of every indexed file not in file_paths (files that no longer exist)."""
+        keep = set(file_paths)
+        for segment in self._segments:
+            self._replaced.update(path for path in segment.meta["files"] if path not in keep)
+
+    def merge_from(self, index_dir: str) -> None:
+        """Adds the segments of another index, replacing the documents this one has of the same files.
+
+        Used to combine the indexes of sharded runs, which cover disjoint files.
+        """
+        for entry in _load_state(index_dir)["segments"]:
+            name = self._next_name()
+            shutil.copytree(os.path.join(index_dir, entry["name"]), os.path.join(self.index_dir, name))
+            segment = _Segment(os.path.join(self.index_dir, name), None)
+            if entry.get("deleted"):
+                segment.deleted |= np.fromfile(os.path.join(index_dir, entry["deleted"]), dtype=bool)
+            self._replaced.update(segment.meta["files"])
+            self._segments.append(segment)
+            self._new_segments.append(name)
+
+    def close(self) -> None:
+        self._flush()
+        new_names = set(self._new_segments)
+        # Previous documents of reprocessed files
+        for segment in self._segments:
+            if segment.name in new_names:
+                continue
+            for file_path in self._replaced.intersection(segment.meta["files"]):
+                start, end = segment.meta["files"][file_path]
+                segment.deleted[start:end] = True
+        if len(self._segments) > MAX_SEGMENTS:
+            self._merge()
+        self._commit()
+
+    def _flush(self) -> None:
+        if not self._ids:
+            return
+        name = self._next_name()
+        builder = _SegmentBuilder(os.path.join(self.index_dir, name))
+        for term in sorted(self._postings, key=lambda t: t.encode('utf-8')):
+            docs, tfs = self._postings[term]
+            builder.add_term(term.encode('utf-8'), np.frombuffer(docs, dtype=np.uint32),
+                             np.frombuffer(tfs, dtype=np.uint16))
+        builder.finish(self._ids, self._lens, self._files)
+        self._reset_buffer()
+        self._segments.append(_Segment(os.path.join(self.index_dir, name), None))
+        self._new_segments.append(name)
+
+    def _merge(self) -> None:
+        """Rewrites all segments as one, dropping deleted documents; streams one term at a time."""
+        name = self._next_name()
+        builder = _SegmentBuilder(os.path.join(self.index_dir, name))
+        remaps = []
+        base = 0
+        ids: List[str] = []
+        lens: List[np.ndarray] = []
+        files: Dict[str, List[int]] = {}
+        for segment in self._segments:
+            live = ~segment.deleted
+            remap = np.full(segment.doc_count, -1, dtype=np.int64)
+            remap[live] = base + np.arange(int(live.sum()))
+            remaps.append(remap)
+            for doc in np.flatnonzero(live):
+                ids.append(segment.chunk_id(int(doc)))
+            lens.append(np.asarray(segment.lens)[live])
+            for file_path, (start, end) in segment.meta["files"].items():
+                kept = remap[start:end][remap[start:end] >= 0]
+                if len(kept):
+                    files[file_path] = [int(kept[0]), int(kept[-1]) + 1]
+            base += int(live.sum())
+
+        iterators = [_terms_of(segment, n) for n, segment in enumerate(self._segments)]
+        current = None
+        parts: List[Tuple[np.ndarray, np.ndarray]] = []
+        for term, n, i in heapq.merge(*iterators):
+            if term != current:
+                self._write_merged(builder, current, parts)
+                current, parts = term, []
+            docs, tfs = self._segments[n].postings_of(i)
+            mapped = remaps[n][docs]
+            keep = mapped >= 0
+            parts.append((mapped[keep], tfs[keep]))
+        self._write_merged(builder, current, parts)
+        builder.finish(ids, np.concatenate(lens).tolist() if lens else [], files)
+
+        self._segments = [_Segment(os.path.join(self.index_dir, name), None)]
+        self._new_segments.append(name)
+
+    def _write_merged(self, builder: _SegmentBuilder, term: Optional[bytes],
+                      parts: List[Tuple[np.ndarray, np.ndarray]]) -> None:
+        if term is None:
+            return
+        docs = np.concatenate([p[0] for p in parts])
+        if len(docs):
+            builder.add_term(term, docs, np.concatenate([p[1] for p in parts]))
+
+    def _next_name(self) -> str:
+        name = f"seg-{self._state['next']:06d}"
+        self._state["next"] += 1
+        return name
+
+    def _commit(self) -> None:
+        generation = self._state["next"]
+        segments = []
+        for segment in self._segments:
+            entry = {"name": segment.name}
+            if segment.deleted.any():
+                entry["deleted"] = f"{segment.name}.del-{generation}"
+                segment.deleted.tofile(os.path.join(self.index_dir, entry["deleted"]))
+            segments.append(entry)
+        self._state["segments"] = segments
+        state_path = os.path.join(self.index_dir, "segments.json")
+        tmp_path = f"{state_path}.tmp.{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._state, f)
+        os.replace(tmp_path, state_path)
+
+        # Segments and bitmaps no longer referenced
+        live = {s["name"] for s in segments} | {s["deleted"] for s in segments if "deleted" in s}
+        for name in os.listdir(self.index_dir):
+            if name.startswith("seg-") and name not in live:
+                path = os.path.join(self.index_dir, name)
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    os.remove(path)
+
+def _terms_of(segment: _Segment, n: int) -> Iterator[Tuple[bytes, int, int]]:
+    for i in range(segment.term_count):
+        yield segment.term(i), n, i
+
+def _load_state(index_dir: str) -> Dict:
+    try:
+        with open(os.path.join(index_dir, "segments.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"version": 1, "segments": [], "next": 1}
+
+class SearchReader:
+    """Answers BM25 queries over a SearchIndex directory."""
+    def __init__(self, index_dir: str):
+        state = _load_state(index_dir)
+        self.segments = [_Segment(os.path.join(index_dir, s["name"]), s.get("deleted")) for s in state["segments"]]
+        self.doc_count = sum(segment.live_docs() for segment in self.segments)
+        total_len = sum(segment.live_length() for segment in self.segments)
+        self.avg_len = total_len / self.doc_count if self.doc_count else 0.0
+
+    def search(self, query: str, limit: int = 10) -> List[SearchHit]:
+        terms = sorted(set(tokenize(query)))
+        if not terms or not self.doc_count:
+            return []
+        # Postings of each term in each segment, and its live document frequency for the IDF
+        postings = []
+        for term in terms:
+            found = []
+            df = 0
+            for segment in self.segments:
+                i = segment.find(term.encode('utf-8'))
+                if i >= 0:
+                    docs, tfs = segment.postings_of(i)
+                    found.append((segment, docs, tfs))
+                    df += len(docs) - int(segment.deleted[docs].sum())
+            if df:
+                postings.append((np.log(1 + (self.doc_count - df + 0.5) / (df + 0.5)), found))
+
+        candidates: List[Tuple[float, int, int]] = []
+        for n, segment in enumerate(self.segments):
+            scores = None
+            for idf, found in postings:
+                for owner, docs, tfs in found:
+                    if owner is not segment:
+                        continue
+                    tf = tfs.astype(np.float32)
+                    norm = K1 * (1 - B + B * segment.lens[docs] / self.avg_len)
+                    if scores is None:
+                        scores = np.zeros(segment.doc_count, dtype=np.float32)
+                    scores[docs] += idf * tf * (K1 + 1) / (tf + norm)
+            if scores is None:
+                continue
+            scores[segment.deleted] = 0
+            top = np.argpartition(-scores, min(limit, len(scores) - 1))[:limit]
+            candidates.extend((float(scores[doc]), n, int(doc)) for doc in top if scores[doc] > 0)
+        best = heapq.nlargest(limit, candidates)
+        return [SearchHit(self.segments[n].chunk_id(doc), score) for score, n, doc in best]
@@ -0,0 +1,174 @@
+import argparse
+import hashlib
+import heapq
+import json
+import os
+import re
+import shutil
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from src.utils.paths import ARTIFACT_DIR
+
+MANIFEST_VERSION = 1
+
+# Leftovers of writes interrupted by a crash (see FileWriter)
+_TEMP_FILE = re.compile(r"\.tmp\.\d+\.\d+$")
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """Parses an INDEX/COUNT shard spec (INDEX is zero-based); usable as an argparse type."""
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected INDEX/COUNT, got {spec!r}")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be in [0, {count}), got {index}")
+    return index, count
+
+def shard_key(file_path: str, source_dir: str) -> str:
+    """Machine-independent identity of a file: its POSIX path relative to the scanned root."""
+    return os.path.relpath(file_path, source_dir).replace(os.sep, '/')
+
+def _stable_hash(key: str) -> int:
+    # hash() is salted per process; shards on different machines must agree
+    return int.from_bytes(hashlib.sha1(key.encode('utf-8')).digest()[:8], 'big')
+
+def select_shard(files: List[str], source_dir: str, index: int, count: int,
+                 by_size: bool = False) -> List[str]:
+    """Returns the files belonging to shard `index` of `count`.
+
+    By default a file's shard is its stable path hash modulo count, so a file
+    stays in the same shard as the tree grows. With by_size the files are
+    dealt largest first to the least loaded shard (LPT), which balances bytes
+    much better but moves files between shards when sizes change. Both only
+    depend on relative paths (and sizes), never on scan order.
+    """
+    if count == 1:
+        return list(files)
+    keyed = [(shard_key(path, source_dir), path) for path in files]
+    if not by_size:
+        return [path for key, path in keyed if _stable_hash(key) % count == index]
+
+    sized = []
+    for key, path in keyed:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        sized.append((-size, key, path))
+    sized.sort()
+
+    # (load, shard) heap; ties go to the lowest shard index
+    loads = [(0, shard) for shard in range(count)]
+    selected = []
+    for neg_size, _, path in sized:
+        load, shard = heapq.heappop(loads)
+        if shard == index:
+            selected.append(path)
+        heapq.heappush(loads, (load - neg_size, shard))
+    return selected
+
+def manifest_path(output_dir: str) -> str:
+    return os.path.join(output_dir, ARTIFACT_DIR, "manifest.json")
+
+def shard_spec(shard: Optional[Tuple[int, int]], by_size: bool = False) -> Optional[Dict[str, Any]]:
+    """How a manifest records the shard a run covered (None for a full run)."""
+    return {"index": shard[0], "count": shard[1], "by_size": by_size} if shard else None
+
+def write_manifest(output_dir: str, source_dir: str, files: List[str], output_format: str,
+                   shard: Optional[Tuple[int, int]] = None, by_size: bool = False) -> None:
+    """Records which source files a run (or shard) covered, for `merge`."""
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "created_at": time.time(),
+        "source_dir": os.path.abspath(source_dir),
+        "format": output_format,
+        "shard": shard_spec(shard, by_size),
+        "files": sorted(files),
+    }
+    path = manifest_path(output_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+def load_manifest(output_dir: str) -> Dict[str, Any]:
+    with open(manifest_path(output_dir), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def merge_manifests(manifests: List[Dict[str, Any]], allow_partial: bool = False) -> Dict[str, Any]:
+    """Checks that the manifests form one complete, non-overlapping sharded run and combines them.
+
+    Raises ValueError describing the first inconsistency found.
+    """
+    if not manifests:
+        raise ValueError("no manifests to merge")
+    for key in ("version", "format"):
+        values = {m.get(key) for m in manifests}
+        if len(values) > 1:
+            raise ValueError(f"shards disagree on {key}: {sorted(map(str, values))}")
+
+    shards = [m.get("shard") for m in manifests]
+    if any(shard is None for shard in shards):
+        if len(manifests) > 1:
+            raise ValueError("only sharded runs (--shard) can be merged")
+    else:
+        counts = {(shard["count"], shard["by_size"]) for shard in shards}
+        if len(counts) > 1:
+            raise ValueError("shards were made with different --shard counts or strategies")
+        count = shards[0]["count"]
+        indexes = [shard["index"] for shard in shards]
+        duplicates = sorted({i for i in indexes if indexes.count(i) > 1})
+        if duplicates:
+            raise ValueError(f"shard(s) {duplicates} given more than once")
+        missing = sorted(set(range(count)) - set(indexes))
+        if missing and not allow_partial:
+            raise ValueError(f"missing shard(s) {missing} of {count}")
+
+    files: List[str] = []
+    seen = set()
+    for manifest in manifests:
+        for path in manifest["files"]:
+            if path in seen:
+                raise ValueError(f"{path} appears in more than one shard")
+            seen.add(path)
+            files.append(path)
+
+    return {
+        "version": MANIFEST_VERSION,
+        "created_at": time.time(),
+        "source_dir": manifests[0]["source_dir"],
+        "format": manifests[0]["format"],
+        "shard": None,
+        "merged_from": sorted((s for s in shards if s), key=lambda s: s["index"]),
+        "files": sorted(files),
+    }
+
+def copy_output_tree(src_dir: str, dest_dir: str) -> int:
+    """Copies a shard's output files (not its run artifacts) into dest_dir; returns the file count."""
+    copied = 0
+    for root, dirs, filenames in os.walk(src_dir):
+        if root == src_dir:
+            dirs[:] = [d for d in dirs if d != ARTIFACT_DIR]
+        rel_root = os.path.relpath(root, src_dir)
+        target_root = os.path.normpath(os.path.join(dest_dir, rel_root))
+        os.makedirs(target_root, exist_ok=True)
+        for name in filenames:
+            if _TEMP_FILE.search(name):
+                continue
+            shutil.copy2(os.path.join(root, name), os.path.join(target_root, name))
+            copied += 1
+    return copied
+
+def merge_change_feeds(feed_paths: List[str], dest_path: str) -> int:
+    """Concatenates the change feeds of shards into dest_path (which may be one of them); returns the line count."""
+    lines = 0
+    tmp_path = f"{dest_path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as out:
+        for path in feed_paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    out.write(line)
+                    lines += 1
+    os.replace(tmp_path, dest_path)
+    return lines
@@ -0,0 +1,241 @@
+import asyncio
+import importlib
+import inspect
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Deque, List, Optional, Tuple, Union
+from src.core.interfaces import Chunk, Writer
+
+class Sink(ABC):
+    """Receives the chunks of a run in batches, in-process (see SinkWriter).
+
+    send() may be a plain method or a coroutine (`async def send`); coroutines
+    run on an event loop owned by the SinkWriter. Up to `concurrency` batches
+    are sent at once, from several threads or tasks. Batches hold top-level
+    chunks with their children; they are shared with the other writers, so
+    treat them as read-only. With a sink, large files take the regular path
+    instead of being streamed by the worker, so every chunk arrives with its
+    code. The class attributes are defaults that the `--sink-*` options
+    override.
+    """
+    # Limits of one batch: chunks (children included) and bytes of code
+    max_batch_chunks: int = 64
+    max_batch_bytes: int = 4 * 1024 * 1024
+    concurrency: int = 4
+    # Attempts after the first, with exponential backoff starting at backoff_s
+    retries: int = 3
+    backoff_s: float = 0.5
+    # Errors worth retrying; anything else fails the run at once
+    retry_on: Tuple[type, ...] = (Exception,)
+
+    @abstractmethod
+    def send(self, batch: List[Chunk]) -> Union[None, Awaitable[None]]:
+        """Delivers one batch; raises to have it retried."""
+        pass
+
+    def close(self) -> None:
+        """Called once after the last batch was delivered (may also be a coroutine)."""
+        pass
+
+class FunctionSink(Sink):
+    """A plain function taking a batch, as a Sink."""
+    def __init__(self, fn: Callable[[List[Chunk]], Any]):
+        self.fn = fn
+
+    def send(self, batch: List[Chunk]) -> None:
+        self.fn(batch)
+
+class AsyncFunctionSink(Sink):
+    """A coroutine function taking a batch, as a Sink."""
+    def __init__(self, fn: Callable[[List[Chunk]], Awaitable[Any]]):
+        self.fn = fn
+
+    async def send(self, batch: List[Chunk]) -> None:
+        await self.fn(batch)
+
+class MemorySink(Sink):
+    """Keeps every batch in memory: a stand-in for a real consumer in tests and benchmarks.
+
+    latency_s simulates the round trip of a remote call, and the first
+    fail_first calls raise ConnectionError after it.
+    """
+    def __init__(self, latency_s: float = 0.0, fail_first: int = 0):
+        self.latency_s = latency_s
+        self.fail_first = fail_first
+        self.calls = 0
+        self.batches: List[List[Chunk]] = []
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def _start(self) -> bool:
+        with self._lock:
+            self.calls += 1
+            return self.calls <= self.fail_first
+
+    def _finish(self, batch: List[Chunk], fail: bool) -> None:
+        if fail:
+            raise ConnectionError("simulated failure")
+        with self._lock:
+            self.batches.append(batch)
+
+    def send(self, batch: List[Chunk]) -> None:
+        fail = self._start()
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        self._finish(batch, fail)
+
+    @property
+    def chunks(self) -> List[Chunk]:
+        return [chunk for batch in self.batches for chunk in batch]
+
+    def close(self) -> None:
+        self.closed = True
+
+class AsyncMemorySink(MemorySink):
+    """MemorySink with a coroutine send()."""
+    async def send(self, batch: List[Chunk]) -> None:
+        fail = self._start()
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        self._finish(batch, fail)
+
+def load_sink(spec: str) -> Sink:
+    """`package.module:name` -> a Sink.
+
+    name may be a Sink instance, a Sink class (created without arguments), or
+    a function or coroutine function taking a batch. Raises ValueError,
+    ImportError or AttributeError when spec doesn't name one of those.
+    """
+    module_name, _, attr = spec.partition(':')
+    if not module_name or not attr:
+        raise ValueError(f"expected MODULE:NAME, got {spec!r}")
+    target: Any = importlib.import_module(module_name)
+    for part in attr.split('.'):
+        target = getattr(target, part)
+    if isinstance(target, Sink):
+        return target
+    if isinstance(target, type) and issubclass(target, Sink):
+        return target()
+    if inspect.iscoroutinefunction(target):
+        return AsyncFunctionSink(target)
+    if callable(target):
+        return FunctionSink(target)
+    raise ValueError(f"{spec} is not a Sink or a callable")
+
+def _batch_size(chunk: Chunk) -> Tuple[int, int]:
+    """(chunks, bytes of code) of a chunk and its children."""
+    count = 1
+    size = len(chunk.code.encode('utf-8'))
+    for child in chunk.children:
+        child_count, child_size = _batch_size(child)
+        count += child_count
+        size += child_size
+    return count, size
+
+class SinkWriter(Writer):
+    """Feeds every written chunk to a Sink in size-bounded batches.
+
+    A batch is handed off before it would exceed max_batch_chunks or
+    max_batch_bytes (a single larger file goes alone). At most `concurrency`
+    batches are in flight; beyond that write() waits for the oldest, which
+    holds up the result loop and, through its in-flight limit, the workers.
+    A failing batch is retried with exponential backoff; the error of one
+    that still fails is raised from the next write() or from close().
+    """
+    def __init__(self, sink: Sink, max_batch_chunks: Optional[int] = None, max_batch_bytes: Optional[int] = None,
+                 concurrency: Optional[int] = None, retries: Optional[int] = None):
+        self.sink = sink
+        self.max_batch_chunks = max_batch_chunks or sink.max_batch_chunks
+        self.max_batch_bytes = max_batch_bytes or sink.max_batch_bytes
+        self.concurrency = concurrency or sink.concurrency
+        self.retries = sink.retries if retries is None else retries
+        self.chunks_sent = 0
+        self.batches_sent = 0
+        self.retried = 0
+        self._batch: List[Chunk] = []
+        self._batch_chunks = 0
+        self._batch_bytes = 0
+        self._pending: Deque[Tuple[Future, int]] = deque()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        if inspect.iscoroutinefunction(sink.send):
+            self._loop = asyncio.new_event_loop()
+            self._loop_thread = threading.Thread(target=self._loop.run_forever, name="sink-loop", daemon=True)
+            self._loop_thread.start()
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="sink")
+
+    def write(self, chunks: List[Chunk], output_path: str) -> None:
+        for chunk in chunks:
+            count, size = _batch_size(chunk)
+            if self._batch and (self._batch_chunks + count > self.max_batch_chunks
+                                or self._batch_bytes + size > self.max_batch_bytes):
+                self._flush()
+            self._batch.append(chunk)
+            self._batch_chunks += count
+            self._batch_bytes += size
+
+    def _flush(self) -> None:
+        batch, count = self._batch, self._batch_chunks
+        self._batch, self._batch_chunks, self._batch_bytes = [], 0, 0
+        while self._pending and (self._pending[0][0].done() or len(self._pending) >= self.concurrency):
+            self._collect(*self._pending.popleft())
+        if self._loop is not None:
+            future = asyncio.run_coroutine_threadsafe(self._send_async(batch), self._loop)
+        else:
+            future = self._executor.submit(self._send, batch)
+        self._pending.append((future, count))
+
+    def _collect(self, future: Future, count: int) -> None:
+        self.retried += future.result()
+        self.batches_sent += 1
+        self.chunks_sent += count
+
+    def _backoff(self, attempt: int) -> float:
+        # Jitter keeps concurrent retries from hitting the consumer in lockstep
+        return self.sink.backoff_s * 2 ** attempt * random.uniform(0.5, 1.0)
+
+    def _send(self, batch: List[Chunk]) -> int:
+        """Sends a batch; returns the number of retries it took."""
+        for attempt in range(self.retries + 1):
+            try:
+                self.sink.send(batch)
+                return attempt
+            except self.sink.retry_on:
+                if attempt == self.retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+
+    async def _send_async(self, batch: List[Chunk]) -> int:
+        for attempt in range(self.retries + 1):
+            try:
+                await self.sink.send(batch)
+                return attempt
+            except self.sink.retry_on:
+                if attempt == self.retries:
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+
+    def close(self) -> None:
+        try:
+            if self._batch:
+                self._flush()
+            while self._pending:
+                self._collect(*self._pending.popleft())
+            if inspect.iscoroutinefunction(self.sink.close) and self._loop is not None:
+                asyncio.run_coroutine_threadsafe(self.sink.close(), self._loop).result()
+            elif inspect.iscoroutinefunction(self.sink.close):
+                asyncio.run(self.sink.close())
+            else:
+                self.sink.close()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop_thread.join()
+                self._loop.close()
@@ -0,0 +1,50 @@
+import codecs
+import os
+from typing import Any, Iterator
+
+class ByteText:
+    """Bytes sliced by byte offset into decoded text.
+
+    Parser helpers written as `code_str[node.start_byte:node.end_byte]` work on
+    it unchanged, without decoding the whole input up front.
+    """
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def __getitem__(self, key: slice) -> str:
+        return self.data[key].decode('utf-8', errors='replace')
+
+class SourceFile:
+    """Random access to a source file by byte offset, without reading it whole."""
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.size = os.fstat(self.file.fileno()).st_size
+
+    def read(self, start: int, end: int) -> bytes:
+        self.file.seek(start)
+        return self.file.read(max(0, end - start))
+
+    def __getitem__(self, key: slice) -> str:
+        start, stop, _ = key.indices(self.size)
+        return self.read(start, stop).decode('utf-8', errors='replace')
+
+    def text_pieces(self, start: int, end: int, piece_size: int = 1 << 16) -> Iterator[str]:
+        """Decoded text of [start, end) in pieces; characters are never split between pieces."""
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        for offset in range(start, end, piece_size):
+            text = decoder.decode(self.read(offset, min(end, offset + piece_size)))
+            if text:
+                yield text
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> "SourceFile":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Bump when the stored layout or the digests change; older stores are ignored
+SCHEMA_VERSION = 1
+
+# (name, size, mtime_ns) of a source file; size -1 marks a file that must be processed again
+FileEntry = Tuple[str, int, int]
+
+@dataclass
+class DirSummary:
+    """A directory's source files and subdirectories as of a scan."""
+    files: List[FileEntry]
+    subdirs: List[str]
+    files_digest: bytes = b""
+    # Merkle digest: the files digest and every subdirectory's tree digest
+    tree_digest: bytes = b""
+
+@dataclass
+class TreeScan:
+    """The source files under a root, and which of them changed since the stored summaries."""
+    root: str
+    files: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    dirs: Dict[str, DirSummary] = field(default_factory=dict)
+    # Directories whose files and subtrees all match the stored summaries
+    unchanged_dirs: int = 0
+
+    @property
+    def digest(self) -> bytes:
+        return self.dirs[""].tree_digest if "" in self.dirs else b""
+
+def _files_digest(files: Iterable[FileEntry]) -> bytes:
+    text = "\n".join(f"{name}\0{size}\0{mtime_ns}" for name, size, mtime_ns in files)
+    return hashlib.blake2b(text.encode('utf-8', 'surrogateescape'), digest_size=16).digest()
+
+def _tree_digest(summary: DirSummary, dirs: Dict[str, DirSummary], rel: str) -> bytes:
+    h = hashlib.blake2b(summary.files_digest, digest_size=16)
+    for name in summary.subdirs:
+        h.update(name.encode('utf-8', 'surrogateescape') + b"\0" + dirs[_join(rel, name)].tree_digest)
+    return h.digest()
+
+def _join(rel: str, name: str) -> str:
+    return f"{rel}/{name}" if rel else name
+
+class TreeSummaryStore:
+    """Per-directory summaries of the last run, in SQLite (see scan_tree).
+
+    Each directory row holds the name, size and mtime of its source files
+    and two digests: one of those files, and a Merkle digest that also
+    covers the tree digests of its subdirectories, so the root's digest
+    changes when anything below it does. A store written with another
+    fingerprint (languages, output options) is treated as empty.
+    """
+    def __init__(self, db_path: str, fingerprint: str):
+        self.db_path = db_path
+        self.fingerprint = fingerprint
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, files_digest BLOB, tree_digest BLOB, entries TEXT);
+        """)
+        stored = dict(self.conn.execute("SELECT key, value FROM meta"))
+        self.valid = stored.get("version") == str(SCHEMA_VERSION) and stored.get("fingerprint") == fingerprint
+        self.digests: Dict[str, Tuple[bytes, bytes]] = {}
+        if self.valid:
+            self.digests = {path: (files_digest, tree_digest)
+                            for path, files_digest, tree_digest in self.conn.execute(
+                                "SELECT path, files_digest, tree_digest FROM dirs")}
+
+    @property
+    def root_digest(self) -> Optional[bytes]:
+        entry = self.digests.get("")
+        return entry[1] if entry else None
+
+    def entries(self, rel: str) -> Dict[str, Tuple[int, int]]:
+        """name -> (size, mtime_ns) of the files stored for a directory."""
+        row = self.conn.execute("SELECT entries FROM dirs WHERE path = ?", (rel,)).fetchone()
+        return {name: (size, mtime_ns) for name, size, mtime_ns in json.loads(row[0])} if row else {}
+
+    def save(self, scan: TreeScan, redo: Set[str], racy_after_ns: int) -> None:
+        """Stores scan's summaries. Files in redo (failed ones) and files modified
+        at or after racy_after_ns (possibly changed again within the mtime
+        granularity) are stored as needing another look."""
+        redo_rel = {os.path.relpath(path, scan.root).replace(os.sep, '/') for path in redo}
+        for rel, summary in scan.dirs.items():
+            files = []
+            for name, size, mtime_ns in summary.files:
+                if mtime_ns >= racy_after_ns or _join(rel, name) in redo_rel:
+                    size = -1
+                files.append((name, size, mtime_ns))
+            if files != summary.files:
+                summary.files = files
+                summary.files_digest = _files_digest(files)
+        # Subdirectories come after their parents in scan order
+        for rel in reversed(list(scan.dirs)):
+            summary = scan.dirs[rel]
+            summary.tree_digest = _tree_digest(summary, scan.dirs, rel)
+
+        with self.conn:
+            self.conn.execute("DELETE FROM meta")
+            self.conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                                  [("version", str(SCHEMA_VERSION)), ("fingerprint", self.fingerprint)])
+            if not self.valid:
+                self.conn.execute("DELETE FROM dirs")
+                self.digests = {}
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO dirs (path, files_digest, tree_digest, entries) VALUES (?, ?, ?, ?)",
+                ((rel, s.files_digest, s.tree_digest, json.dumps(s.files)) for rel, s in scan.dirs.items()
+                 if self.digests.get(rel) != (s.files_digest, s.tree_digest)))
+            self.conn.executemany("DELETE FROM dirs WHERE path = ?",
+                                  ((rel,) for rel in self.digests if rel not in scan.dirs))
+        self.valid = True
+        self.digests = {rel: (s.files_digest, s.tree_digest) for rel, s in scan.dirs.items()}
+
+    def close(self) -> None:
+        self.conn.close()
+
+def scan_tree(root: str, extensions: Tuple[str, ...], store: Optional[TreeSummaryStore] = None) -> TreeScan:
+    """Lists the source files under root (skipping hidden directories) with one stat per file.
+
+    Files are reported as changed unless store has a summary of their
+    directory with the same size and mtime; a directory whose files digest
+    matches is accepted without looking at its stored entries.
+    """
+    scan = TreeScan(root=root)
+    known = store.digests if store is not None and store.valid else {}
+    stack = [("", root)]
+    while stack:
+        rel, path = stack.pop()
+        found: List[Tuple[str, int, int, str]] = []
+        subdirs: List[str] = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        # Like os.walk: symlinked directories aren't followed
+                        if entry.is_dir(follow_symlinks=False):
+                            if not entry.name.startswith('.'):
+                                subdirs.append(entry.name)
+                        elif entry.name.lower().endswith(extensions):
+                            st = entry.stat()
+                            found.append((entry.name, st.st_size, st.st_mtime_ns, entry.path))
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+        found.sort()
+        subdirs.sort()
+        files = [(name, size, mtime_ns) for name, size, mtime_ns, _ in found]
+        summary = DirSummary(files, subdirs, _files_digest(files))
+        scan.dirs[rel] = summary
+        scan.files.extend(file_path for _, _, _, file_path in found)
+
+        previous = known.get(rel)
+        if previous is None:
+            scan.changed.extend(file_path for _, _, _, file_path in found)
+        elif previous[0] != summary.files_digest:
+            stored = store.entries(rel)
+            scan.changed.extend(file_path for name, size, mtime_ns, file_path in found
+                                if stored.get(name) != (size, mtime_ns))
+        stack.extend((_join(rel, name), os.path.join(path, name)) for name in reversed(subdirs))
+
+    for rel in reversed(list(scan.dirs)):
+        summary = scan.dirs[rel]
+        summary.tree_digest = _tree_digest(summary, scan.dirs, rel)
+        previous = known.get(rel)
+        if previous is not None and previous[1] == summary.tree_digest:
+            scan.unchanged_dirs += 1
+    return scan
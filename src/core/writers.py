@@ -1,48 +1,196 @@
+import io
 import json
 import os
+import sys
+import threading
+from abc import abstractmethod
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from src.core.interfaces import Writer, Chunk
+from src.utils.paths import output_rel_path
 from dataclasses import asdict
-from typing import List
+from typing import BinaryIO, Deque, Iterable, Iterator, List, Optional, Set
 
-class JSONWriter(Writer):
-    def write(self, chunks: List[Chunk], output_path: str) -> None:
-        # output_path is treated as a root directory
-        base_dir = os.path.abspath(output_path)
-        os.makedirs(base_dir, exist_ok=True)
+class FileWriter(Writer):
+    """Writes one output file per chunk, mirroring the source tree under output_path.
 
-        for chunk in chunks:
-            # Construct filename: <base_dir>/<rel_path>.json
-            # Remove leading ./ or / from chunk.file_path to ensure relative join
-            rel_path = chunk.file_path.lstrip(os.sep)
-            if rel_path.startswith('.' + os.sep):
-                rel_path = rel_path[2:]
+    Every file is written to a temporary sibling and renamed into place, so an
+    interrupted run never leaves a truncated file behind (the cache check in
+    process_file would otherwise treat it as a miss forever). Safe to call
+    from several threads at once.
+
+    With fsync=True each file is flushed to disk before it is renamed, and
+    the directories holding the renames are synced every fsync_batch files
+    and on close.
+    """
+    extension = ""
 
-            dest_path = os.path.join(base_dir, rel_path + ".json")
+    def __init__(self, fsync: bool = False, fsync_batch: int = 256):
+        self.fsync = fsync
+        self.fsync_batch = fsync_batch
+        self._lock = threading.Lock()
+        # Directories already known to exist, to skip a makedirs per chunk
+        self._dirs: Set[str] = set()
+        self._unsynced_dirs: Set[str] = set()
+        self._unsynced_files = 0
 
-            # Ensure parent dirs exist
-            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    @abstractmethod
+    def render(self, chunk: Chunk) -> str:
+        """The contents of chunk's output file."""
+        pass
 
-            with open(dest_path, 'w', encoding='utf-8') as f:
-                json.dump(asdict(chunk), f, indent=2)
+    @abstractmethod
+    def render_streamed(self, chunk: Chunk, code: Iterable[str], children: Iterable[Chunk]) -> Iterator[str]:
+        """Renders chunk with its code and children taken from iterators, piece by piece."""
+        pass
 
-class TextWriter(Writer):
     def write(self, chunks: List[Chunk], output_path: str) -> None:
         base_dir = os.path.abspath(output_path)
-        os.makedirs(base_dir, exist_ok=True)
-
         for chunk in chunks:
-            rel_path = chunk.file_path.lstrip(os.sep)
-            if rel_path.startswith('.' + os.sep):
-                rel_path = rel_path[2:]
+            self.write_chunk(chunk, base_dir)
+
+    def write_chunk(self, chunk: Chunk, base_dir: str) -> None:
+        if chunk.metadata and chunk.metadata.get("streamed"):
+            # Written by the worker with write_streamed; this is a summary without code
+            return
+        self._write_file(chunk, [self.render(chunk)], base_dir)
+
+    def write_streamed(self, chunk: Chunk, code: Iterable[str], children: Iterable[Chunk], base_dir: str) -> int:
+        """Writes a chunk whose code and children are never in memory at once (see render_streamed).
+
+        Returns the bytes written.
+        """
+        return self._write_file(chunk, self.render_streamed(chunk, code, children), base_dir)
+
+    def _write_file(self, chunk: Chunk, pieces: Iterable[str], base_dir: str) -> int:
+        # Construct filename: <base_dir>/<rel_path><extension>
+        dest_path = os.path.join(base_dir, output_rel_path(chunk.file_path) + self.extension)
+        self._ensure_dir(os.path.dirname(dest_path))
+
+        size = 0
+        tmp_path = f"{dest_path}.tmp.{os.getpid()}.{threading.get_ident()}"
+        try:
+            with open(tmp_path, 'wb') as f:
+                for piece in pieces:
+                    data = piece.encode('utf-8')
+                    f.write(data)
+                    size += len(data)
+                if self.fsync:
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, dest_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            self.bytes_written += size
+            if self.fsync:
+                self._unsynced_dirs.add(os.path.dirname(dest_path))
+                self._unsynced_files += 1
+                if self._unsynced_files < self.fsync_batch:
+                    return size
+                dirs, self._unsynced_dirs, self._unsynced_files = self._unsynced_dirs, set(), 0
+            else:
+                return size
+        _fsync_dirs(dirs)
+        return size
+
+    def close(self) -> None:
+        with self._lock:
+            dirs, self._unsynced_dirs, self._unsynced_files = self._unsynced_dirs, set(), 0
+        _fsync_dirs(dirs)
+
+    def _ensure_dir(self, path: str) -> None:
+        if path in self._dirs:
+            return
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            self._dirs.add(path)
+
+def _fsync_dirs(dirs: Iterable[str]) -> None:
+    # Makes the renames into these directories durable (no-op where unsupported)
+    for path in dirs:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+class JSONWriter(FileWriter):
+    extension = ".json"
 
-            dest_path = os.path.join(base_dir, rel_path + ".txt")
-            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    def render(self, chunk: Chunk) -> str:
+        return json.dumps(asdict(chunk), indent=2)
 
-            with open(dest_path, 'w', encoding='utf-8') as f:
-                self._write_chunk(f, chunk)
+    def render_streamed(self, chunk: Chunk, code: Iterable[str], children: Iterable[Chunk]) -> Iterator[str]:
+        """The same JSON object, laid out so it can be written and read back incrementally.
+
+        All other fields come first, then "code" on one line, then "children"
+        with one compact child per line (see read_streamed_output).
+        """
+        header = asdict(chunk)
+        del header["code"], header["children"]
+        yield json.dumps(header, indent=2)[:-2] + ',\n  "code": "'
+        for piece in code:
+            yield json.dumps(piece)[1:-1]
+        yield '",\n  "children": ['
+        separator = "\n    "
+        for child in children:
+            yield separator + json.dumps(asdict(child), separators=(",", ":"))
+            separator = ",\n    "
+        yield "\n  ]\n}"
+
+class TextWriter(FileWriter):
+    extension = ".txt"
+
+    def render(self, chunk: Chunk) -> str:
+        f = io.StringIO()
+        self._write_chunk(f, chunk)
+        return f.getvalue()
+
+    def render_streamed(self, chunk: Chunk, code: Iterable[str], children: Iterable[Chunk]) -> Iterator[str]:
+        f = io.StringIO()
+        self._write_head(f, chunk, "")
+        yield f.getvalue()
+        yield "Code:\n"
+        for line in _lines(code):
+            yield f"  {line}\n"
+        yield "\n"
+        heading = "Children:\n"
+        for child in children:
+            f = io.StringIO()
+            self._write_chunk(f, child, 1)
+            yield heading + f.getvalue()
+            heading = ""
+        yield f"--- END {chunk.kind.upper()} ---\n\n"
 
     def _write_chunk(self, f, chunk, indent=0):
         prefix = "  " * indent
+        self._write_head(f, chunk, prefix)
+
+        if chunk.code:
+            f.write(f"{prefix}Code:\n")
+            # Indent code block
+            for line in chunk.code.splitlines():
+                f.write(f"{prefix}  {line}\n")
+            f.write("\n")
+
+        if chunk.children:
+            f.write(f"{prefix}Children:\n")
+            for child in chunk.children:
+                self._write_chunk(f, child, indent + 1)
+
+        f.write(f"{prefix}--- END {chunk.kind.upper()} ---\n\n")
+
+    def _write_head(self, f, chunk, prefix):
         f.write(f"{prefix}--- {chunk.kind.upper()} {chunk.id} ---\n")
         f.write(f"{prefix}Language: {chunk.language}\n")
 
@@ -63,16 +211,81 @@ class TextWriter(Writer):
         if chunk.metadata:
             f.write(f"{prefix}Metadata: {chunk.metadata}\n")
 
-        if chunk.code:
-            f.write(f"{prefix}Code:\n")
-            # Indent code block
-            for line in chunk.code.splitlines():
-                f.write(f"{prefix}  {line}\n")
-            f.write("\n")
+def _lines(pieces: Iterable[str]) -> Iterator[str]:
+    """The lines of text arriving in pieces, split as str.splitlines() would split the whole."""
+    pending = ""
+    for piece in pieces:
+        lines = (pending + piece).splitlines(keepends=True)
+        # The last line may continue in the next piece, or be half of a \r\n
+        pending = lines.pop() if lines else ""
+        for line in lines:
+            yield line.splitlines()[0]
+    yield from pending.splitlines()
 
-        if chunk.children:
-            f.write(f"{prefix}Children:\n")
-            for child in chunk.children:
-                self._write_chunk(f, child, indent + 1)
+class NDJSONWriter(Writer):
+    """Streams every top-level chunk (with its children) as one JSON line.
 
-        f.write(f"{prefix}--- END {chunk.kind.upper()} ---\n\n")
+    Each batch is flushed as soon as it is written, so a consumer reading the
+    stream through a pipe sees files as they finish. output_path is ignored.
+    """
+    def __init__(self, stream: Optional[BinaryIO] = None):
+        self.stream = stream if stream is not None else sys.stdout.buffer
+
+    def write(self, chunks: List[Chunk], output_path: str) -> None:
+        if not chunks:
+            return
+        data = "".join(json.dumps(asdict(chunk), separators=(",", ":")) + "\n" for chunk in chunks).encode('utf-8')
+        self.stream.write(data)
+        self.stream.flush()
+        self.bytes_written += len(data)
+
+class CompositeWriter(Writer):
+    """Fans each batch of chunks out to several writers (e.g. output files plus side indexes)."""
+    def __init__(self, writers: List[Writer]):
+        self.writers = writers
+
+    @property
+    def bytes_written(self) -> int:
+        return sum(writer.bytes_written for writer in self.writers)
+
+    def write(self, chunks: List[Chunk], output_path: str) -> None:
+        for writer in self.writers:
+            writer.write(chunks, output_path)
+
+    def close(self) -> None:
+        for writer in self.writers:
+            writer.close()
+
+class ThreadedWriter(Writer):
+    """Runs a FileWriter on a small I/O thread pool.
+
+    write() only queues the chunks, so rendering and file I/O overlap with the
+    parent's result handling. At most max_pending chunks are queued; beyond
+    that write() waits for the oldest. close() waits for everything queued
+    and re-raises the first write error.
+    """
+    def __init__(self, writer: FileWriter, threads: int = 4, max_pending: int = 0):
+        self.writer = writer
+        self.max_pending = max_pending or threads * 64
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="writer")
+        self._pending: Deque[Future] = deque()
+
+    @property
+    def bytes_written(self) -> int:
+        return self.writer.bytes_written
+
+    def write(self, chunks: List[Chunk], output_path: str) -> None:
+        base_dir = os.path.abspath(output_path)
+        for chunk in chunks:
+            while self._pending and (self._pending[0].done() or len(self._pending) >= self.max_pending):
+                # Surfaces errors early instead of only at close()
+                self._pending.popleft().result()
+            self._pending.append(self._executor.submit(self.writer.write_chunk, chunk, base_dir))
+
+    def close(self) -> None:
+        try:
+            while self._pending:
+                self._pending.popleft().result()
+        finally:
+            self._executor.shutdown(wait=True)
+        self.writer.close()
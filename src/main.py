@@ -5,43 +5,149 @@ import multiprocessing
 import time
 import hashlib
 import json
-from typing import List, Optional, Any, Tuple
-from src.core.writers import JSONWriter, TextWriter
-from src.core.interfaces import Chunk
+import shutil
+import threading
+from contextlib import nullcontext
+from dataclasses import dataclass
+from multiprocessing.util import Finalize
+from typing import Dict, List, Optional, Any, Tuple
+from src.core.prefetch import Prefetcher, SourceRead, read_source
+from src.core.streaming import SourceFile
+from src.core.writers import JSONWriter, TextWriter, NDJSONWriter, CompositeWriter, ThreadedWriter
+from src.core.interfaces import Chunk, Parser, walk_chunks
+from src.core.metrics import RunMetrics
+from src.core.changes import ChangeFeed, ContentHasher, change_of, read_output, removed_files, tag_changes, track_changes
+from src.core.executors import EXECUTORS, Autoscaler, choose_executor, create_pool
+from src.core.pool import bounded_imap, ExitAfterResult
+from src.core.languages import LANGUAGES, extensions_for, is_available
+from src.core.sharding import parse_shard, select_shard, write_manifest, load_manifest, shard_spec
+from src.core.normalize import parse_options as parse_normalize_options
+from src.core.tree_summary import TreeSummaryStore, scan_tree
+from src.core.sinks import SinkWriter, load_sink
+from src.utils.paths import ARTIFACT_DIR, artifact_path, output_rel_path
+from src.utils.resources import available_cpus, current_rss_bytes, peak_rss_bytes, size_workers
 from src.ui import run_tui
 
+@dataclass
+class WorkerConfig:
+    """Per-run options passed to every worker through init_worker."""
+    profile_dir: Optional[str] = None
+    trace_memory: bool = False
+    # Workers whose RSS exceeds this after a task exit and get replaced
+    rss_limit_bytes: Optional[int] = None
+    # Set when stdout carries the output stream
+    stdout_to_stderr: bool = False
+    # Shared content-addressed parse cache (None disables it)
+    parse_cache_dir: Optional[str] = None
+    # Compute MinHash signatures of method chunks for near-duplicate detection
+    minhash: bool = False
+    # Tag chunks added/modified/unchanged against the previous JSON output
+    track_changes: bool = False
+    # Files at least this large are parsed and written piece by piece in the worker (0 disables)
+    large_file_bytes: int = 0
+    output_format: str = "json"
+    fsync: bool = False
+    # Keep the method details the graph index reads in results of streamed files
+    graph: bool = False
+    # Files each worker reads ahead of the one it is processing (0 disables)
+    prefetch: int = 0
+    # Class index used to map Java imports to artifacts (None disables it)
+    class_index_path: Optional[str] = None
+    # Content normalization options (see --normalize; empty keeps code verbatim)
+    normalize: Tuple[str, ...] = ()
+    # Side indexes fed from the results ("graph", "search"); cached output must already be in them
+    indexes: Tuple[str, ...] = ()
+    # Near-duplicate handling the output is written with (mode, threshold; None when off)
+    dedup: Optional[Tuple[str, float]] = None
+
+class _ThreadState(threading.local):
+    """Worker state that threads of the thread executor must not share."""
+    # tree-sitter parsers aren't thread-safe
+    parsers = None
+    # cProfile only sees the thread that enabled it
+    profiler = None
+    minhasher = None
+    # Writers for streamed large files, by format
+    writers = None
+    prefetcher = None
+
 # Global worker state
-_parser = None
+_thread = _ThreadState()
 _maven_resolver = None
 _bazel_resolver = None
 _chunker = None
 _status_dict = None
 _output_dir = None
+_config = WorkerConfig()
+_parse_cache = None
+_class_index = None
+_normalizer = None
+# Set once a pool worker has scheduled its exit for exceeding --worker-rss-limit-mb
+_exit_scheduled = False
+# Profilers of thread/inline workers; dumped by the parent since no worker process exits
+_thread_profilers = []
 
-def init_worker(status_dict: Optional[Any] = None, output_dir: Optional[str] = None):
+def init_worker(status_dict: Optional[Any] = None, output_dir: Optional[str] = None, config: Optional[WorkerConfig] = None):
     """Initialize worker process with parser, resolvers, and status tracker."""
-    global _parser, _maven_resolver, _bazel_resolver, _chunker, _status_dict, _output_dir
+    global _maven_resolver, _bazel_resolver, _chunker, _status_dict, _output_dir, _config, _parse_cache, _class_index, _normalizer
 
     # Store the shared status dictionary
     if status_dict is not None:
         _status_dict = status_dict
 
     _output_dir = output_dir
+    config = config or WorkerConfig()
+    _config = config
+    if config.stdout_to_stderr:
+        sys.stdout = sys.stderr
+
+    if config.profile_dir and _thread.profiler is None:
+        from src.core.profiling import StageProfiler
+        if multiprocessing.parent_process() is not None:
+            _thread.profiler = StageProfiler(config.profile_dir, trace_memory=config.trace_memory)
+            # Runs when the worker exits normally (pool.close() + join(), or maxtasksperchild)
+            Finalize(_thread.profiler, _thread.profiler.dump, exitpriority=10)
+        else:
+            _thread.profiler = StageProfiler(config.profile_dir, process_name=f"thread{threading.get_native_id()}",
+                                             trace_memory=config.trace_memory)
+            _thread_profilers.append(_thread.profiler)
 
     # Import inside worker
-    from src.core.languages.java_parser import JavaParser
+    from src.core.languages import ParserRegistry
     from src.core.dependencies.maven import MavenResolver
     from src.core.dependencies.bazel import BazelResolver
     from src.core.chunker import StandardChunker
 
     try:
-        _parser = JavaParser()
+        # Grammars are loaded on first use
+        _thread.parsers = ParserRegistry(collect_trivia=bool(config.normalize))
         _maven_resolver = MavenResolver()
         _bazel_resolver = BazelResolver()
         _chunker = StandardChunker()
+        if config.normalize:
+            from src.core.normalize import Normalizer
+            _normalizer = Normalizer(config.normalize)
+        if config.minhash:
+            from src.core.dedup import MinHasher
+            _thread.minhasher = MinHasher()
+        if config.parse_cache_dir:
+            from src.core.parse_cache import ParseCache
+            _parse_cache = ParseCache(config.parse_cache_dir)
+        if config.class_index_path and _class_index is None:
+            from src.core.dependencies.class_index import ClassIndex
+            _class_index = ClassIndex(config.class_index_path)
+        if config.prefetch > 0:
+            if _thread.prefetcher is not None:
+                _thread.prefetcher.close()
+            _thread.prefetcher = Prefetcher(config.prefetch, max_bytes=config.large_file_bytes or None,
+                                            warm=lambda path: _resolve_dependencies(path, {}))
     except Exception as e:
         print(f"Worker initialization failed: {e}")
 
+def _stage(name: str):
+    """Attributes profiler samples to a pipeline stage when --profile is on."""
+    return _thread.profiler.stage(name) if _thread.profiler is not None else nullcontext()
+
 def calculate_checksum(file_path: str) -> str:
     sha256_hash = hashlib.sha256()
     with open(file_path, "rb") as f:
@@ -50,164 +156,893 @@ def calculate_checksum(file_path: str) -> str:
             sha256_hash.update(byte_block)
     return sha256_hash.hexdigest()
 
-def process_file(file_path: str) -> Tuple[str, List[Chunk]]:
-    global _parser, _maven_resolver, _bazel_resolver, _chunker, _status_dict, _output_dir
+def prefetch_batch(file_paths: List[str]) -> None:
+    """Starts reading a batch's files before process_file gets to them (see --prefetch)."""
+    if _thread.prefetcher is not None:
+        _thread.prefetcher.schedule(file_paths)
+
+def _read_source(file_path: str) -> Tuple[SourceRead, float]:
+    """The file's size, checksum and (unless it's large) content, and the seconds spent waiting for them."""
+    if _thread.prefetcher is not None:
+        return _thread.prefetcher.take(file_path)
+    t0 = time.perf_counter()
+    source = read_source(file_path, _config.large_file_bytes or None)
+    return source, time.perf_counter() - t0
+
+def _worker_id() -> Any:
+    """The PID of a worker process, or "<pid>:<thread id>" for thread and inline workers."""
+    if multiprocessing.parent_process() is not None:
+        return os.getpid()
+    return f"{os.getpid()}:{threading.get_native_id()}"
+
+def _before_recycle():
+    """Last words of a worker that is about to exit because of its RSS limit."""
+    if _thread.profiler is not None:
+        _thread.profiler.dump()
+    if _status_dict is not None:
+        _status_dict.pop(_worker_id(), None)
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+def process_file(file_path: str) -> Tuple[str, List[Chunk], Dict[str, Any]]:
+    """Processes one file and returns (file_path, chunks, stats).
+
+    stats carries the worker PID, an outcome status ("processed", "cached",
+    "skipped" or "error"), the source size, per-stage timings in ms, the CPU
+    time spent and the worker's memory use, and is aggregated by RunMetrics
+    in the parent.
+    """
+    result = _process_file(file_path)
+    stats = result[2]
+    stats["rss_bytes"] = current_rss_bytes()
+    stats["peak_rss_bytes"] = peak_rss_bytes()
+
+    global _exit_scheduled
+    limit = _config.rss_limit_bytes
+    if limit and not _exit_scheduled and stats["rss_bytes"] > limit and multiprocessing.parent_process() is not None:
+        # Retire this pool worker once the result is on its way to the parent; the
+        # rest of its batch goes back to the pool (see bounded_imap)
+        _exit_scheduled = True
+        stats["recycled"] = True
+        return ExitAfterResult(result, on_exit=_before_recycle)
+    return result
+
+def _process_file(file_path: str) -> Tuple[str, List[Chunk], Dict[str, Any]]:
+    global _maven_resolver, _bazel_resolver, _chunker, _status_dict, _output_dir
+
+    pid = _worker_id()
+    t_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    timings: Dict[str, float] = {}
+    stats: Dict[str, Any] = {"pid": pid, "status": "error", "bytes_in": 0, "timings_ms": timings}
 
-    pid = os.getpid()
     # Update status to processing
     if _status_dict is not None:
         _status_dict[pid] = {"file": file_path, "status": "Processing"}
 
     try:
         # Check if initialized
-        if _parser is None:
+        if _thread.parsers is None:
             # Fallback if init_worker wasn't called or failed
             init_worker()
 
-        if not file_path.endswith(".java"):
-            return file_path, []
+        parser = _thread.parsers.get(file_path)
+        if parser is None:
+            if _thread.prefetcher is not None:
+                _thread.prefetcher.discard(file_path)
+            stats["status"] = "skipped"
+            return file_path, [], stats
 
         # Checksum logic
+        previous_hashes = None
         try:
-            current_checksum = calculate_checksum(file_path)
+            # Read and hashed in one pass, usually already by the prefetcher
+            with _stage("read"):
+                source, wait_s = _read_source(file_path)
+            timings["io_wait"] = wait_s * 1000
+            stats["bytes_in"] = source.size
+            current_checksum = source.checksum
 
             # Check if output already exists and is up to date
             if _output_dir:
-                rel_path = file_path.lstrip(os.sep)
-                if rel_path.startswith('.' + os.sep):
-                    rel_path = rel_path[2:]
-
                 # Assume JSON format for caching check
-                json_path = os.path.join(_output_dir, rel_path + ".json")
+                json_path = os.path.join(_output_dir, output_rel_path(file_path) + ".json")
 
                 if os.path.exists(json_path):
                     try:
-                        with open(json_path, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                            # Check metadata
-                            if 'metadata' in data and data['metadata'] and 'source_checksum' in data['metadata']:
-                                if data['metadata']['source_checksum'] == current_checksum:
-                                    # Cache hit
-                                    if _status_dict is not None:
-                                        _status_dict[pid] = {"file": file_path, "status": "Skipped (Cached)"}
-                                    return file_path, []
+                        # Streamed outputs are read without loading their code
+                        data, hashes = read_output(json_path)
+                        # Check metadata
+                        if 'metadata' in data and data['metadata'] and 'source_checksum' in data['metadata']:
+                            if _output_current(data['metadata'], current_checksum):
+                                # Cache hit
+                                if _status_dict is not None:
+                                    _status_dict[pid] = {"file": file_path, "status": "Skipped (Cached)"}
+                                stats["status"] = "cached"
+                                return file_path, [], stats
+                        if _config.track_changes:
+                            previous_hashes = hashes
                     except Exception:
                         pass # Ignore read errors, re-process
         except Exception as e:
             print(f"Error calculating checksum for {file_path}: {e}")
-            return file_path, []
+            return file_path, [], stats
 
-        t_start = time.time()
-        with open(file_path, 'rb') as f:
-            content = f.read()
+        if (_config.large_file_bytes and _output_dir and stats["bytes_in"] >= _config.large_file_bytes
+                and type(parser).parse_stream is not Parser.parse_stream):
+            chunks = _stream_file(file_path, parser, current_checksum, previous_hashes, stats, t_start)
+            if chunks is not None:
+                stats["status"] = "processed"
+                return file_path, chunks, stats
 
-        t0 = time.time()
-        parsed_result = _parser.parse(content, file_path)
-        t_parse = time.time() - t0
+        content = source.content
+        parsed_result = None
+        if _parse_cache is not None:
+            # Same content parsed before (any path, checkout or run)?
+            t0 = time.perf_counter()
+            with _stage("parse_cache"):
+                parsed_result = _parse_cache.get(current_checksum, parser)
+            timings["parse_cache"] = (time.perf_counter() - t0) * 1000
+            stats["parse_cache"] = "hit" if parsed_result is not None else "miss"
 
-        t0 = time.time()
-        deps = _maven_resolver.resolve(file_path)
-        t_maven = time.time() - t0
+        if parsed_result is None:
+            if content is None:
+                # A large file whose parser can't stream it
+                t0 = time.perf_counter()
+                with _stage("read"):
+                    with open(file_path, 'rb') as f:
+                        content = f.read()
+                timings["io_wait"] += (time.perf_counter() - t0) * 1000
 
-        t0 = time.time()
-        # Extend with Bazel deps
-        bazel_deps = _bazel_resolver.resolve(file_path)
-        t_bazel = time.time() - t0
-
-        existing_names = {d.name for d in deps}
-        for d in bazel_deps:
-            if d.name not in existing_names:
-                deps.append(d)
-                existing_names.add(d.name)
-
-        # Prepare metrics and metadata
-        metrics = {
-            "parse_time_ms": t_parse * 1000,
-            "maven_resolve_time_ms": t_maven * 1000,
-            "bazel_resolve_time_ms": t_bazel * 1000,
-            "total_processing_time_ms": (time.time() - t_start) * 1000,
-            "source_checksum": current_checksum
-        }
-
-        chunks = _chunker.chunk(parsed_result, deps, file_path, metadata=metrics)
-        return file_path, chunks
+            t0 = time.perf_counter()
+            with _stage("parse"):
+                parsed_result = parser.parse(content, file_path)
+            timings["parse"] = (time.perf_counter() - t0) * 1000
+
+            if _parse_cache is not None:
+                with _stage("parse_cache"):
+                    _parse_cache.put(current_checksum, parser, parsed_result)
+
+        deps = _resolve_dependencies(file_path, timings)
+        metrics = _file_metadata(timings, t_start, current_checksum)
+
+        t0 = time.perf_counter()
+        with _stage("chunk"):
+            chunks = _chunker.chunk(parsed_result, deps, file_path, metadata=metrics)
+        timings["chunk"] = (time.perf_counter() - t0) * 1000
+
+        if _normalizer is not None:
+            from src.core.normalize import normalize_chunks
+            t0 = time.perf_counter()
+            with _stage("normalize"):
+                if content is None:
+                    # A large file served from the parse cache; source maps point at its bytes
+                    with open(file_path, 'rb') as f:
+                        content = f.read()
+                stats["normalized_chars"] = normalize_chunks(chunks, parsed_result, _normalizer, content)
+            timings["normalize"] = (time.perf_counter() - t0) * 1000
+
+        if _class_index is not None:
+            t0 = time.perf_counter()
+            for chunk in walk_chunks(chunks):
+                if chunk.kind in ("class", "file"):
+                    known = _import_artifacts(chunk)
+                    for child in chunk.children:
+                        if child.kind != "class":
+                            child.import_artifacts = {imp: known[imp] for imp in child.imports if imp in known}
+            timings["import_artifacts"] = (time.perf_counter() - t0) * 1000
+
+        if _config.track_changes:
+            stats["removed_chunks"] = tag_changes(chunks, previous_hashes)
+
+        if _thread.minhasher is not None:
+            # Signatures go back with the stats; the parent's DuplicateIndex consumes them
+            from src.core.dedup import method_signatures
+            t0 = time.perf_counter()
+            with _stage("minhash"):
+                stats["minhash"] = method_signatures(chunks, _thread.minhasher)
+            timings["minhash"] = (time.perf_counter() - t0) * 1000
+
+        stats["status"] = "processed"
+        return file_path, chunks, stats
     except Exception as e:
         # Log error but don't stop processing
         print(f"Error processing {file_path}: {e}")
         if _status_dict is not None:
              _status_dict[pid] = {"file": file_path, "status": f"Error: {str(e)}"}
-        return file_path, []
+        return file_path, [], stats
     finally:
+        timings["total"] = (time.perf_counter() - t_start) * 1000
+        stats["cpu_ms"] = (time.thread_time() - cpu_start) * 1000
         # Update status to Idle/Done
         if _status_dict is not None:
             _status_dict[pid] = {"file": file_path, "status": "Idle"}
 
+def _resolve_dependencies(file_path: str, timings: Dict[str, float]) -> List[Any]:
+    t0 = time.perf_counter()
+    with _stage("resolve"):
+        deps = _maven_resolver.resolve(file_path)
+    timings["maven_resolve"] = (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    # Extend with Bazel deps
+    with _stage("resolve"):
+        bazel_deps = _bazel_resolver.resolve(file_path)
+    timings["bazel_resolve"] = (time.perf_counter() - t0) * 1000
+
+    existing_names = {d.name for d in deps}
+    for d in bazel_deps:
+        if d.name not in existing_names:
+            deps.append(d)
+            existing_names.add(d.name)
+    return deps
+
+def _import_artifacts(chunk: Chunk) -> Dict[str, str]:
+    """Sets a Java class chunk's import_artifacts from the class index and returns them."""
+    if chunk.language == "java":
+        from src.core.dependencies.class_index import import_artifacts
+        chunk.import_artifacts = import_artifacts(chunk.imports, _class_index, chunk.dependencies)
+    return chunk.import_artifacts
+
+def _output_current(metadata: Dict[str, Any], checksum: str) -> bool:
+    """Whether existing output can be kept: same source and options, and already in every enabled index."""
+    return (metadata['source_checksum'] == checksum
+            and metadata.get('normalize', []) == list(_config.normalize)
+            and metadata.get('import_artifacts', False) == bool(_config.class_index_path)
+            and set(_config.indexes) <= set(metadata.get('indexes', []))
+            and metadata.get('dedup') == _dedup_metadata())
+
+def _dedup_metadata() -> Optional[Dict[str, Any]]:
+    if _config.dedup is None:
+        return None
+    mode, threshold = _config.dedup
+    return {"mode": mode, "threshold": threshold}
+
+def _file_metadata(timings: Dict[str, float], t_start: float, checksum: str) -> Dict[str, Any]:
+    """Metrics and metadata recorded in the output's top-level chunk."""
+    return {
+        "parse_time_ms": timings.get("parse", 0.0),
+        "maven_resolve_time_ms": timings["maven_resolve"],
+        "bazel_resolve_time_ms": timings["bazel_resolve"],
+        "total_processing_time_ms": (time.perf_counter() - t_start) * 1000,
+        "source_checksum": checksum,
+        **({"normalize": list(_config.normalize)} if _config.normalize else {}),
+        **({"import_artifacts": True} if _config.class_index_path else {}),
+        **({"indexes": list(_config.indexes)} if _config.indexes else {}),
+        **({"dedup": _dedup_metadata()} if _config.dedup else {})
+    }
+
+def _stream_file(file_path: str, parser: Parser, checksum: str, previous_hashes: Optional[Dict[str, str]],
+                 stats: Dict[str, Any], t_start: float) -> Optional[List[Chunk]]:
+    """Chunks a large file without holding its code, methods or syntax tree in memory at once.
+
+    The worker writes the output file itself, method by method, and returns
+    the chunks without their code for the parent's change feed, duplicate
+    index, graph and search index (the writer skips chunks marked streamed). Returns None
+    if the parser can't stream this file.
+    """
+    timings = stats["timings_ms"]
+    with SourceFile(file_path) as source:
+        t0 = time.perf_counter()
+        with _stage("parse"):
+            parsed = parser.parse_stream(source, file_path)
+        timings["parse"] = (time.perf_counter() - t0) * 1000
+        if parsed is None:
+            return None
+
+        deps = _resolve_dependencies(file_path, timings)
+        metadata = _file_metadata(timings, t_start, checksum)
+        metadata["streamed"] = True
+        class_chunk, methods = _chunker.chunk_stream(parsed, deps, file_path, metadata=metadata)
+
+        # The class hash goes in the header, before the code
+        start, end = parsed.code_range
+        hasher = ContentHasher()
+        with _stage("hash"):
+            for piece in source.text_pieces(start, end):
+                hasher.update(piece)
+        class_chunk.content_hash = hasher.hexdigest()
+        known = _import_artifacts(class_chunk) if _class_index is not None else {}
+        previous = previous_hashes or {}
+        if _config.track_changes:
+            class_chunk.change = change_of(class_chunk.id, class_chunk.content_hash, previous)
+
+        stubs: List[Chunk] = []
+        signatures: Dict[str, bytes] = {}
+        if "search" in _config.indexes:
+            from src.core.search import chunk_terms
+
+        def children():
+            for chunk in methods:
+                if known:
+                    chunk.import_artifacts = {imp: known[imp] for imp in chunk.imports if imp in known}
+                if _config.track_changes:
+                    chunk.change = change_of(chunk.id, chunk.content_hash, previous)
+                if _thread.minhasher is not None:
+                    signature = _thread.minhasher.signature(chunk.code)
+                    if signature is not None:
+                        signatures[chunk.id] = signature.tobytes()
+                # The search index gets the method's terms, counted while its code is here
+                terms = dict(chunk_terms(chunk)) if "search" in _config.indexes else None
+                yield chunk
+                if _config.graph:
+                    chunk.code = ""
+                    stub = chunk
+                else:
+                    # Only what the change feed, duplicate index and search index need
+                    stub = Chunk(id=chunk.id, file_path=chunk.file_path, language=chunk.language, kind=chunk.kind,
+                                 code="", name=chunk.name, signature=chunk.signature, content_hash=chunk.content_hash,
+                                 change=chunk.change, parent_id=chunk.parent_id)
+                if terms is not None:
+                    stub.metadata = {**(chunk.metadata or {}), "search_terms": terms}
+                stubs.append(stub)
+
+        writers = _thread.writers = _thread.writers or {}
+        if _config.output_format not in writers:
+            writer_class = JSONWriter if _config.output_format == "json" else TextWriter
+            writers[_config.output_format] = writer_class(fsync=_config.fsync)
+        writer = writers[_config.output_format]
+        t0 = time.perf_counter()
+        with _stage("stream"):
+            stats["bytes_out"] = writer.write_streamed(class_chunk, source.text_pieces(start, end), children(),
+                                                       os.path.abspath(_output_dir))
+            writer.close()
+        timings["stream"] = (time.perf_counter() - t0) * 1000
+
+    class_chunk.children = stubs
+    stats["streamed"] = True
+    if _config.track_changes:
+        stats["removed_chunks"] = tag_changes([class_chunk], previous_hashes)
+    if _thread.minhasher is not None:
+        stats["minhash"] = signatures
+    return [class_chunk]
+
+def _select_languages(parser: argparse.ArgumentParser, requested: Optional[str]) -> List[str]:
+    """Languages to scan for: the requested ones, or every language whose grammar is installed."""
+    if requested:
+        languages = [name.strip() for name in requested.split(',') if name.strip()]
+        unknown = [name for name in languages if name not in LANGUAGES]
+        if unknown:
+            parser.error(f"unknown language(s) {', '.join(unknown)}; known: {', '.join(LANGUAGES)}")
+        missing = [name for name in languages if not is_available(name)]
+        if missing:
+            parser.error(", ".join(f"{name} needs the {LANGUAGES[name].grammar} package" for name in missing))
+        return languages
+    return [name for name in LANGUAGES if is_available(name)]
+
+def _file_size(file_path: str) -> int:
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return 0
+
+# Assumed peak RSS of a worker and of the parent until a run has measured them
+DEFAULT_WORKER_BYTES = 256 * 1024 * 1024
+DEFAULT_PARENT_BYTES = 256 * 1024 * 1024
+
+def _size_workers(output_dir: Optional[str], autoscale: bool = False):
+    """Default worker count for this machine or container, using the memory the last run measured."""
+    measured = {}
+    if output_dir:
+        try:
+            with open(os.path.join(output_dir, ARTIFACT_DIR, "sizing.json"), 'r', encoding='utf-8') as f:
+                measured = json.load(f)
+        except (OSError, ValueError):
+            pass
+    # Leave headroom: peaks vary with the files a worker happens to get
+    worker_bytes = int(measured.get("worker_peak_rss_bytes", 0) * 1.25) or DEFAULT_WORKER_BYTES
+    parent_bytes = int(measured.get("parent_peak_rss_bytes", 0) * 1.25) or DEFAULT_PARENT_BYTES
+    return size_workers(worker_bytes, parent_bytes, max_workers=2 * available_cpus() if autoscale else None)
+
+# Files modified this long before the scan or later may change again without a new mtime
+# (coarse timestamps), so --fast-scan looks at them again on the next run
+RACY_WINDOW_NS = 2 * 10**9
+
+# Run artifacts that `merge` combines; SQLite's -wal/-shm files go with their database
+MERGED_ARTIFACTS = {"manifest.json", "metrics.json", "graph.sqlite", "search", "changes.ndjson"}
+
+def _scan_fingerprint(args: argparse.Namespace, extensions: Tuple[str, ...]) -> str:
+    """The options a --fast-scan summary is valid for; output written with others must be redone."""
+    return json.dumps({"source_dir": os.path.abspath(args.source_dir), "extensions": sorted(extensions),
+                       "format": args.format, "normalize": args.normalize, "graph": args.graph,
+                       "search_index": args.search_index, "import_artifacts": args.import_artifacts,
+                       "dedup": [args.dedup, args.dedup_threshold] if args.dedup != "off" else None,
+                       "shard": shard_spec(args.shard, args.shard_by_size)}, sort_keys=True)
+
+def _note_failures(results, failed: set):
+    """Passes results through, collecting the files whose processing failed."""
+    for result in results:
+        if result[2].get("status") == "error":
+            failed.add(result[0])
+        yield result
+
+def _save_sizing(output_dir: str, report: Dict[str, Any]) -> None:
+    worker_bytes = int(report["peak_rss_mb"]["max_worker"] * 1024 * 1024)
+    if not worker_bytes:
+        return
+    with open(artifact_path(output_dir, "sizing.json"), 'w', encoding='utf-8') as f:
+        json.dump({"worker_peak_rss_bytes": worker_bytes,
+                   "parent_peak_rss_bytes": int(report["peak_rss_mb"]["parent"] * 1024 * 1024)}, f, indent=2)
+
+def graph_main(argv: List[str]):
+    """Queries the type/import graph of a previous run."""
+    from src.core.graph import GraphIndex
+
+    parser = argparse.ArgumentParser(prog="main.py graph", description="Query the code graph")
+    parser.add_argument("output_dir", help="Output directory of a run made with --graph")
+    query = parser.add_mutually_exclusive_group(required=True)
+    query.add_argument("--neighbors", metavar="CHUNK_ID", help="Outgoing edges of a chunk")
+    query.add_argument("--dependents", metavar="TARGET", help="Chunks referencing a chunk ID or external name")
+    query.add_argument("--lookup", metavar="FQN", help="Chunks declaring a fully-qualified name")
+    parser.add_argument("--kind", help="Only edges of this kind (imports, extends, implements, calls, instantiates)")
+
+    args = parser.parse_args(argv)
+
+    graph = GraphIndex(artifact_path(os.path.abspath(args.output_dir), "graph.sqlite"))
+    try:
+        if args.lookup:
+            for chunk_id in graph.lookup(args.lookup):
+                print(chunk_id)
+            return
+        if args.neighbors:
+            edges = graph.neighbors(args.neighbors, kind=args.kind)
+        else:
+            edges = graph.dependents(args.dependents, kind=args.kind)
+        for edge in edges:
+            suffix = " (external" + (f", {edge.artifact}" if edge.artifact else "") + ")" if edge.external else ""
+            print(f"{edge.src} -[{edge.kind}]-> {edge.dst}{suffix}")
+    finally:
+        graph.close()
+
+def search_main(argv: List[str]):
+    """Ranks the chunks of a previous run against a query."""
+    parser = argparse.ArgumentParser(prog="main.py search", description="Search the chunks of a run")
+    parser.add_argument("output_dir", help="Output directory of a run made with --search-index")
+    parser.add_argument("query", help="Words, identifiers or code; camelCase and snake_case names also match their parts")
+    parser.add_argument("-k", "--limit", type=int, default=10, help="Number of results")
+
+    args = parser.parse_args(argv)
+    try:
+        from src.core.search import SearchReader
+    except ImportError:
+        parser.error("search needs numpy (pip install numpy)")
+
+    index_dir = os.path.join(os.path.abspath(args.output_dir), ARTIFACT_DIR, "search")
+    if not os.path.exists(os.path.join(index_dir, "segments.json")):
+        sys.exit(f"No search index in {args.output_dir} (run with --search-index)")
+    t0 = time.perf_counter()
+    reader = SearchReader(index_dir)
+    hits = reader.search(args.query, limit=args.limit)
+    elapsed = time.perf_counter() - t0
+    for hit in hits:
+        print(f"{hit.score:8.3f}  {hit.chunk_id}")
+    print(f"{len(hits)} results from {reader.doc_count} chunks in {elapsed * 1000:.1f} ms", file=sys.stderr)
+
+def merge_main(argv: List[str]):
+    """Combines the output directories of sharded runs into one output tree."""
+    from src.core.metrics import merge_reports
+    from src.core.sharding import load_manifest, merge_manifests, copy_output_tree, manifest_path, merge_change_feeds
+
+    parser = argparse.ArgumentParser(prog="main.py merge", description="Merge the outputs of sharded runs")
+    parser.add_argument("shard_dirs", nargs="+", help="Output directories of runs made with --shard")
+    parser.add_argument("--output", "-o", required=True, help="Merged output directory (may be one of the shards)")
+    parser.add_argument("--allow-partial", action="store_true", help="Merge even if some shards are missing")
+
+    args = parser.parse_args(argv)
+
+    output_dir = os.path.abspath(args.output)
+    shard_dirs = [os.path.abspath(d) for d in args.shard_dirs]
+    try:
+        merged = merge_manifests([load_manifest(d) for d in shard_dirs], allow_partial=args.allow_partial)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Cannot merge: {e}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    for shard_dir in shard_dirs:
+        if shard_dir != output_dir:
+            print(f"Copied {copy_output_tree(shard_dir, output_dir)} files from {shard_dir}")
+
+    graph_dbs = [os.path.join(d, ARTIFACT_DIR, "graph.sqlite") for d in shard_dirs]
+    graph_dbs = [path for path in graph_dbs if os.path.exists(path)]
+    if graph_dbs:
+        from src.core.graph import GraphIndex
+        graph = GraphIndex(artifact_path(output_dir, "graph.sqlite"))
+        try:
+            for db_path in graph_dbs:
+                if os.path.dirname(os.path.dirname(db_path)) != output_dir:
+                    graph.merge_from(db_path)
+        finally:
+            graph.close()
+        print(f"Merged {len(graph_dbs)} graph indexes")
+
+    search_dirs = [os.path.join(d, ARTIFACT_DIR, "search") for d in shard_dirs]
+    search_dirs = [path for path in search_dirs if os.path.exists(os.path.join(path, "segments.json"))]
+    if search_dirs:
+        try:
+            from src.core.search import SearchIndex
+        except ImportError:
+            sys.exit("Cannot merge the search indexes: numpy is not installed")
+        search_index = SearchIndex(artifact_path(output_dir, "search"))
+        for index_dir in search_dirs:
+            if os.path.dirname(os.path.dirname(index_dir)) != output_dir:
+                search_index.merge_from(index_dir)
+        search_index.close()
+        print(f"Merged {len(search_dirs)} search indexes")
+        if len(search_dirs) < len(shard_dirs):
+            print("Some shards have no search index (run them with --search-index); it only covers the others")
+
+    feeds = [os.path.join(d, ARTIFACT_DIR, "changes.ndjson") for d in shard_dirs]
+    feeds = [path for path in feeds if os.path.exists(path)]
+    if feeds:
+        lines = merge_change_feeds(feeds, artifact_path(output_dir, "changes.ndjson"))
+        print(f"Merged {len(feeds)} change feeds ({lines} changes)")
+        if len(feeds) < len(shard_dirs):
+            print("Some shards have no change feed; the merged one only covers the others")
+
+    # Fast-scan summaries, worker sizing and profiles only describe the run that wrote them
+    for shard_dir in shard_dirs:
+        artifacts = os.path.join(shard_dir, ARTIFACT_DIR)
+        skipped = sorted(name for name in os.listdir(artifacts) if name.split("-")[0] not in MERGED_ARTIFACTS
+                         and ".tmp." not in name)
+        if skipped and shard_dir != output_dir:
+            print(f"Not merged from {shard_dir}: {', '.join(skipped)}")
+
+    reports = []
+    for shard_dir in shard_dirs:
+        metrics_path = os.path.join(shard_dir, ARTIFACT_DIR, "metrics.json")
+        if os.path.exists(metrics_path):
+            with open(metrics_path, 'r', encoding='utf-8') as f:
+                reports.append(json.load(f))
+    if len(reports) == len(shard_dirs):
+        with open(artifact_path(output_dir, "metrics.json"), 'w', encoding='utf-8') as f:
+            json.dump(merge_reports(reports), f, indent=2)
+    elif reports:
+        print("Some shards have no metrics.json (run them with --metrics); skipping the merged report")
+
+    with open(manifest_path(output_dir), 'w', encoding='utf-8') as f:
+        json.dump(merged, f, indent=2)
+    print(f"Merged {len(shard_dirs)} shards ({len(merged['files'])} files) into {output_dir}")
+
+def index_jars_main(argv: List[str]):
+    """Builds or refreshes the class -> artifact index of a local Maven repository."""
+    parser = argparse.ArgumentParser(prog="main.py index-jars", description="Index the classes of a local Maven repository")
+    _add_class_index_arguments(parser)
+    args = parser.parse_args(argv)
+    _update_class_index(args)
+
+def _add_class_index_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--maven-repo", help="Local Maven repository to index (default: ~/.m2/repository)")
+    parser.add_argument("--class-index-dir", help="Where the class index lives (default: ~/.cache/code-graph/classes)")
+
+def _update_class_index(args: argparse.Namespace) -> str:
+    """Updates the class index for the parsed arguments; returns the path of its lookup file."""
+    from src.core.dependencies.class_index import INDEX_NAME, default_index_dir, default_maven_repo, update_class_index
+    maven_repo = os.path.abspath(args.maven_repo or default_maven_repo())
+    index_dir = os.path.abspath(args.class_index_dir or default_index_dir())
+    t0 = time.perf_counter()
+    counts = update_class_index(maven_repo, index_dir)
+    print(f"Class index: {counts['jars']} jars in {maven_repo} ({counts['added']} added, {counts['updated']} updated, "
+          f"{counts['removed']} removed) in {time.perf_counter() - t0:.2f}s")
+    return os.path.join(index_dir, INDEX_NAME)
+
+SUBCOMMANDS = {
+    "graph": graph_main,
+    "merge": merge_main,
+    "index-jars": index_jars_main,
+    "search": search_main,
+}
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        return SUBCOMMANDS[sys.argv[1]](sys.argv[2:])
+
     parser = argparse.ArgumentParser(description="Scalable Code Chunker")
     parser.add_argument("source_dir", help="Root directory to scan")
-    parser.add_argument("--output", "-o", help="Output directory", required=True)
+    parser.add_argument("--output", "-o", help="Output directory, or - to stream NDJSON to stdout")
+    parser.add_argument("--stream", action="store_true", help="Stream chunks as NDJSON to stdout (same as --output -)")
+    parser.add_argument("--stream-order", choices=["unordered", "path"], default="unordered",
+                        help="With --stream, emit files as they finish or sorted by path (bounded reorder buffer)")
     parser.add_argument("--format", "-f", choices=["json", "text"], default="json", help="Output format")
-    parser.add_argument("--workers", "-w", type=int, default=os.cpu_count(), help="Number of workers")
+    parser.add_argument("--languages", help=f"Comma-separated languages to process ({', '.join(LANGUAGES)}; default: all with an installed grammar)")
+    parser.add_argument("--executor", choices=["auto"] + EXECUTORS, default="auto",
+                        help="Run the pipeline in worker processes, threads or inline (default: auto)")
+    parser.add_argument("--workers", "-w", type=int,
+                        help="Number of workers (default: one per usable CPU, honoring cgroup CPU quotas, CPU affinity and the memory limit)")
+    parser.add_argument("--autoscale", action="store_true",
+                        help="Start up to twice as many workers as CPUs and keep as many busy as their CPU vs. I/O wait mix allows")
     parser.add_argument("--no-tui", action="store_true", help="Disable TUI (Job Mode)")
+    parser.add_argument("--shard", type=parse_shard, metavar="INDEX/COUNT", help="Only process shard INDEX (0-based) of COUNT; combine the outputs with `merge`")
+    parser.add_argument("--shard-by-size", action="store_true", help="With --shard, balance shards by file size instead of path hash")
+    parser.add_argument("--parse-cache", action="store_true", help="Cache parse results by content in a directory shared by all runs and checkouts")
+    parser.add_argument("--parse-cache-dir", help="Parse cache location; implies --parse-cache (default: ~/.cache/code-graph/parse)")
+    parser.add_argument("--parse-cache-max-mb", type=float, default=1024, help="Evict least recently used parse cache entries above this size")
+    parser.add_argument("--fast-scan", action="store_true",
+                        help="Only dispatch files whose size or mtime changed since the last run, using per-directory summaries")
+    parser.add_argument("--dedup", choices=["off", "mark", "suppress"], default="off",
+                        help="Detect near-duplicate methods (needs numpy): mark them in metadata, or also drop them from the output")
+    parser.add_argument("--dedup-threshold", type=float, default=0.8, help="Estimated Jaccard similarity of token shingles at which methods count as duplicates")
+    parser.add_argument("--normalize", type=parse_normalize_options, default=[], metavar="OPTIONS",
+                        help="Shrink chunk code: comma-separated whitespace, license, docs (first sentence of doc comments), "
+                             "comments (all), or all")
+    parser.add_argument("--large-file-mb", type=float, default=4,
+                        help="Parse and write files at least this large piece by piece in the worker, in bounded memory (0 disables)")
+    parser.add_argument("--prefetch", type=int, default=2, metavar="N",
+                        help="Files each worker reads (and resolves dependencies for) ahead of the one it is parsing (0 disables)")
+    parser.add_argument("--import-artifacts", action="store_true",
+                        help="Record the Maven artifact of every Java import, from an index of the local Maven repository's jars")
+    _add_class_index_arguments(parser)
+    parser.add_argument("--io-threads", type=int, default=4, help="Threads writing output files (0 writes synchronously)")
+    parser.add_argument("--fsync", action="store_true", help="fsync output files before committing them (slower, crash-safe)")
+    parser.add_argument("--max-in-flight", type=int, help="Max files submitted to workers but not yet written (default: 2 batches per worker)")
+    parser.add_argument("--max-in-flight-mb", type=float, help="Max source megabytes submitted to workers but not yet written")
+    parser.add_argument("--max-tasks-per-child", type=int, help="Replace each worker after this many batches")
+    parser.add_argument("--worker-rss-limit-mb", type=float, help="Replace a worker after any file that leaves its RSS above this")
+    parser.add_argument("--graph", action="store_true", help="Maintain the repository-wide type/import/call graph in the output directory")
+    parser.add_argument("--search-index", action="store_true", help="Maintain a BM25 index of code and identifiers for the search subcommand (needs numpy)")
+    parser.add_argument("--sink", metavar="MODULE:NAME",
+                        help="Also hand the chunks to a Python Sink, Sink class or function (sync or async) in batches")
+    parser.add_argument("--sink-batch-size", type=int, metavar="N", help="Max chunks per sink batch, children included (default: the sink's, 64)")
+    parser.add_argument("--sink-batch-mb", type=float, metavar="MB", help="Max megabytes of code per sink batch (default: the sink's, 4)")
+    parser.add_argument("--sink-concurrency", type=int, metavar="N", help="Sink batches in flight at once (default: the sink's, 4)")
+    parser.add_argument("--sink-retries", type=int, metavar="N", help="Retries of a failing sink batch (default: the sink's, 3)")
+    parser.add_argument("--metrics", action="store_true", help="Write a run report to <output>/.code-graph/metrics.json")
+    parser.add_argument("--prometheus", metavar="PATH", help="Also write the run report in Prometheus textfile format to PATH")
+    parser.add_argument("--profile", action="store_true", help="Profile every worker with cProfile; report in <output>/.code-graph/profile/")
+    parser.add_argument("--profile-memory", action="store_true", help="With --profile, also trace allocations with tracemalloc")
 
     args = parser.parse_args()
 
+    stream = args.stream or args.output == "-"
+    if not stream and not args.output:
+        parser.error("--output is required unless streaming")
+    if stream:
+        for flag in ("graph", "search_index", "metrics", "profile", "shard", "fast_scan"):
+            if getattr(args, flag):
+                parser.error(f"--{flag.replace('_', '-')} needs an output directory and can't be combined with streaming")
+
+    duplicate_index = None
+    if args.dedup != "off":
+        try:
+            from src.core.dedup import DuplicateIndex, dedup_results
+        except ImportError:
+            parser.error("--dedup needs numpy (pip install numpy)")
+        duplicate_index = DuplicateIndex(threshold=args.dedup_threshold)
+    if args.search_index:
+        try:
+            from src.core.search import SearchIndex
+        except ImportError:
+            parser.error("--search-index needs numpy (pip install numpy)")
+    sink = None
+    if args.sink:
+        try:
+            sink = load_sink(args.sink)
+        except (ImportError, AttributeError, ValueError) as e:
+            parser.error(f"--sink: {e}")
+
     start_time = time.time()
+    worker_config = WorkerConfig(minhash=duplicate_index is not None)
+    # Change tracking compares against the previous run's JSON files
+    worker_config.track_changes = not stream and args.format == "json"
+    if not stream:
+        # Streamed files are written as parsed, so their code can't be normalized,
+        # their duplicates can't be marked or dropped and their code never reaches a sink
+        if not args.normalize and args.dedup == "off" and sink is None:
+            worker_config.large_file_bytes = int(args.large_file_mb * 1024 * 1024)
+        worker_config.output_format = args.format
+        worker_config.fsync = args.fsync
+        worker_config.graph = args.graph
+    worker_config.normalize = tuple(args.normalize)
+    worker_config.indexes = tuple(name for name, enabled in (("graph", args.graph), ("search", args.search_index))
+                                  if enabled)
+    if args.dedup != "off":
+        worker_config.dedup = (args.dedup, args.dedup_threshold)
+    worker_config.prefetch = args.prefetch
+    if args.parse_cache or args.parse_cache_dir:
+        from src.core.parse_cache import default_cache_dir
+        worker_config.parse_cache_dir = os.path.abspath(args.parse_cache_dir or default_cache_dir())
 
-    # Verify output directory
-    output_dir = os.path.abspath(args.output)
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+    if stream:
+        # stdout carries the data; everything else (progress, errors) goes to stderr
+        data_stream = sys.stdout.buffer
+        sys.stdout = sys.stderr
+        worker_config.stdout_to_stderr = True
+        output_dir = None
+    else:
+        # Verify output directory
+        output_dir = os.path.abspath(args.output)
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+
+    if args.worker_rss_limit_mb:
+        worker_config.rss_limit_bytes = int(args.worker_rss_limit_mb * 1024 * 1024)
+    profiler = None
+    if args.profile:
+        from src.core.profiling import StageProfiler
+        profile_dir = os.path.dirname(artifact_path(output_dir, "profile", "report.txt"))
+        # Start from a clean directory so stale dumps don't end up in the merge
+        shutil.rmtree(profile_dir)
+        worker_config.profile_dir = profile_dir
+        worker_config.trace_memory = args.profile_memory
+        profiler = StageProfiler(profile_dir, process_name="main", trace_memory=args.profile_memory)
+
+    if args.import_artifacts:
+        # Incremental: only jars added or rewritten since the last run are opened
+        worker_config.class_index_path = _update_class_index(args)
 
     # Find files
-    print(f"Scanning {args.source_dir} for Java files...")
+    languages = _select_languages(parser, args.languages)
+    extensions = tuple(extensions_for(languages))
+    print(f"Scanning {args.source_dir} for {', '.join(languages)} files...")
     files = []
-    for root, dirs, filenames in os.walk(args.source_dir):
-        # Skip hidden directories
-        dirs[:] = [d for d in dirs if not d.startswith('.')]
-        for name in filenames:
-            if name.endswith(".java"):
-                files.append(os.path.join(root, name))
+    tree_store = tree_scan = None
+    with profiler.stage("scan") if profiler else nullcontext():
+        if args.fast_scan:
+            tree_store = TreeSummaryStore(artifact_path(output_dir, "tree.sqlite"), _scan_fingerprint(args, extensions))
+            scan_started_ns = time.time_ns()
+            tree_scan = scan_tree(args.source_dir, extensions, tree_store)
+            files = tree_scan.files
+        else:
+            for root, dirs, filenames in os.walk(args.source_dir):
+                # Skip hidden directories
+                dirs[:] = [d for d in dirs if not d.startswith('.')]
+                for name in filenames:
+                    if name.lower().endswith(extensions):
+                        files.append(os.path.join(root, name))
+
+    if args.shard:
+        total = len(files)
+        files = select_shard(files, args.source_dir, *args.shard, by_size=args.shard_by_size)
+        print(f"Shard {args.shard[0]}/{args.shard[1]}: {len(files)} of {total} files")
 
-    print(f"Found {len(files)} files. Processing with {args.workers} workers...")
+    # Files handed to the workers; --fast-scan leaves out the ones it found unchanged
+    pending = files
+    if tree_scan is not None:
+        if tree_scan.digest == tree_store.root_digest:
+            tree_store.close()
+            if worker_config.track_changes:
+                # Nothing changed, so this run's change feed is empty
+                ChangeFeed(artifact_path(output_dir, "changes.ndjson")).close()
+            metrics = RunMetrics(workers=0)
+            metrics.record_unchanged(len(files))
+            metrics.finish()
+            if args.metrics:
+                metrics.write_json(artifact_path(output_dir, "metrics.json"))
+            if args.prometheus:
+                metrics.write_prometheus(args.prometheus)
+            if sink is not None:
+                SinkWriter(sink).close()
+            print(f"Nothing to do: {len(files)} files unchanged since the last run "
+                  f"({time.time() - start_time:.2f}s)")
+            return
+        if args.shard:
+            selected = set(files)
+            pending = [file_path for file_path in tree_scan.changed if file_path in selected]
+        else:
+            pending = tree_scan.changed
+        print(f"Fast scan: {len(pending)} of {len(files)} files changed "
+              f"({tree_scan.unchanged_dirs} of {len(tree_scan.dirs)} directories unchanged)")
+
+    # Near-duplicate detection takes the first copy it sees as canonical, so it gets the files in path order
+    ordered = (stream and args.stream_order == "path") or duplicate_index is not None
+    if ordered:
+        pending.sort()
+
+    workers = args.workers
+    if workers is None:
+        sizing = _size_workers(output_dir, autoscale=args.autoscale)
+        workers = sizing.workers
+        print(f"Sizing workers for {sizing.describe()}")
+    executor = choose_executor(args.executor, len(pending), workers)
+    workers = 1 if executor == "inline" else workers
+    if executor != "process" and (args.max_tasks_per_child or args.worker_rss_limit_mb):
+        print("Note: --max-tasks-per-child and --worker-rss-limit-mb only apply to the process executor")
+
+    print(f"Found {len(pending)} files. Processing with {workers} {executor} workers...")
 
     # Select writer
-    if args.format == "json":
-        writer = JSONWriter()
+    if stream:
+        writer = NDJSONWriter(data_stream)
+    elif args.format == "json":
+        writer = JSONWriter(fsync=args.fsync)
     else:
-        writer = TextWriter()
+        writer = TextWriter(fsync=args.fsync)
+    if args.io_threads > 0 and not stream:
+        writer = ThreadedWriter(writer, threads=args.io_threads)
+
+    graph_index = None
+    if args.graph:
+        from src.core.graph import GraphIndex
+        graph_index = GraphIndex(artifact_path(output_dir, "graph.sqlite"))
+        writer = CompositeWriter([writer, graph_index])
+    search_index = None
+    if args.search_index:
+        search_index = SearchIndex(artifact_path(output_dir, "search"))
+        writer = CompositeWriter([writer, search_index])
+    sink_writer = None
+    if sink is not None:
+        sink_writer = SinkWriter(sink, max_batch_chunks=args.sink_batch_size,
+                                 max_batch_bytes=int(args.sink_batch_mb * 1024 * 1024) if args.sink_batch_mb else None,
+                                 concurrency=args.sink_concurrency, retries=args.sink_retries)
+        writer = CompositeWriter([writer, sink_writer])
+
+    if profiler:
+        from src.core.profiling import ProfiledWriter
+        writer = ProfiledWriter(writer, profiler)
 
     # Process
-    chunk_size = max(1, len(files) // (args.workers * 4))
+    chunk_size = max(1, min(64, len(pending) // (workers * 4)))
+    max_in_flight = args.max_in_flight or workers * chunk_size * 2
+    autoscaler = None
+    if args.autoscale and executor != "inline" and not args.max_in_flight:
+        # The pool has `workers` workers; the in-flight limit decides how many are busy
+        autoscaler = Autoscaler(cpus=available_cpus(), max_workers=workers, chunksize=chunk_size)
+        max_in_flight = autoscaler.max_in_flight
+    max_in_flight_bytes = int(args.max_in_flight_mb * 1024 * 1024) if args.max_in_flight_mb else None
+
+    def dispatch(pool):
+        # Backpressure: workers only get new files as results are consumed
+        results = metrics.track(bounded_imap(pool, process_file, pending, max_in_flight=max_in_flight,
+                                             max_bytes=max_in_flight_bytes, size_of=_file_size,
+                                             chunksize=chunk_size, ordered=ordered,
+                                             before_batch=prefetch_batch if worker_config.prefetch else None))
+        if autoscaler is not None:
+            results = autoscaler.observe(results)
+        if tree_store is not None:
+            results = _note_failures(results, failed)
+        if change_feed is not None:
+            results = track_changes(results, change_feed)
+        if duplicate_index is not None:
+            results = dedup_results(results, duplicate_index, suppress=args.dedup == "suppress")
+        return results
+
+    failed = set()
+    change_feed = None
+    if worker_config.track_changes:
+        change_feed = ChangeFeed(artifact_path(output_dir, "changes.ndjson"))
+        try:
+            previous = load_manifest(output_dir)
+        except (OSError, ValueError):
+            previous = None
+        # A different shard covers different files; those aren't removals
+        if previous and previous.get("shard") == shard_spec(args.shard, args.shard_by_size):
+            for file_path, chunk_ids in removed_files(output_dir, previous["files"], files):
+                change_feed.record(file_path, [], chunk_ids)
 
     # Determine execution mode
-    use_tui = not args.no_tui and os.isatty(sys.stdout.fileno())
+    use_tui = not args.no_tui and not stream and os.isatty(sys.stdout.fileno())
 
-    init_args = (None, output_dir)
+    init_args = (None, output_dir, worker_config)
+    metrics = RunMetrics(workers=workers)
 
     if use_tui:
         # Create Manager for shared state
         with multiprocessing.Manager() as manager:
             status_dict = manager.dict()
             # Pass status_dict and output_dir
-            init_args = (status_dict, output_dir)
+            init_args = (status_dict, output_dir, worker_config)
 
             # Initialize pool with status_dict
-            with multiprocessing.Pool(processes=args.workers, initializer=init_worker, initargs=init_args) as pool:
+            with create_pool(executor, workers, init_worker, init_args,
+                             maxtasksperchild=args.max_tasks_per_child) as pool:
                 # Start processing
-                result_iter = pool.imap_unordered(process_file, files, chunksize=chunk_size)
+                result_iter = dispatch(pool)
 
                 # Delegate loop to UI handler
-                run_tui(status_dict, result_iter, writer, output_dir, files=files)
+                run_tui(status_dict, result_iter, writer, output_dir, files=pending)
+
+                # Let workers exit normally so their exit hooks (profile dumps) run
+                pool.close()
+                pool.join()
     else:
         # Job Mode (No TUI)
         print("Running in Job Mode (No TUI)")
-        with multiprocessing.Pool(processes=args.workers, initializer=init_worker, initargs=init_args) as pool:
-            result_iter = pool.imap_unordered(process_file, files, chunksize=chunk_size)
+        with create_pool(executor, workers, init_worker, init_args,
+                         maxtasksperchild=args.max_tasks_per_child) as pool:
+            result_iter = dispatch(pool)
 
             processed_count = 0
             skipped_count = 0
-            for file_path, chunks in result_iter:
+            for file_path, chunks, _ in result_iter:
                 if chunks:
                     writer.write(chunks, output_dir)
                     processed_count += 1
@@ -217,10 +1052,79 @@ def main():
                 # Simple progress logging
                 total_done = processed_count + skipped_count
                 if total_done % 10 == 0:
-                     print(f"Processed {total_done}/{len(files)} files (Skipped: {skipped_count})...")
+                     print(f"Processed {total_done}/{len(pending)} files (Skipped: {skipped_count})...")
+
+            # Let workers exit normally so their exit hooks (profile dumps) run
+            pool.close()
+            pool.join()
+
+    # Forget sources that were deleted since the last run
+    if graph_index is not None:
+        graph_index.retain(files)
+    if search_index is not None:
+        search_index.retain(files)
+    writer.close()
+    if change_feed is not None:
+        change_feed.close()
+    if tree_store is not None:
+        metrics.record_unchanged(len(files) - len(pending))
+        # Failed files are stored as changed so the next run retries them
+        tree_store.save(tree_scan, failed, racy_after_ns=scan_started_ns - RACY_WINDOW_NS)
+        tree_store.close()
+    metrics.finish(bytes_out=writer.bytes_written)
+    if worker_config.parse_cache_dir:
+        from src.core.parse_cache import evict
+        evict(worker_config.parse_cache_dir, int(args.parse_cache_max_mb * 1024 * 1024))
+    report = metrics.report()
+    if output_dir:
+        if executor == "process":
+            _save_sizing(output_dir, report)
+        write_manifest(output_dir, args.source_dir, files, args.format, shard=args.shard, by_size=args.shard_by_size)
+
+    if args.metrics:
+        metrics.write_json(artifact_path(output_dir, "metrics.json"))
+    if args.prometheus:
+        metrics.write_prometheus(args.prometheus)
+    if profiler:
+        from src.core.profiling import merge_profiles
+        profiler.dump()
+        for thread_profiler in _thread_profilers:
+            thread_profiler.dump()
+        print(f"Profile report written to {merge_profiles(profiler.out_dir)}")
 
     elapsed = time.time() - start_time
-    print(f"Done. Processed {len(files)} files in {elapsed:.2f}s. Output written to {output_dir}")
+    print(f"Done. Processed {len(pending)} files in {elapsed:.2f}s. Output written to {output_dir or 'stdout'}")
+    print(f"Cache hit ratio: {report['cache_hit_ratio']:.1%}, "
+          f"worker utilization: {report['worker_utilization']:.1%}, "
+          f"I/O wait: {report['io_wait_ratio']:.1%} of busy time, "
+          f"parse cache hit ratio: {report['parse_cache']['hit_ratio']:.1%}, "
+          f"{report['bytes_in'] / 1e6:.1f} MB in, {report['bytes_out'] / 1e6:.1f} MB out")
+    if change_feed is not None:
+        counts = change_feed.counts
+        print(f"Changes: {counts['added']} added, {counts['modified']} modified, {counts['removed']} removed "
+              f"chunks (feed: {os.path.relpath(change_feed.path)})")
+    if autoscaler is not None:
+        print(f"Autoscale: {autoscaler.min_active}-{autoscaler.max_active} of {workers} workers busy "
+              f"(worker CPU ratio {report['worker_cpu_ratio']:.0%})")
+    if sink_writer is not None:
+        print(f"Sink: {sink_writer.chunks_sent} chunks in {sink_writer.batches_sent} batches "
+              f"({sink_writer.retried} retries)")
+    if duplicate_index is not None:
+        print(f"Near-duplicates: {duplicate_index.duplicates} of {duplicate_index.methods} methods "
+              f"({'suppressed' if args.dedup == 'suppress' else 'marked'})")
+    if args.normalize:
+        normalization = report["normalization"]
+        print(f"Normalization: chunk code {normalization['chars_in'] / 1e6:.1f} -> {normalization['chars_out'] / 1e6:.1f} "
+              f"M characters ({normalization['saved_ratio']:.1%} saved)")
+    print(f"Peak RSS: parent {report['peak_rss_mb']['parent']:.0f} MB, "
+          f"largest worker {report['peak_rss_mb']['max_worker']:.0f} MB "
+          f"({report['recycled_workers']} workers recycled)")
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    except BrokenPipeError:
+        # The consumer of --stream went away (e.g. `| head`); stop quietly
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.__stdout__.fileno())
+        sys.exit(1)
@@ -81,7 +81,7 @@ def run_search(status_dict: Any, files: List[str], processed_files: set) -> None
         # FZF might fail if not installed or cancelled
         pass
 
-def run_tui(status_dict: Any, result_iter: Iterator[Tuple[str, List[Any]]], writer: Any, output_path: str, files: List[str]) -> None:
+def run_tui(status_dict: Any, result_iter: Iterator[Tuple[str, List[Any], Dict[str, Any]]], writer: Any, output_path: str, files: List[str]) -> None:
     console = Console()
     total_files = len(files)
     processed_files = set()
@@ -125,7 +125,7 @@ def run_tui(status_dict: Any, result_iter: Iterator[Tuple[str, List[Any]]], writ
             use_screen = os.isatty(sys.stdin.fileno())
 
             with Live(generate_layout(), refresh_per_second=4, screen=use_screen) as live:
-                for file_path, chunks in result_iter:
+                for file_path, chunks, _ in result_iter:
                     processed_files.add(file_path)
 
                     # Check for input
@@ -0,0 +1,18 @@
+import os
+
+# Run artifacts (graph database, reports, ...) live in a hidden directory inside
+# the output tree so they never collide with mirrored source paths.
+ARTIFACT_DIR = ".code-graph"
+
+def output_rel_path(file_path: str) -> str:
+    """Returns the path of a source file relative to the output root."""
+    rel_path = file_path.lstrip(os.sep)
+    if rel_path.startswith('.' + os.sep):
+        rel_path = rel_path[2:]
+    return rel_path
+
+def artifact_path(output_dir: str, *parts: str) -> str:
+    """Returns the path of a run artifact, creating its parent directory."""
+    path = os.path.join(output_dir, ARTIFACT_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
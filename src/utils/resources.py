@@ -0,0 +1,164 @@
+import os
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process right now (falls back to the peak)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+# cgroup v1 reports "no limit" as a huge page-aligned number
+_V1_UNLIMITED = 1 << 60
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def _cgroup_paths(proc_cgroup: str) -> Dict[str, str]:
+    """Controller -> this process's cgroup path ("" is the v2 unified hierarchy)."""
+    paths = {}
+    for line in (_read(proc_cgroup) or "").splitlines():
+        parts = line.split(":", 2)
+        if len(parts) != 3:
+            continue
+        for controller in parts[1].split(",") if parts[1] else [""]:
+            paths[controller] = parts[2]
+    return paths
+
+def _cgroup_dirs(root: str, controller: str, paths: Dict[str, str]) -> List[str]:
+    """This process's cgroup directory and its ancestors; a limit at any level applies."""
+    base = os.path.join(root, controller) if controller else root
+    if controller and not os.path.isdir(base):
+        # e.g. "cpu,cpuacct" mounted under its combined name
+        combined = [name for name in _listdir(root) if controller in name.split(",")]
+        if not combined:
+            return []
+        base = os.path.join(root, combined[0])
+    rel = paths.get(controller, "/").strip("/")
+    dirs = []
+    while True:
+        path = os.path.join(base, rel) if rel else base
+        if os.path.isdir(path):
+            dirs.append(path)
+        if not rel:
+            return dirs
+        rel = os.path.dirname(rel)
+
+def _listdir(path: str) -> List[str]:
+    try:
+        return os.listdir(path)
+    except OSError:
+        return []
+
+def cgroup_cpu_limit(root: str = CGROUP_ROOT, proc_cgroup: str = "/proc/self/cgroup") -> Optional[float]:
+    """CPUs allowed by the cgroup CFS quota (v1 or v2), or None without a quota."""
+    paths = _cgroup_paths(proc_cgroup)
+    limits = []
+    for path in _cgroup_dirs(root, "", paths):
+        value = _read(os.path.join(path, "cpu.max"))
+        if value:
+            quota, _, period = value.partition(" ")
+            if quota != "max":
+                limits.append(int(quota) / int(period or 100000))
+    for path in _cgroup_dirs(root, "cpu", paths):
+        quota = _read(os.path.join(path, "cpu.cfs_quota_us"))
+        period = _read(os.path.join(path, "cpu.cfs_period_us"))
+        if quota and period and int(quota) > 0:
+            limits.append(int(quota) / int(period))
+    return min(limits) if limits else None
+
+def cgroup_memory_limit(root: str = CGROUP_ROOT, proc_cgroup: str = "/proc/self/cgroup") -> Optional[int]:
+    """Memory limit in bytes of the cgroup (v1 or v2), or None without one."""
+    paths = _cgroup_paths(proc_cgroup)
+    limits = []
+    for path in _cgroup_dirs(root, "", paths):
+        value = _read(os.path.join(path, "memory.max"))
+        if value and value != "max":
+            limits.append(int(value))
+    for path in _cgroup_dirs(root, "memory", paths):
+        value = _read(os.path.join(path, "memory.limit_in_bytes"))
+        if value and int(value) < _V1_UNLIMITED:
+            limits.append(int(value))
+    return min(limits) if limits else None
+
+def available_cpus() -> int:
+    """CPUs this process may actually use: its affinity mask, capped by the cgroup quota.
+
+    os.cpu_count() and nproc report the host's CPUs inside containers.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    quota = cgroup_cpu_limit()
+    if quota is not None:
+        cpus = min(cpus, int(quota))
+    return max(1, cpus)
+
+def memory_limit_bytes() -> Optional[int]:
+    """The smaller of physical memory and the cgroup memory limit."""
+    limits = []
+    try:
+        limits.append(os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE"))
+    except (AttributeError, ValueError, OSError):
+        pass
+    cgroup_limit = cgroup_memory_limit()
+    if cgroup_limit is not None:
+        limits.append(cgroup_limit)
+    return min(limits) if limits else None
+
+@dataclass
+class WorkerSizing:
+    workers: int
+    cpus: int
+    memory_limit: Optional[int]
+    worker_bytes: int
+    # The memory limit, not the CPUs, set the worker count
+    memory_bound: bool = False
+
+    def describe(self) -> str:
+        text = f"{self.cpus} usable CPUs"
+        if self.memory_limit is not None:
+            text += (f", {self.memory_limit / 2**30:.1f} GB memory at ~{self.worker_bytes / 2**20:.0f} MB per worker"
+                     + (" (memory-bound)" if self.memory_bound else ""))
+        return text
+
+def size_workers(worker_bytes: int, reserve_bytes: int, cpus: Optional[int] = None,
+                 memory_limit: Optional[int] = None, max_workers: Optional[int] = None) -> WorkerSizing:
+    """Default worker count: one per usable CPU, as long as the workers fit in memory.
+
+    worker_bytes is the expected peak RSS of one worker and reserve_bytes what
+    the parent needs; cpus and memory_limit default to what the container allows.
+    max_workers overrides the CPU count (e.g. to oversubscribe I/O-bound runs).
+    """
+    cpus = cpus if cpus is not None else available_cpus()
+    memory_limit = memory_limit if memory_limit is not None else memory_limit_bytes()
+    workers = max_workers if max_workers is not None else cpus
+    memory_bound = False
+    if memory_limit is not None and worker_bytes > 0:
+        fit = (memory_limit - reserve_bytes) // worker_bytes
+        memory_bound = fit < workers
+        workers = min(workers, fit)
+    return WorkerSizing(max(1, int(workers)), cpus, memory_limit, worker_bytes, memory_bound)
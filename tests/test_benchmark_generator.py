@@ -0,0 +1,45 @@
+import unittest
+import os
+import tempfile
+import shutil
+from benchmarks.generator import MonorepoConfig, generate_monorepo
+
+def read_tree(root):
+    tree = {}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            with open(path, 'rb') as f:
+                tree[os.path.relpath(path, root)] = f.read()
+    return tree
+
+class TestMonorepoGenerator(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_generation_is_deterministic(self):
+        config = MonorepoConfig(files=40, modules=4, seed=7)
+        first = os.path.join(self.tmp_dir, "a")
+        second = os.path.join(self.tmp_dir, "b")
+        generate_monorepo(first, config)
+        generate_monorepo(second, config)
+
+        self.assertEqual(read_tree(first), read_tree(second))
+
+    def test_layout(self):
+        summary = generate_monorepo(self.tmp_dir, MonorepoConfig(files=30, modules=4, build_system="mixed"))
+        tree = read_tree(self.tmp_dir)
+
+        java_files = [p for p in tree if p.endswith(".java")]
+        self.assertEqual(len(java_files), 30)
+        self.assertEqual(summary["maven_modules"], 2)
+        self.assertEqual(summary["bazel_modules"], 2)
+        self.assertIn("pom.xml", tree)
+        self.assertEqual(len([p for p in tree if os.path.basename(p) == "pom.xml"]), 3)
+        self.assertEqual(len([p for p in tree if os.path.basename(p) == "BUILD"]), 2)
+
+if __name__ == '__main__':
+    unittest.main()
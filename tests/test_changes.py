@@ -0,0 +1,77 @@
+import unittest
+import os
+import json
+import tempfile
+import shutil
+from src.core.changes import content_hash, ContentHasher, chunk_hashes, tag_changes, ChangeFeed, track_changes
+from src.core.interfaces import Chunk
+
+def _class_chunk(methods):
+    path = "src/A.java"
+    children = [Chunk(id=f"{path}::A::{name}", file_path=path, language="java", kind="method",
+                      code=code, content_hash=content_hash(code)) for name, code in methods]
+    return Chunk(id=f"{path}::A", file_path=path, language="java", kind="class", code="class A {}",
+                 content_hash=content_hash("class A {}"), children=children)
+
+class TestChanges(unittest.TestCase):
+    def test_content_hash_ignores_whitespace(self):
+        self.assertEqual(content_hash("int f() {\n    return 1;\n}"), content_hash("int f() { return 1; }"))
+        self.assertNotEqual(content_hash("int f() { return 1; }"), content_hash("int f() { return 2; }"))
+
+    def test_content_hash_keeps_python_indentation(self):
+        inside = "def f(x):\n        if x:\n            x += 1\n            return x\n"
+        dedented = "def f(x):\n        if x:\n            x += 1\n        return x\n"
+        self.assertNotEqual(content_hash(inside, keep_indent=True), content_hash(dedented, keep_indent=True))
+        self.assertEqual(content_hash(inside), content_hash(dedented))
+        # Moving the whole method (a class nesting level) or adding blank lines is not a change
+        moved = "def f(x):\n    if x:\n\n        x  += 1\n        return x"
+        self.assertEqual(content_hash(inside, keep_indent=True), content_hash(moved, keep_indent=True))
+
+    def test_content_hasher_matches_content_hash(self):
+        code = "  int f() {\n    return  1;\n}\n  "
+        for size in range(1, len(code) + 1):
+            hasher = ContentHasher()
+            for i in range(0, len(code), size):
+                hasher.update(code[i:i + size])
+            self.assertEqual(hasher.hexdigest(), content_hash(code), size)
+
+    def test_tag_changes(self):
+        previous = _class_chunk([("a()", "void a() {}"), ("b()", "void b() {}"), ("c()", "void c() {}")])
+        current = _class_chunk([("a()", "void a() {}"), ("b()", "void b() { x(); }"), ("d()", "void d() {}")])
+
+        hashes = chunk_hashes(json.loads(json.dumps({"id": previous.id, "content_hash": previous.content_hash,
+                                                     "children": [{"id": c.id, "content_hash": c.content_hash}
+                                                                  for c in previous.children]})))
+        removed = tag_changes([current], hashes)
+
+        self.assertEqual(current.change, "unchanged")
+        self.assertEqual([c.change for c in current.children], ["unchanged", "modified", "added"])
+        self.assertEqual(removed, ["src/A.java::A::c()"])
+
+    def test_first_run_adds_everything(self):
+        current = _class_chunk([("a()", "void a() {}")])
+        self.assertEqual(tag_changes([current], None), [])
+        self.assertEqual([current.change, current.children[0].change], ["added", "added"])
+
+    def test_feed_only_lists_deltas(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            feed = ChangeFeed(os.path.join(tmp_dir, ".code-graph", "changes.ndjson"))
+            current = _class_chunk([("a()", "void a() {}"), ("b()", "void b() { x(); }")])
+            previous = {current.id: current.content_hash, current.children[0].id: current.children[0].content_hash,
+                        "src/A.java::A::c()": "00"}
+            removed = tag_changes([current], previous)
+            results = list(track_changes(iter([("src/A.java", [current], {"removed_chunks": removed})]), feed))
+            feed.close()
+
+            self.assertNotIn("removed_chunks", results[0][2])
+            with open(feed.path, encoding='utf-8') as f:
+                lines = [json.loads(line) for line in f]
+            self.assertEqual([(l["change"], l["id"]) for l in lines],
+                             [("added", "src/A.java::A::b()"), ("removed", "src/A.java::A::c()")])
+            self.assertEqual(feed.counts, {"added": 1, "modified": 0, "unchanged": 2, "removed": 1})
+        finally:
+            shutil.rmtree(tmp_dir)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -13,7 +13,8 @@ class TestStandardChunker(unittest.TestCase):
             code="...",
             start_point=(3, 4),
             end_point=(5, 5),
-            used_imports=[]
+            used_imports=[],
+            parameter_types=["String[]"]
         )
 
         cls = ClassNode(
@@ -46,7 +47,57 @@ class TestStandardChunker(unittest.TestCase):
         self.assertEqual(len(chunk.children), 1)
         child = chunk.children[0]
         self.assertEqual(child.kind, "method")
-        self.assertTrue(child.id.endswith("::main"))
+        self.assertEqual(child.id, "src/Test.java::Test::main(String[])")
+
+    def test_overloads_get_distinct_ids(self):
+        def method(name, params, code):
+            return MethodNode(name=name, signature="", code=code, start_point=(0, 0), end_point=(0, 0),
+                              used_imports=[], parameter_types=params)
+
+        cls = ClassNode(name="A", code="class A {}", start_point=(0, 0), end_point=(9, 0), methods=[
+            method("put", ["String", "Map<String, List<Integer>>"], "void put(String k, Map<String, List<Integer>> v) {}"),
+            method("put", ["String"], "void put(String k) {}"),
+        ])
+        chunks = StandardChunker().chunk(ParsedResult(code="", imports=[], classes=[cls]), [], "src/A.java")
+        self.assertEqual([c.id for c in chunks[0].children],
+                         ["src/A.java::A::put(String,Map<String,List<Integer>>)", "src/A.java::A::put(String)"])
+
+        # Languages without overloading keep plain names; clashes are numbered
+        cls.methods = [method("x", [], "def x(self): ..."), method("x", [""], "def x(self, v): ...")]
+        chunks = StandardChunker().chunk(ParsedResult(code="", imports=[], classes=[cls]), [], "src/a.py")
+        self.assertEqual([c.id for c in chunks[0].children], ["src/a.py::A::x", "src/a.py::A::x#2"])
+
+    def test_several_types_and_functions(self):
+        def node(name, start):
+            return MethodNode(name=name, signature=f"func {name}()", code=f"func {name}() {{}}", start_point=(start, 0),
+                              end_point=(start, 9), start_byte=start * 10)
+
+        server = ClassNode(name="Server", code="type Server struct{}", start_point=(2, 0), end_point=(2, 20),
+                           start_byte=20, package="srv", methods=[node("Run", 3)])
+        handler = ClassNode(name="Handler", code="type Handler interface{}", start_point=(6, 0), end_point=(6, 24),
+                            start_byte=60, package="srv")
+        parsed = ParsedResult(code="package srv ...", imports=["fmt"], classes=[server, handler],
+                              functions=[node("New", 5), node("main", 8)])
+        chunks = StandardChunker().chunk(parsed, [], "srv/server.go", metadata={"source_checksum": "x"})
+
+        # One chunk per file: the file, holding its types and functions in source order
+        self.assertEqual(len(chunks), 1)
+        file_chunk = chunks[0]
+        self.assertEqual((file_chunk.id, file_chunk.kind, file_chunk.code), ("srv/server.go", "file", "package srv ..."))
+        self.assertEqual(file_chunk.metadata, {"source_checksum": "x"})
+        self.assertEqual([(c.id, c.kind) for c in file_chunk.children],
+                         [("srv/server.go::Server", "class"), ("srv/server.go::New", "function"),
+                          ("srv/server.go::Handler", "class"), ("srv/server.go::main", "function")])
+        self.assertTrue(all(c.parent_id == "srv/server.go" for c in file_chunk.children))
+        server_chunk = file_chunk.children[0]
+        self.assertIsNone(server_chunk.metadata)
+        self.assertEqual((server_chunk.package, server_chunk.imports), ("srv", ["fmt"]))
+        self.assertEqual([c.id for c in server_chunk.children], ["srv/server.go::Server::Run"])
+
+        # Functions alone still get a file chunk, now with children
+        parsed = ParsedResult(code="...", imports=[], functions=[node("main", 1)])
+        chunks = StandardChunker().chunk(parsed, [], "main.go")
+        self.assertEqual([(c.kind, [child.id for child in c.children]) for c in chunks], [("file", ["main.go::main"])])
 
 if __name__ == '__main__':
     unittest.main()
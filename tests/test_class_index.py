@@ -0,0 +1,84 @@
+import unittest
+import os
+import tempfile
+import zipfile
+from src.core.dependencies.class_index import (ClassIndex, INDEX_NAME, artifact_of_jar, import_artifacts,
+                                               update_class_index)
+from src.core.interfaces import Dependency
+
+def _write_jar(repo, group, artifact, version, classes, classifier=""):
+    jar_dir = os.path.join(repo, *group.split('.'), artifact, version)
+    os.makedirs(jar_dir, exist_ok=True)
+    path = os.path.join(jar_dir, f"{artifact}-{version}{classifier}.jar")
+    with zipfile.ZipFile(path, 'w') as jar:
+        jar.writestr("META-INF/MANIFEST.MF", b"")
+        for name in classes:
+            jar.writestr(name.replace('.', '/') + ".class", b"")
+    return path
+
+class TestClassIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo = os.path.join(self.tmp.name, "repository")
+        self.index_dir = os.path.join(self.tmp.name, "index")
+        _write_jar(self.repo, "com.google.guava", "guava", "31.1",
+                   ["com.google.common.collect.ImmutableList", "com.google.common.collect.ImmutableList$Builder",
+                    "com.google.common.base.Strings"])
+        _write_jar(self.repo, "com.google.guava", "guava", "31.1", ["x.Y"], classifier="-sources")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _index(self):
+        return ClassIndex(os.path.join(self.index_dir, INDEX_NAME))
+
+    def test_artifact_of_jar(self):
+        path = os.path.join(self.repo, "org", "slf4j", "slf4j-api", "2.0.9", "slf4j-api-2.0.9.jar")
+        self.assertEqual(artifact_of_jar(self.repo, path), ("org.slf4j:slf4j-api", "2.0.9"))
+        self.assertIsNone(artifact_of_jar(self.repo, path.replace(".jar", "-tests.jar")))
+
+    def test_lookups(self):
+        counts = update_class_index(self.repo, self.index_dir)
+        self.assertEqual((counts["jars"], counts["added"]), (1, 1))
+        index = self._index()
+        try:
+            for imp in ("com.google.common.collect.ImmutableList", "com.google.common.collect.*",
+                        "com.google.common.collect.ImmutableList.Builder", "static com.google.common.base.Strings.isNullOrEmpty"):
+                self.assertEqual(index.artifact_for_import(imp), "com.google.guava:guava", imp)
+            self.assertIsNone(index.artifact_for_import("java.util.List"))
+            self.assertIsNone(index.artifact_for_import("x.Y"))
+
+            deps = [Dependency(name="com.google.guava:guava", version="31.1", type="maven")]
+            self.assertEqual(import_artifacts(["com.google.common.base.Strings", "java.util.List"], index, deps),
+                             {"com.google.common.base.Strings": "com.google.guava:guava:31.1"})
+        finally:
+            index.close()
+
+    def test_incremental_updates(self):
+        update_class_index(self.repo, self.index_dir)
+        counts = update_class_index(self.repo, self.index_dir)
+        self.assertEqual((counts["added"], counts["updated"], counts["removed"]), (0, 0, 0))
+
+        path = _write_jar(self.repo, "org.slf4j", "slf4j-api", "2.0.9", ["org.slf4j.Logger"])
+        counts = update_class_index(self.repo, self.index_dir)
+        self.assertEqual(counts["added"], 1)
+        index = self._index()
+        self.assertEqual(index.lookup("org.slf4j.Logger"), "org.slf4j:slf4j-api")
+        index.close()
+
+        _write_jar(self.repo, "org.slf4j", "slf4j-api", "2.0.9", ["org.slf4j.LoggerFactory"])
+        os.utime(path, ns=(1, 1))
+        self.assertEqual(update_class_index(self.repo, self.index_dir)["updated"], 1)
+        index = self._index()
+        self.assertIsNone(index.lookup("org.slf4j.Logger"))
+        self.assertEqual(index.lookup("org.slf4j.LoggerFactory"), "org.slf4j:slf4j-api")
+        index.close()
+
+        os.remove(path)
+        self.assertEqual(update_class_index(self.repo, self.index_dir)["removed"], 1)
+        index = self._index()
+        self.assertIsNone(index.lookup("org.slf4j.*"))
+        index.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+from src.core.interfaces import Chunk
+
+try:
+    import numpy as np
+    from src.core.dedup import MinHasher, DuplicateIndex, method_signatures, dedup_results, _BandTable
+except ImportError:
+    np = None
+
+METHOD = """public int total(List<Order> orders) {
+    int sum = 0;
+    for (Order order : orders) {
+        if (order.isPaid() && !order.isRefunded()) {
+            sum += order.getAmount() * order.getQuantity();
+        }
+    }
+    return sum;
+}"""
+
+RENAMED = METHOD.replace("total", "sumPaid")
+
+OTHER = """public void register(Listener listener) {
+    synchronized (lock) {
+        listeners.add(listener);
+        log.info("registered {}", listener);
+    }
+}"""
+
+def _file_chunk(path, methods):
+    children = [Chunk(id=f"{path}::A::{name}", kind="method", code=code, file_path=path, language="java", metadata={})
+                for name, code in methods]
+    return Chunk(id=f"{path}::A", kind="class", code="", file_path=path, language="java", children=children)
+
+@unittest.skipUnless(np is not None, "numpy not installed")
+class TestDedup(unittest.TestCase):
+    def setUp(self):
+        self.hasher = MinHasher()
+
+    def similarity(self, a, b):
+        return float((self.hasher.signature(a) == self.hasher.signature(b)).mean())
+
+    def test_signature_similarity(self):
+        self.assertEqual(self.similarity(METHOD, METHOD), 1.0)
+        self.assertGreater(self.similarity(METHOD, RENAMED), 0.8)
+        self.assertLess(self.similarity(METHOD, OTHER), 0.3)
+        self.assertIsNone(self.hasher.signature("   "))
+
+    def test_marks_duplicates(self):
+        index = DuplicateIndex()
+        first = [_file_chunk("a/A.java", [("total", METHOD), ("register", OTHER)])]
+        second = [_file_chunk("b/A.java", [("sumPaid", RENAMED)])]
+        index.apply(first, method_signatures(first, self.hasher))
+        index.apply(second, method_signatures(second, self.hasher))
+
+        self.assertEqual([c.metadata["dedup"] for c in first[0].children], ["canonical", "canonical"])
+        duplicate = second[0].children[0].metadata
+        self.assertEqual(duplicate["dedup"], "duplicate")
+        self.assertEqual(duplicate["duplicate_of"], "a/A.java::A::total")
+        self.assertEqual((index.methods, index.duplicates), (3, 1))
+
+    def test_suppress_drops_duplicates(self):
+        index = DuplicateIndex()
+        results = [
+            ("a/A.java", [_file_chunk("a/A.java", [("total", METHOD)])], {}),
+            ("b/A.java", [_file_chunk("b/A.java", [("total", METHOD), ("register", OTHER)])], {}),
+        ]
+        for _, chunks, stats in results:
+            stats["minhash"] = method_signatures(chunks, self.hasher)
+
+        out = list(dedup_results(iter(results), index, suppress=True))
+        self.assertEqual([c.id for c in out[1][1][0].children], ["b/A.java::A::register"])
+        self.assertNotIn("minhash", out[1][2])
+
+    def test_band_table_grows(self):
+        table = _BandTable(capacity=8)
+        for key in range(1, 1001):
+            table.setdefault(key * 7919, key)
+        table.setdefault(7919, -1)
+        self.assertEqual(table.size, 1000)
+        self.assertEqual(table.get(7919), 1)
+        self.assertEqual(table.get(500 * 7919), 500)
+        self.assertIsNone(table.get(3))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import threading
+from unittest import mock
+from src.core.executors import choose_executor, create_pool, Autoscaler, InlinePool, INLINE_MAX_FILES
+from src.core.pool import bounded_imap
+
+_state = threading.local()
+
+def _init(tag):
+    _state.tag = tag
+    _state.thread = threading.get_ident()
+
+def _work(x):
+    # Fails if the initializer didn't run in this thread
+    return (_state.tag, _state.thread == threading.get_ident(), x * x)
+
+class TestExecutors(unittest.TestCase):
+    def test_auto_selection(self):
+        self.assertEqual(choose_executor("process", 1, 8), "process")
+        self.assertEqual(choose_executor("auto", INLINE_MAX_FILES, 8), "inline")
+        self.assertEqual(choose_executor("auto", 10_000, 1), "inline")
+        with mock.patch("src.core.executors.gil_disabled", return_value=False):
+            self.assertEqual(choose_executor("auto", 10_000, 8), "process")
+        with mock.patch("src.core.executors.gil_disabled", return_value=True):
+            self.assertEqual(choose_executor("auto", 10_000, 8), "thread")
+
+    def test_thread_and_inline_pools(self):
+        for kind in ("thread", "inline"):
+            with create_pool(kind, 3, _init, ("ok",)) as pool:
+                results = list(bounded_imap(pool, _work, range(20), max_in_flight=4, chunksize=2, ordered=True))
+                pool.close()
+                pool.join()
+            self.assertEqual(results, [("ok", True, x * x) for x in range(20)])
+
+    def test_inline_errors(self):
+        def fail(x):
+            raise ValueError(x)
+        with InlinePool() as pool:
+            with self.assertRaises(ValueError):
+                list(bounded_imap(pool, fail, range(3), max_in_flight=2))
+
+    def test_unknown_executor(self):
+        with self.assertRaises(ValueError):
+            create_pool("fiber", 2, _init, ("x",))
+
+    def test_autoscaler(self):
+        scaler = Autoscaler(cpus=4, max_workers=8, chunksize=2)
+        self.assertEqual(scaler.max_in_flight(), 8)
+
+        # Tasks waiting on I/O three quarters of the time: use the whole pool
+        io_bound = [("f", [], {"timings_ms": {"total": 100.0}, "cpu_ms": 25.0})] * 50
+        self.assertEqual(len(list(scaler.observe(iter(io_bound)))), 50)
+        self.assertEqual(scaler.active, 8)
+        self.assertEqual(scaler.max_in_flight(), 16)
+
+        cpu_bound = [("f", [], {"timings_ms": {"total": 100.0}, "cpu_ms": 100.0})] * 50
+        list(scaler.observe(iter(cpu_bound)))
+        self.assertEqual(scaler.active, 4)
+        self.assertEqual((scaler.min_active, scaler.max_active), (4, 8))
+
+if __name__ == '__main__':
+    unittest.main()
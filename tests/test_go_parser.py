@@ -0,0 +1,71 @@
+import unittest
+from src.core.languages import is_available
+
+@unittest.skipUnless(is_available("go"), "tree-sitter-go is not installed")
+class TestGoParser(unittest.TestCase):
+    def test_parse_simple_go(self):
+        from src.core.languages.go_parser import GoParser
+        parser = GoParser()
+        code = b"""
+package server
+
+import (
+    "fmt"
+    str "strings"
+)
+
+type Server struct {
+    Name string
+}
+
+type Handler interface {
+    Serve(x int) error
+}
+
+func (s *Server) Run(a, b int, names ...string) error {
+    fmt.Println(a + b)
+    return nil
+}
+
+func New() *Server { return &Server{} }
+"""
+        result = parser.parse(code, "server.go")
+
+        self.assertEqual(result.imports, ["fmt", "strings"])
+        self.assertEqual([c.name for c in result.classes], ["Server", "Handler"])
+
+        server = result.classes[0]
+        self.assertEqual(server.package, "server")
+        self.assertTrue(server.code.startswith("type Server struct"))
+        # Methods attach to their receiver type; plain functions don't belong to a type
+        self.assertEqual([m.name for m in server.methods], ["Run"])
+        run = server.methods[0]
+        self.assertEqual(run.signature, "func (s *Server) Run(a, b int, names ...string) error")
+        self.assertEqual(run.parameter_types, ["int", "int", "...string"])
+        self.assertEqual(run.used_imports, ["fmt"])
+        self.assertEqual([f.name for f in result.functions], ["New"])
+        self.assertEqual(result.functions[0].signature, "func New() *Server")
+        self.assertFalse(result.top_level_code)
+
+    def test_methods_of_types_in_other_files(self):
+        from src.core.chunker import StandardChunker
+        from src.core.languages.go_parser import GoParser
+        code = b"""package server
+
+const timeout = 5
+
+func (s *Server) Handle(r *Request) error { return nil }
+
+func (h handler) Handle() {}
+"""
+        result = GoParser().parse(code, "handle.go")
+        self.assertEqual(result.classes, [])
+        self.assertEqual([f.name for f in result.functions], ["Server.Handle", "handler.Handle"])
+        self.assertTrue(result.top_level_code)
+        chunks = StandardChunker().chunk(result, [], "handle.go")
+        self.assertEqual([(c.kind, [(child.kind, child.id) for child in c.children]) for c in chunks],
+                         [("file", [("function", "handle.go::Server.Handle"), ("function", "handle.go::handler.Handle")])])
+        self.assertIn("const timeout = 5", chunks[0].code)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+import os
+import tempfile
+import shutil
+from src.core.graph import GraphIndex
+from src.core.interfaces import Chunk, Dependency, CallSite
+
+def method_chunk(class_id, name, parameter_types=None, calls=None):
+    return Chunk(
+        id=f"{class_id}::{name}",
+        file_path=class_id.split("::")[0],
+        language="java",
+        kind="method",
+        code="",
+        name=name,
+        parameter_types=parameter_types or [],
+        calls=calls or [],
+        parent_id=class_id
+    )
+
+def class_chunk(file_path, name, package, imports=None, extends=None, implements=None, dependencies=None, methods=None):
+    return Chunk(
+        id=f"{file_path}::{name}",
+        file_path=file_path,
+        language="java",
+        kind="class",
+        code="",
+        name=name,
+        package=package,
+        extends=extends,
+        implements=implements or [],
+        imports=imports or [],
+        dependencies=dependencies or [],
+        children=methods or []
+    )
+
+class TestGraphIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.graph = GraphIndex(os.path.join(self.tmp_dir, "graph.sqlite"))
+
+    def tearDown(self):
+        self.graph.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_resolves_internal_and_external_references(self):
+        commons = Dependency(name="org.apache.commons:commons-lang3", version="3.12.0", type="maven")
+        self.graph.write([class_chunk(
+            "src/app/Service.java", "Service", "com.example.app",
+            imports=["com.example.core.Base", "org.apache.commons.lang3.StringUtils"],
+            extends="Base<String>",
+            implements=["Runnable"],
+            dependencies=[commons]
+        )], "out")
+        self.graph.write([class_chunk("src/core/Base.java", "Base", "com.example.core")], "out")
+
+        self.assertEqual(self.graph.lookup("com.example.core.Base"), ["src/core/Base.java::Base"])
+
+        edges = {(e.kind, e.dst): e for e in self.graph.neighbors("src/app/Service.java::Service")}
+        # Base was indexed after Service and must still resolve
+        self.assertFalse(edges[("extends", "src/core/Base.java::Base")].external)
+        self.assertFalse(edges[("imports", "src/core/Base.java::Base")].external)
+
+        external = edges[("imports", "org.apache.commons.lang3.StringUtils")]
+        self.assertTrue(external.external)
+        self.assertEqual(external.artifact, "org.apache.commons:commons-lang3:3.12.0")
+        self.assertTrue(edges[("implements", "Runnable")].external)
+
+        dependents = {e.src for e in self.graph.dependents("src/core/Base.java::Base", kind="extends")}
+        self.assertEqual(dependents, {"src/app/Service.java::Service"})
+
+    def test_incremental_update_and_removal(self):
+        self.graph.write([class_chunk("src/a/A.java", "A", "p", extends="B")], "out")
+        self.graph.write([class_chunk("src/b/B.java", "B", "p")], "out")
+        self.assertEqual([e.dst for e in self.graph.neighbors("src/a/A.java::A")], ["src/b/B.java::B"])
+
+        # B moves to another file: A's edge follows it
+        self.graph.remove_file("src/b/B.java")
+        self.graph.write([class_chunk("src/b2/B.java", "B", "p")], "out")
+        self.assertEqual([e.dst for e in self.graph.neighbors("src/a/A.java::A")], ["src/b2/B.java::B"])
+
+        # Reprocessing A replaces its outgoing edges
+        self.graph.write([class_chunk("src/a/A.java", "A", "p")], "out")
+        self.assertEqual(self.graph.neighbors("src/a/A.java::A"), [])
+        self.assertEqual(self.graph.dependents("src/b2/B.java::B"), [])
+
+    def test_retain_drops_deleted_files(self):
+        self.graph.write([class_chunk("src/a/A.java", "A", "p", extends="B")], "out")
+        self.graph.write([class_chunk("src/b/B.java", "B", "p")], "out")
+        self.graph.retain(["src/a/A.java"])
+        self.assertEqual(self.graph.lookup("p.B"), [])
+        edges = self.graph.neighbors("src/a/A.java::A")
+        self.assertEqual([(e.dst, e.external) for e in edges], [("B", True)])
+
+    def test_call_edges(self):
+        caller_id = "src/a/A.java::A"
+        self.graph.write([class_chunk("src/a/A.java", "A", "p", imports=["q.Util"], extends="Base", methods=[
+            method_chunk(caller_id, "run", calls=[
+                CallSite(name="helper", receiver="this", arg_count=1),
+                CallSite(name="inherited", receiver="this"),
+                CallSite(name="format", receiver="Util", arg_count=1),
+                CallSite(name="<init>", receiver="Util", kind="new"),
+                CallSite(name="add", receiver=None),
+            ]),
+            method_chunk(caller_id, "helper", parameter_types=["int"]),
+            method_chunk(caller_id, "helper", parameter_types=[]),
+        ])], "out")
+        self.graph.write([class_chunk("src/b/Base.java", "Base", "p", methods=[
+            method_chunk("src/b/Base.java::Base", "inherited")
+        ])], "out")
+
+        edges = {(e.kind, e.dst, e.external) for e in self.graph.neighbors("src/a/A.java::A::run")}
+        self.assertEqual(edges, {
+            ("calls", "src/a/A.java::A::helper", False),
+            ("calls", "src/b/Base.java::Base::inherited", False),
+            ("calls", "q.Util#format", True),
+            ("instantiates", "q.Util", True),
+        })
+        # Only the overload with a matching parameter count is linked
+        self.assertEqual(len([e for e in self.graph.neighbors("src/a/A.java::A::run") if e.dst.endswith("::helper")]), 1)
+
+        # Replacing Base re-resolves the inherited call without touching A
+        self.graph.write([class_chunk("src/b/Base.java", "Base", "p")], "out")
+        self.assertIn(("calls", "Base#inherited", True),
+                      {(e.kind, e.dst, e.external) for e in self.graph.neighbors("src/a/A.java::A::run")})
+
+    def test_merge_from(self):
+        other = GraphIndex(os.path.join(self.tmp_dir, "other.sqlite"))
+        # The caller and callee end up in different shards
+        other.write([class_chunk("b/Service.java", "Service", "b",
+                                 methods=[method_chunk("b/Service.java::Service", "run", ["int"])])], "")
+        other.close()
+        self.graph.write([class_chunk("a/App.java", "App", "a", imports=["b.Service"],
+                                      methods=[method_chunk("a/App.java::App", "main",
+                                                            calls=[CallSite("run", "Service", 1)])])], "")
+        self.assertTrue(self.graph.neighbors("a/App.java::App")[0].external)
+
+        self.graph.merge_from(os.path.join(self.tmp_dir, "other.sqlite"))
+        self.graph.merge_from(os.path.join(self.tmp_dir, "other.sqlite"))
+
+        self.assertEqual(self.graph.lookup("b.Service"), ["b/Service.java::Service"])
+        imports = self.graph.neighbors("a/App.java::App", kind="imports")
+        self.assertEqual([(e.dst, e.external) for e in imports], [("b/Service.java::Service", False)])
+        calls = self.graph.neighbors("a/App.java::App::main", kind="calls")
+        self.assertEqual([e.dst for e in calls], ["b/Service.java::Service::run"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,50 @@
 import unittest
+import io
+import os
+import tempfile
 from src.core.languages.java_parser import JavaParser
+from src.core.languages.java_scanner import scan_members
+from src.core.streaming import SourceFile
+
+STREAMED = b"""package com.example;
+
+import java.util.List;
+
+/** Braces in comments { and "strings" are skipped */
+@SuppressWarnings({"unchecked"})
+public class Big extends Base implements Runnable {
+    private static final String S = "}{ ;";
+    private final char c = '}';
+    private List<String> names;
+    private Runnable r = new Runnable() {
+        public void run() { }
+    };
+    private int[] values = {1, 2};
+    static { System.out.println("init"); }
+
+    @Override
+    public void run() {
+        names.forEach(n -> { System.out.println(n); });
+        names.add(S);
+    }
+
+    String text = \"\"\"
+        } text block {
+        \"\"\";
+
+    abstract static class Inner { void skipped() { } }
+
+    public <T> T first(List<T> items, int... rest) { return items.get(0); }
+}
+"""
 
 class TestJavaParser(unittest.TestCase):
+    def test_non_ascii_source(self):
+        source = "// Grüße, 日本語\npublic class Uni {\n    String größe() { return \"ü\"; }\n}\n"
+        parsed = JavaParser().parse(source.encode('utf-8'), "Uni.java")
+        self.assertEqual(parsed.classes[0].methods[0].code, 'String größe() { return "ü"; }')
+        self.assertEqual(parsed.classes[0].methods[0].name, "größe")
+
     def test_parse_simple_java(self):
         parser = JavaParser()
         code = b"""
@@ -42,5 +85,96 @@ class TestJavaParser(unittest.TestCase):
         self.assertTrue(methods["toString"].is_override)
         self.assertIn("@Override", methods["toString"].annotations[0])
 
+    def test_call_sites(self):
+        parser = JavaParser()
+        code = b"""
+        package com.example;
+        import java.util.List;
+
+        public class Test {
+            private List<String> names;
+
+            public void run(String name, int... counts) {
+                Helper helper = new Helper(name);
+                helper.apply(name, 1);
+                names.add(name);
+                validate();
+                Helper.create();
+                compute().chain();
+            }
+        }
+        """
+        method = parser.parse(code, "Test.java").classes[0].methods[0]
+
+        self.assertEqual(method.parameter_types, ["String", "int..."])
+        calls = [(c.kind, c.receiver, c.name, c.arg_count) for c in method.calls]
+        self.assertEqual(calls, [
+            ("new", "Helper", "<init>", 1),
+            ("call", "Helper", "apply", 2),
+            ("call", "List", "add", 1),
+            ("call", "this", "validate", 0),
+            ("call", "Helper", "create", 0),
+            ("call", None, "chain", 0),
+            ("call", "this", "compute", 0),
+        ])
+
+    def test_scan_members(self):
+        layout = scan_members(io.BytesIO(STREAMED))
+        members = [STREAMED[start:end].strip() for start, end in zip(layout.starts, layout.ends)]
+        self.assertEqual(len(members), 11)
+        self.assertTrue(members[0].startswith(b'private static final String S'))
+        self.assertTrue(members[4].endswith(b'};'))
+        self.assertEqual(list(layout.semicolon), [1, 1, 1, 1, 1, 0, 0, 1, 0, 0, 0])
+        self.assertEqual(layout.body_end, STREAMED.rindex(b"}") + 1)
+        self.assertEqual(layout.body_end_point, (STREAMED.count(b"\n", 0, layout.body_end), 1))
+        self.assertEqual(list(layout.batches(1)), [(i, i + 1) for i in range(11)])
+        self.assertEqual(list(layout.batches(1 << 20)), [(0, 11)])
+        self.assertFalse(layout.more_types)
+
+    def test_parse_stream_matches_parse(self):
+        parser = JavaParser()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "Big.java")
+            with open(path, 'wb') as f:
+                f.write(STREAMED)
+            expected = parser.parse(STREAMED, path)
+            with SourceFile(path) as source:
+                streamed = parser.parse_stream(source, path)
+                methods = list(streamed.methods)
+
+        cls = expected.classes[0]
+        self.assertEqual(streamed.imports, expected.imports)
+        self.assertEqual((streamed.main_class.name, streamed.main_class.extends, streamed.main_class.implements),
+                         (cls.name, cls.extends, cls.implements))
+        self.assertEqual(streamed.main_class.end_point, cls.end_point)
+        self.assertEqual(STREAMED[slice(*streamed.code_range)].decode(), cls.code)
+        # Same methods, with positions mapped back to the file and field types resolved
+        self.assertEqual(methods, cls.methods)
+        self.assertEqual([m.name for m in methods], ["run", "first"])
+        self.assertEqual(methods[0].calls[-1].receiver, "List")
+
+    def test_parse_stream_falls_back_for_other_types(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "I.java")
+            with open(path, 'wb') as f:
+                f.write(b"interface I { void f(); }")
+            with SourceFile(path) as source:
+                self.assertIsNone(JavaParser().parse_stream(source, path))
+
+    def test_several_top_level_classes(self):
+        code = b"public class A { class Inner {} void a() {} }\n// class C {\nclass B { void b() {} }\n"
+        parser = JavaParser()
+        self.assertEqual([c.name for c in parser.parse(code, "A.java").classes], ["A", "B"])
+        self.assertFalse(parser.parse(code, "A.java").top_level_code)
+        self.assertTrue(parser.parse(code + b"enum E { X }\n", "A.java").top_level_code)
+        self.assertTrue(scan_members(io.BytesIO(code)).more_types)
+        # Streaming only covers the first class, so the file goes through parse()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "A.java")
+            with open(path, 'wb') as f:
+                f.write(code)
+            with SourceFile(path) as source:
+                self.assertIsNone(parser.parse_stream(source, path))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+from src.core.languages import ParserRegistry, language_for, extensions_for, is_available
+
+class TestParserRegistry(unittest.TestCase):
+    def test_routing(self):
+        self.assertEqual(language_for("a/B.java"), "java")
+        self.assertEqual(language_for("a/b.PY"), "python")
+        self.assertEqual(language_for("a/b.go"), "go")
+        self.assertIsNone(language_for("a/b.rs"))
+        self.assertEqual(extensions_for(["java", "go"]), [".go", ".java"])
+
+    def test_parsers_load_lazily(self):
+        registry = ParserRegistry()
+        self.assertEqual(registry.loaded(), [])
+        self.assertIsNone(registry.get("README.md"))
+
+        parser = registry.get("src/A.java")
+        self.assertEqual(registry.loaded(), ["java"])
+        # One instance per process and language
+        self.assertIs(registry.get("src/B.java"), parser)
+
+    @unittest.skipUnless(is_available("python"), "tree-sitter-python is not installed")
+    def test_routes_to_language_parser(self):
+        registry = ParserRegistry()
+        result = registry.get("tool.py").parse(b"class Tool:\n    def run(self): pass\n", "tool.py")
+        self.assertEqual(result.classes[0].methods[0].name, "run")
+        self.assertEqual(registry.loaded(), ["python"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+from unittest import mock
+from src import main
+from src.core.graph import GraphIndex
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SOURCE = """package com.example;
+
+public class {name} {{
+    public int total(List<Order> orders) {{
+        int sum = 0;
+        for (Order order : orders) {{
+            if (order.isPaid() && !order.isRefunded()) {{
+                sum += order.getAmount() * order.getQuantity();
+            }}
+        }}
+        return sum;
+    }}
+
+    public void {other}(Listener listener) {{
+        listeners.add(listener);
+    }}
+}}
+"""
+
+sent = []
+
+def collect(batch):
+    sent.extend(batch)
+
+class TestMain(unittest.TestCase):
+    """End-to-end runs of the chunker, inline and with large-file streaming for every file."""
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source_dir = os.path.join(self.tmp.name, "src")
+        self.output_dir = os.path.join(self.tmp.name, "out")
+        os.makedirs(self.source_dir)
+        for name, other in (("A", "register"), ("B", "unregister")):
+            with open(os.path.join(self.source_dir, f"{name}.java"), 'w', encoding='utf-8') as f:
+                f.write(SOURCE.format(name=name, other=other))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _run(self, *options, output_dir=None):
+        self._main(self.source_dir, "-o", output_dir or self.output_dir, "--no-tui", "--executor", "inline",
+                   "--large-file-mb", "0.000001", *options)
+
+    def _main(self, *argv):
+        with mock.patch.object(sys, "argv", ["main.py", *argv]), contextlib.redirect_stdout(io.StringIO()):
+            main.main()
+
+    def _methods(self):
+        """Method names of every output file, by file name."""
+        methods = {}
+        for root, dirs, files in os.walk(self.output_dir):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for name in files:
+                with open(os.path.join(root, name), 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                methods[name] = sorted(child["name"] for child in data["children"])
+        return methods
+
+    @unittest.skipUnless(np is not None, "numpy not installed")
+    def test_dedup_suppresses_duplicates_of_large_files(self):
+        self._run("--dedup", "suppress")
+        # Files are deduplicated in path order, so A keeps its copy of total()
+        self.assertEqual(self._methods(), {"A.java.json": ["register", "total"], "B.java.json": ["unregister"]})
+
+    @unittest.skipUnless(np is not None, "numpy not installed")
+    def test_changing_dedup_options_redoes_cached_output(self):
+        self._run()
+        self._run("--dedup", "suppress")
+        self.assertEqual(self._methods(), {"A.java.json": ["register", "total"], "B.java.json": ["unregister"]})
+        self._run("--dedup", "mark", "--dedup-threshold", "0.99")
+        self.assertEqual(self._methods(), {"A.java.json": ["register", "total"],
+                                           "B.java.json": ["total", "unregister"]})
+
+    @unittest.skipUnless(np is not None, "numpy not installed")
+    def test_cached_output_is_added_to_new_indexes(self):
+        from src.core.search import SearchReader
+        self._run()
+        self._run("--graph", "--search-index")
+        artifacts = os.path.join(self.output_dir, main.ARTIFACT_DIR)
+        hits = SearchReader(os.path.join(artifacts, "search")).search("unregister")
+        self.assertEqual([hit.chunk_id.rsplit("::", 1)[-1] for hit in hits][:1], ["unregister(Listener)"])
+        graph = GraphIndex(os.path.join(artifacts, "graph.sqlite"))
+        try:
+            self.assertEqual(len(graph.lookup("com.example.A")), 1)
+        finally:
+            graph.close()
+
+    @unittest.skipUnless(np is not None, "numpy not installed")
+    def test_search_index_has_the_code_of_large_files(self):
+        from src.core.search import SearchReader
+        self._run("--search-index")
+        hits = SearchReader(os.path.join(self.output_dir, main.ARTIFACT_DIR, "search")).search("isRefunded")
+        self.assertEqual(sorted(hit.chunk_id.rsplit("::", 1)[-1] for hit in hits), ["total(List<Order>)"] * 2)
+
+    @unittest.skipUnless(np is not None, "numpy not installed")
+    def test_merge_combines_search_indexes_and_change_feeds(self):
+        from src.core.search import SearchReader
+        shard_dirs = [os.path.join(self.tmp.name, f"shard-{index}") for index in range(2)]
+        for index, shard_dir in enumerate(shard_dirs):
+            self._run("--search-index", "--shard", f"{index}/2", output_dir=shard_dir)
+        self._main("merge", *shard_dirs, "-o", self.output_dir)
+        artifacts = os.path.join(self.output_dir, main.ARTIFACT_DIR)
+        hits = SearchReader(os.path.join(artifacts, "search")).search("isRefunded")
+        self.assertEqual(sorted(os.path.basename(hit.chunk_id.split("::")[0]) for hit in hits), ["A.java", "B.java"])
+        with open(os.path.join(artifacts, "changes.ndjson"), 'r', encoding='utf-8') as f:
+            changed = {json.loads(line)["file_path"] for line in f}
+        self.assertEqual(len(changed), 2)
+
+    def test_sink_gets_the_code_of_large_files(self):
+        sent.clear()
+        self._run("--sink", "tests.test_main:collect")
+        methods = [child for chunk in sent for child in chunk.children]
+        self.assertEqual(len(methods), 4)
+        self.assertTrue(all(method.code for method in methods))
+
+if __name__ == '__main__':
+    unittest.main()
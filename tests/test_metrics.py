@@ -0,0 +1,119 @@
+import unittest
+import os
+import json
+import tempfile
+import shutil
+from src.core.metrics import RunMetrics, to_prometheus, merge_reports
+from src.core.interfaces import Chunk
+
+def stats(pid, status, total_ms, parse_ms=None, bytes_in=100):
+    timings = {"total": total_ms}
+    if parse_ms is not None:
+        timings["parse"] = parse_ms
+    return {"pid": pid, "status": status, "bytes_in": bytes_in, "timings_ms": timings, "cpu_ms": total_ms / 2}
+
+class TestRunMetrics(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def make_metrics(self):
+        metrics = RunMetrics(workers=2, top_n=2)
+        chunk = Chunk(id="A.java::A", file_path="A.java", language="java", kind="class", code="")
+        results = [
+            ("A.java", [chunk], stats(1, "processed", 30.0, parse_ms=20.0)),
+            ("B.java", [chunk], stats(2, "processed", 300.0, parse_ms=250.0)),
+            ("C.java", [chunk], dict(stats(1, "processed", 3.0, parse_ms=1.5), normalized_chars=(400, 300))),
+            ("D.java", [], stats(2, "cached", 0.5)),
+        ]
+        # track() must pass results through untouched
+        self.assertEqual(list(metrics.track(iter(results))), results)
+        metrics.finish(bytes_out=1234)
+        return metrics
+
+    def test_report(self):
+        report = self.make_metrics().report()
+
+        self.assertEqual(report["files"], 4)
+        self.assertEqual(report["status_counts"], {"processed": 3, "cached": 1})
+        self.assertAlmostEqual(report["cache_hit_ratio"], 0.25)
+        self.assertEqual(report["bytes_in"], 400)
+        self.assertEqual(report["bytes_out"], 1234)
+        self.assertEqual([f["file"] for f in report["slowest_files"]], ["B.java", "A.java"])
+
+        parse = report["stages"]["parse"]
+        self.assertEqual(parse["count"], 3)
+        # Percentiles are the upper bound of their bucket: 20 ms falls in (10, 25]
+        self.assertEqual(parse["p50_ms"], 25.0)
+        self.assertEqual(parse["p99_ms"], 250.0)
+        self.assertEqual(parse["p50_ms"], merge_reports([report])["stages"]["parse"]["p50_ms"])
+        self.assertEqual(parse["max_ms"], 250.0)
+        self.assertEqual(parse["buckets_ms"]["2"], 1)
+        self.assertEqual(parse["buckets_ms"]["25"], 1)
+        self.assertEqual(parse["buckets_ms"]["250"], 1)
+        self.assertEqual(set(report["workers"]), {"1", "2"})
+        self.assertAlmostEqual(report["worker_cpu_ratio"], 0.5)
+        self.assertEqual(report["normalization"], {"chars_in": 400, "chars_out": 300, "saved_ratio": 0.25})
+
+    def test_unchanged_files_count_as_hits(self):
+        metrics = self.make_metrics()
+        metrics.record_unchanged(4)
+        report = metrics.report()
+        self.assertEqual(report["status_counts"]["unchanged"], 4)
+        self.assertAlmostEqual(report["cache_hit_ratio"], 5 / 8)
+
+    def test_peak_rss(self):
+        metrics = RunMetrics(workers=2)
+        for pid, peak, recycled in [(1, 50 << 20, False), (1, 80 << 20, True), (2, 60 << 20, False)]:
+            result_stats = stats(pid, "processed", 1.0)
+            result_stats.update(peak_rss_bytes=peak, recycled=recycled)
+            metrics.record("A.java", [], result_stats)
+        metrics.finish()
+        report = metrics.report()
+
+        self.assertEqual(report["workers"]["1"]["peak_rss_mb"], 80)
+        self.assertEqual(report["peak_rss_mb"]["max_worker"], 80)
+        self.assertGreater(report["peak_rss_mb"]["parent"], 0)
+        self.assertEqual(report["recycled_workers"], 1)
+
+    def test_merge_reports(self):
+        first = self.make_metrics().report()
+        second = self.make_metrics().report()
+        merged = merge_reports([first, second], top_n=3)
+
+        self.assertEqual(merged["files"], 8)
+        self.assertEqual(merged["status_counts"], {"processed": 6, "cached": 2})
+        self.assertEqual(merged["bytes_out"], 2468)
+        self.assertEqual(merged["pool_size"], 4)
+        self.assertEqual(merged["normalization"]["chars_in"], 800)
+        self.assertEqual(set(merged["workers"]), {"0:1", "0:2", "1:1", "1:2"})
+        self.assertEqual([f["file"] for f in merged["slowest_files"]], ["B.java", "B.java", "A.java"])
+
+        parse = merged["stages"]["parse"]
+        self.assertEqual(parse["count"], 6)
+        self.assertEqual(parse["buckets_ms"]["250"], 2)
+        # Estimated from buckets: the median falls in the (10, 25] bucket
+        self.assertEqual(parse["p50_ms"], 25.0)
+        self.assertEqual(parse["p99_ms"], 250.0)
+
+    def test_exports(self):
+        metrics = self.make_metrics()
+        json_path = os.path.join(self.tmp_dir, "metrics.json")
+        prom_path = os.path.join(self.tmp_dir, "metrics.prom")
+        metrics.write_json(json_path)
+        metrics.write_prometheus(prom_path)
+
+        with open(json_path) as f:
+            self.assertEqual(json.load(f)["files"], 4)
+
+        with open(prom_path) as f:
+            text = f.read()
+        self.assertIn('code_graph_files{status="cached"} 1', text)
+        self.assertIn('code_graph_stage_duration_seconds_bucket{stage="parse",le="+Inf"} 3', text)
+        self.assertIn('code_graph_stage_duration_seconds_count{stage="parse"} 3', text)
+        self.assertEqual(to_prometheus(metrics.report()), text)
+
+if __name__ == '__main__':
+    unittest.main()
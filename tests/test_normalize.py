@@ -0,0 +1,136 @@
+import unittest
+import argparse
+from src.core.chunker import StandardChunker
+from src.core.languages.java_parser import JavaParser
+from src.core.languages.python_parser import PythonParser
+from src.core.normalize import (Normalizer, normalize_chunks, parse_options, parse_source_map, source_offset,
+                                summarize_doc)
+
+JAVA = b'''/*
+ * Copyright 2024 Example Corp.
+ * Licensed under the Apache License, Version 2.0.
+ */
+package com.example;
+
+public class Service {
+
+    /**
+     * Loads the user. Never returns null.
+     *
+     * @param id the id
+     */
+    public String load(String id) {
+        // Look it up
+        String sql = """
+            SELECT *   
+
+            // not a comment
+            """;   
+        return sql + "// nor this" + id; // trailing
+    }
+}
+'''
+
+class TestNormalize(unittest.TestCase):
+    def _normalize(self, options, source=JAVA, parser_class=JavaParser, file_path="Service.java"):
+        parser = parser_class()
+        parser.collect_trivia = True
+        parsed = parser.parse(source, file_path)
+        chunks = StandardChunker().chunk(parsed, [], file_path)
+        self.source = source
+        counts = normalize_chunks(chunks, parsed, Normalizer(options), source)
+        return parsed, chunks, counts
+
+    def _assert_maps_back(self, chunk):
+        # Every piece copied from the source must be found at its mapped byte offset
+        pairs = parse_source_map(chunk.source_map)
+        for i, (code_offset, file_offset) in enumerate(pairs):
+            end = pairs[i + 1][0] if i + 1 < len(pairs) else len(chunk.code)
+            piece = chunk.code[code_offset:end]
+            if not piece.startswith("/** "):
+                text = self.source[file_offset:].decode('utf-8', errors='replace')
+                self.assertEqual(text[:len(piece)], piece)
+
+    def test_parse_options(self):
+        self.assertEqual(parse_options("docs, whitespace,docs"), ["docs", "whitespace"])
+        self.assertEqual(parse_options("all"), ["whitespace", "license", "docs", "comments"])
+        with self.assertRaises(argparse.ArgumentTypeError):
+            parse_options("comments,bogus")
+
+    def test_summarize_doc(self):
+        self.assertEqual(summarize_doc("/**\n * Loads it. Then more.\n * @return x\n */"), "/** Loads it. */")
+        self.assertEqual(summarize_doc("/** @deprecated */"), "")
+
+    def test_comments_and_whitespace(self):
+        parsed, chunks, (before, after) = self._normalize(["comments", "whitespace"])
+        method = chunks[0].children[0]
+        self.assertEqual(method.code, 'public String load(String id) {\n'
+                                      '        String sql = """\n'
+                                      '            SELECT *   \n'
+                                      '\n'
+                                      '            // not a comment\n'
+                                      '            """;\n'
+                                      '        return sql + "// nor this" + id;\n'
+                                      '    }')
+        self.assertNotIn("/**", chunks[0].code)
+        self.assertLess(after, before)
+        self._assert_maps_back(method)
+        self._assert_maps_back(chunks[0])
+        offset = method.code.index("return")
+        self.assertEqual(JAVA[source_offset(method.source_map, method.code, offset):].split()[0], b"return")
+
+    def test_docs_only(self):
+        parsed, chunks, _ = self._normalize(["docs"])
+        self.assertIn("    /** Loads the user. */\n    public String load", chunks[0].code)
+        # Other comments and whitespace are kept
+        self.assertIn("// Look it up", chunks[0].children[0].code)
+        self._assert_maps_back(chunks[0])
+
+    def test_license_header(self):
+        source = b"# Copyright 2024 Example Corp.\n# SPDX-License-Identifier: MIT\n\nimport os\n# Keep me\nX = 1\n"
+        parsed, chunks, _ = self._normalize(["license"], source, PythonParser, "settings.py")
+        self.assertEqual(chunks[0].code, "\nimport os\n# Keep me\nX = 1\n")
+        self._assert_maps_back(chunks[0])
+
+    def test_non_ascii_source(self):
+        # tree-sitter reports byte offsets; the code is decoded text
+        source = ("package p;\n// Grüße, 日本語\npublic class Uni {\n    /** Größe. */\n"
+                  "    int f(int x) {\n        // remove me\n        return x + 1; // ünd\n    }\n}\n").encode('utf-8')
+        parsed, chunks, _ = self._normalize(["comments", "whitespace"], source, file_path="Uni.java")
+        method = chunks[0].children[0]
+        self.assertEqual(method.code, "int f(int x) {\n        return x + 1;\n    }")
+        self.assertEqual(chunks[0].code, "public class Uni {\n    int f(int x) {\n        return x + 1;\n    }\n}")
+        self._assert_maps_back(method)
+        self._assert_maps_back(chunks[0])
+
+    def test_invalid_utf8_source(self):
+        # Each invalid byte decodes to one U+FFFD, which re-encodes to three bytes
+        source = (b"package p;\n// caf\xe9\npublic class Bad {\n    // remove \xff\xfe me\n"
+                  b"    String f() {\n        return \"\xe9t\xc3\xa9\"; // \xff\n    }\n}\n")
+        parsed, chunks, _ = self._normalize(["comments"], source, file_path="Bad.java")
+        method = chunks[0].children[0]
+        self.assertEqual(method.code, 'String f() {\n        return "\ufffdt\u00e9";\n    }')
+        self._assert_maps_back(method)
+        self._assert_maps_back(chunks[0])
+        offset = method.code.index("return")
+        self.assertEqual(source[source_offset(method.source_map, method.code, offset):].split()[0], b"return")
+
+    def test_file_with_classes_and_functions(self):
+        source = (b"# Module docs\nimport os\n\nclass A:\n    def f(self):  # inline\n        return 1\n\n\n"
+                  b"def g():\n    # remove me\n    return os.sep\n\nclass B:\n    pass\n")
+        parsed, chunks, _ = self._normalize(["comments", "whitespace"], source, PythonParser, "mod.py")
+        file_chunk = chunks[0]
+        a, g, b = file_chunk.children
+        self.assertEqual(a.code, "class A:\n    def f(self):\n        return 1")
+        self.assertEqual(a.children[0].code, "def f(self):\n        return 1")
+        self.assertEqual(g.code, "def g():\n    return os.sep")
+        self.assertEqual(b.code, "class B:\n    pass")
+        for chunk in (file_chunk, a, a.children[0], g, b):
+            self._assert_maps_back(chunk)
+
+    def test_trivia_only_when_requested(self):
+        parsed = JavaParser().parse(JAVA, "Service.java")
+        self.assertEqual(parsed.comments, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import json
+import os
+import tempfile
+import shutil
+from src.core.parse_cache import ParseCache, evict
+from src.core.languages.java_parser import JavaParser
+
+SOURCE = b"""
+package com.example;
+import java.util.List;
+public class Greeter {
+    public String greet(List<String> names) { return names.get(0); }
+}
+"""
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.parser = JavaParser()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_round_trip(self):
+        cache = ParseCache(self.tmp_dir)
+        self.assertIsNone(cache.get("ab" * 32, self.parser))
+
+        result = self.parser.parse(SOURCE, "a/Greeter.java")
+        cache.put("ab" * 32, self.parser, result)
+        # Another worker or run sharing the directory sees the entry
+        cached = ParseCache(self.tmp_dir).get("ab" * 32, self.parser)
+        self.assertEqual(cached, result)
+        self.assertEqual(cached.classes[0].methods[0].parameter_types, ["List<String>"])
+
+    def test_parser_version_is_part_of_the_key(self):
+        ParseCache(self.tmp_dir).put("cd" * 32, self.parser, self.parser.parse(SOURCE, "Greeter.java"))
+        newer = JavaParser()
+        newer.version = "999"
+        self.assertIsNone(ParseCache(self.tmp_dir).get("cd" * 32, newer))
+
+    def test_corrupt_entry_is_a_miss(self):
+        cache = ParseCache(self.tmp_dir)
+        cache.put("ef" * 32, self.parser, self.parser.parse(SOURCE, "Greeter.java"))
+        path = cache._path("ef" * 32, self.parser)
+        with open(path, 'r+b') as f:
+            f.truncate(10)
+        self.assertIsNone(cache.get("ef" * 32, self.parser))
+        self.assertFalse(os.path.exists(path))
+
+    def test_entry_of_the_wrong_shape_is_a_miss(self):
+        cache = ParseCache(self.tmp_dir)
+        cache.put("ef" * 32, self.parser, self.parser.parse(SOURCE, "Greeter.java"))
+        path = cache._path("ef" * 32, self.parser)
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        data["classes"][0]["methods"][0]["start_byte"] = "0"
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        self.assertIsNone(cache.get("ef" * 32, self.parser))
+        self.assertFalse(os.path.exists(path))
+
+    def test_evict_least_recently_used(self):
+        cache = ParseCache(self.tmp_dir)
+        result = self.parser.parse(SOURCE, "Greeter.java")
+        digests = [f"{i:02d}" * 32 for i in range(4)]
+        for digest in digests:
+            cache.put(digest, self.parser, result)
+        # Reading an entry makes it the most recently used
+        cache.get(digests[0], self.parser)
+
+        size = os.path.getsize(cache._path(digests[0], self.parser))
+        self.assertEqual(evict(self.tmp_dir, size * 4), (0, 0))
+        # Trims down to 90% of the limit
+        removed, freed = evict(self.tmp_dir, int(size * 2 / 0.9) + 1)
+        self.assertEqual((removed, freed), (2, size * 2))
+        self.assertEqual([cache.get(d, self.parser) is not None for d in digests], [True, False, False, True])
+
+    def test_evict_only_reads_new_journal_lines(self):
+        cache = ParseCache(self.tmp_dir)
+        result = self.parser.parse(SOURCE, "Greeter.java")
+        cache.put("aa" * 32, self.parser, result)
+        size = os.path.getsize(cache._path("aa" * 32, self.parser))
+        evict(self.tmp_dir, size * 10)
+        cache.put("bb" * 32, self.parser, result)
+        evict(self.tmp_dir, size * 10)
+        # The first entry was counted once, by the first call
+        with open(os.path.join(self.tmp_dir, "journal.state"), 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)["bytes"], size * 2)
+
+    def test_journal_cannot_point_outside_the_cache(self):
+        outside = os.path.join(os.path.dirname(self.tmp_dir), os.path.basename(self.tmp_dir) + "-victim.json")
+        with open(outside, 'w', encoding='utf-8') as f:
+            f.write("{}")
+        try:
+            with open(os.path.join(self.tmp_dir, "journal"), 'w', encoding='utf-8') as f:
+                f.write(f"put 100 ../{os.path.basename(outside)}\nput 100 {outside}\n")
+            evict(self.tmp_dir, 0)
+            self.assertTrue(os.path.exists(outside))
+        finally:
+            os.remove(outside)
+
+if __name__ == '__main__':
+    unittest.main()
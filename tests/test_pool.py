@@ -0,0 +1,112 @@
+import unittest
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+from src.core.pool import bounded_imap
+
+class TestBoundedImap(unittest.TestCase):
+    def setUp(self):
+        self.pool = ThreadPool(4)
+
+    def tearDown(self):
+        self.pool.close()
+        self.pool.join()
+
+    def test_yields_every_result(self):
+        results = bounded_imap(self.pool, lambda x: x * 2, range(100), max_in_flight=8, chunksize=3)
+        self.assertEqual(sorted(results), [x * 2 for x in range(100)])
+
+    def test_ordered(self):
+        def slow_first(x):
+            if x == 0:
+                time.sleep(0.05)
+            return x
+        results = list(bounded_imap(self.pool, slow_first, range(50), max_in_flight=10, chunksize=2, ordered=True))
+        self.assertEqual(results, list(range(50)))
+
+    def test_before_batch_sees_each_batch_first(self):
+        seen = []
+        lock = threading.Lock()
+
+        def before(batch):
+            with lock:
+                seen.append(("batch", list(batch)))
+
+        def work(x):
+            with lock:
+                seen.append(("item", x))
+            return x
+
+        list(bounded_imap(self.pool, work, range(7), max_in_flight=3, chunksize=3, before_batch=before))
+        batches = [items for kind, items in seen if kind == "batch"]
+        self.assertEqual(batches, [[0, 1, 2], [3, 4, 5], [6]])
+        for batch in batches:
+            first_item = seen.index(("item", batch[0]))
+            self.assertLess(seen.index(("batch", batch)), first_item)
+
+    def test_limits_items_in_flight(self):
+        lock = threading.Lock()
+        started = []
+
+        def work(x):
+            with lock:
+                started.append(x)
+            return x
+
+        consumed = 0
+        for _ in bounded_imap(self.pool, work, range(40), max_in_flight=6, chunksize=2):
+            consumed += 1
+            time.sleep(0.001)
+            with lock:
+                self.assertLessEqual(len(started) - consumed, 6)
+        self.assertEqual(consumed, 40)
+
+    def test_dynamic_limit(self):
+        limit = [4]
+        in_flight = []
+        consumed = 0
+        for _ in bounded_imap(self.pool, in_flight.append, range(40), max_in_flight=lambda: limit[0]):
+            consumed += 1
+            self.assertLessEqual(len(in_flight) - consumed, limit[0])
+            if consumed == 10:
+                limit[0] = 1
+        self.assertEqual(consumed, 40)
+
+    def test_limits_bytes_in_flight(self):
+        started = []
+        consumed = 0
+        for _ in bounded_imap(self.pool, started.append, range(20), max_in_flight=100,
+                              max_bytes=10, size_of=lambda x: 10):
+            consumed += 1
+            # Each item is as large as the whole budget, so only one runs at a time
+            self.assertLessEqual(len(started) - consumed, 1)
+
+    def test_batch_cut_short(self):
+        class Last(tuple):
+            ends_batch = True
+        calls = []
+        lock = threading.Lock()
+
+        def work(x):
+            with lock:
+                calls.append(x)
+            # Like a worker that schedules its exit: it gets no more items of the batch
+            return Last((x,)) if x % 5 == 2 else (x,)
+
+        for ordered in (False, True):
+            calls.clear()
+            results = [r[0] for r in bounded_imap(self.pool, work, range(30), max_in_flight=8, chunksize=4,
+                                                  ordered=ordered)]
+            self.assertEqual(sorted(results), list(range(30)))
+            self.assertEqual(sorted(calls), list(range(30)))
+            if ordered:
+                self.assertEqual(results, list(range(30)))
+
+    def test_propagates_errors(self):
+        def fail(x):
+            raise ValueError(x)
+        with self.assertRaises(ValueError):
+            list(bounded_imap(self.pool, fail, range(3), max_in_flight=2))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import hashlib
+import os
+import tempfile
+import threading
+from src.core.prefetch import Prefetcher, read_source
+
+class TestPrefetch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paths = []
+        for i in range(5):
+            path = os.path.join(self.tmp.name, f"F{i}.java")
+            with open(path, 'wb') as f:
+                f.write(b"class F%d {}" % i * (i + 1))
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _expected(self, path):
+        with open(path, 'rb') as f:
+            content = f.read()
+        return content, hashlib.sha256(content).hexdigest()
+
+    def test_read_source(self):
+        content, checksum = self._expected(self.paths[2])
+        source = read_source(self.paths[2])
+        self.assertEqual((source.size, source.checksum, source.content), (len(content), checksum, content))
+        # Large files are only hashed
+        large = read_source(self.paths[2], max_bytes=len(content))
+        self.assertEqual((large.size, large.checksum, large.content), (len(content), checksum, None))
+
+    def test_prefetcher_reads_ahead(self):
+        warmed = []
+        lock = threading.Lock()
+
+        def warm(path):
+            with lock:
+                warmed.append(path)
+
+        prefetcher = Prefetcher(depth=2, warm=warm)
+        try:
+            prefetcher.schedule(self.paths[:4])
+            prefetcher.discard(self.paths[1])
+            for path in (self.paths[0], self.paths[2], self.paths[3], self.paths[4]):
+                source, wait_s = prefetcher.take(path)
+                self.assertEqual((source.content, source.checksum), self._expected(path))
+                self.assertGreaterEqual(wait_s, 0.0)
+        finally:
+            prefetcher.close()
+        # The file taken without being scheduled was read synchronously, without warming
+        self.assertNotIn(self.paths[4], warmed)
+        self.assertIn(self.paths[3], warmed)
+
+    def test_failed_read_is_raised_by_take(self):
+        prefetcher = Prefetcher(depth=1)
+        try:
+            missing = os.path.join(self.tmp.name, "Missing.java")
+            prefetcher.schedule([missing])
+            with self.assertRaises(OSError):
+                prefetcher.take(missing)
+        finally:
+            prefetcher.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+import os
+import tempfile
+import shutil
+from src.core.profiling import StageProfiler, merge_profiles
+
+def busy(n):
+    return sum(i * i for i in range(n))
+
+class TestStageProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_stages_are_dumped_and_merged(self):
+        profiler = StageProfiler(self.tmp_dir)
+        with profiler.stage("parse"):
+            busy(1000)
+            with profiler.stage("resolve"):
+                busy(1000)
+        with profiler.stage("parse"):
+            busy(1000)
+        profiler.dump()
+
+        pid = os.getpid()
+        for stage in ("parse", "resolve"):
+            self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, f"worker-{pid}.{stage}.prof")))
+
+        report_path = merge_profiles(self.tmp_dir)
+        with open(report_path) as f:
+            report = f.read()
+        self.assertIn("=== Stage: parse (1 processes", report)
+        self.assertIn("=== Stage: resolve (1 processes", report)
+        self.assertIn("busy", report)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, "parse.prof")))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+from src.core.languages import is_available
+
+@unittest.skipUnless(is_available("python"), "tree-sitter-python is not installed")
+class TestPythonParser(unittest.TestCase):
+    def test_parse_simple_python(self):
+        from src.core.languages.python_parser import PythonParser
+        parser = PythonParser()
+        code = b"""
+import os.path
+from typing import List, Optional as Opt
+
+@dataclass
+class Greeter(Base, Mixin, metaclass=Meta):
+    @staticmethod
+    def greet(names: List[str], sep=", ") -> str:
+        return sep.join(names)
+
+    def path(self, name: str) -> str:
+        return os.path.join("/", name)
+"""
+        result = parser.parse(code, "greeter.py")
+
+        self.assertEqual(result.imports, ["os.path", "typing.List", "typing.Optional"])
+
+        self.assertEqual(len(result.classes), 1)
+        cls = result.classes[0]
+        self.assertEqual(cls.name, "Greeter")
+        self.assertEqual(cls.extends, "Base")
+        self.assertEqual(cls.implements, ["Mixin"])
+        self.assertEqual(cls.annotations, ["@dataclass"])
+        self.assertTrue(cls.code.startswith("@dataclass"))
+
+        greet, path = cls.methods
+        self.assertEqual(greet.signature, 'def greet(names: List[str], sep=", ") -> str')
+        self.assertEqual(greet.annotations, ["@staticmethod"])
+        self.assertEqual(greet.parameter_types, ["List[str]", ""])
+        self.assertEqual(path.parameter_types, ["str"])
+        self.assertEqual(path.used_imports, ["os.path"])
+
+    def test_top_level_functions(self):
+        from src.core.languages.python_parser import PythonParser
+        code = b"""
+@cache
+def load(path: str):
+    class Local: pass
+    def helper(): pass
+    return Local
+
+class A:
+    class Nested: pass
+
+    def run(self): pass
+
+if __name__ == "__main__":
+    def main(): pass
+
+class B: pass
+"""
+        result = PythonParser().parse(code, "mod.py")
+        # Classes and functions nested in other definitions stay in their code
+        self.assertEqual([c.name for c in result.classes], ["A", "B"])
+        self.assertEqual([m.name for m in result.classes[0].methods], ["run"])
+        self.assertEqual([f.name for f in result.functions], ["load", "main"])
+        load = result.functions[0]
+        self.assertTrue(load.code.startswith("@cache\ndef load"))
+        self.assertEqual((load.signature, load.parameter_types), ("def load(path: str)", ["str"]))
+        self.assertTrue(result.top_level_code)
+
+    def test_module_code_keeps_the_file_chunk(self):
+        from src.core.chunker import StandardChunker
+        from src.core.languages.python_parser import PythonParser
+        parser = PythonParser()
+        only_class = b"import os\n# A comment\n@dataclass\nclass A:\n    x: int = 0\n"
+        self.assertFalse(parser.parse(only_class, "a.py").top_level_code)
+        self.assertEqual([c.kind for c in StandardChunker().chunk(parser.parse(only_class, "a.py"), [], "a.py")],
+                         ["class"])
+
+        with_constant = only_class + b"\nLIMIT = 10\n"
+        chunks = StandardChunker().chunk(parser.parse(with_constant, "a.py"), [], "a.py")
+        self.assertEqual([(c.kind, [child.id for child in c.children]) for c in chunks], [("file", ["a.py::A"])])
+        self.assertIn("LIMIT = 10", chunks[0].code)
+
+if __name__ == '__main__':
+    unittest.main()
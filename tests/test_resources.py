@@ -0,0 +1,66 @@
+import unittest
+import os
+import tempfile
+import shutil
+from src.utils.resources import cgroup_cpu_limit, cgroup_memory_limit, size_workers
+
+GB = 1024 ** 3
+
+class TestResources(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.proc_cgroup = os.path.join(self.tmp_dir, "cgroup")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, rel_path, content):
+        path = os.path.join(self.tmp_dir, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+
+    def test_cgroup_v2(self):
+        self.write("cgroup", "0::/kubepods/pod1/container\n")
+        self.write("fs/kubepods/cpu.max", "max 100000\n")
+        self.write("fs/kubepods/pod1/cpu.max", "800000 100000\n")
+        self.write("fs/kubepods/pod1/container/cpu.max", "max 100000\n")
+        self.write("fs/kubepods/pod1/container/memory.max", f"{16 * GB}\n")
+        root = os.path.join(self.tmp_dir, "fs")
+
+        # The pod-level quota applies to the container nested in it
+        self.assertEqual(cgroup_cpu_limit(root, self.proc_cgroup), 8.0)
+        self.assertEqual(cgroup_memory_limit(root, self.proc_cgroup), 16 * GB)
+
+    def test_cgroup_v1(self):
+        self.write("cgroup", "4:memory:/docker/abc\n3:cpu,cpuacct:/docker/abc\n")
+        self.write("fs/cpu,cpuacct/docker/abc/cpu.cfs_quota_us", "250000\n")
+        self.write("fs/cpu,cpuacct/docker/abc/cpu.cfs_period_us", "100000\n")
+        self.write("fs/memory/memory.limit_in_bytes", "9223372036854771712\n")
+        self.write("fs/memory/docker/abc/memory.limit_in_bytes", f"{4 * GB}\n")
+        root = os.path.join(self.tmp_dir, "fs")
+
+        self.assertEqual(cgroup_cpu_limit(root, self.proc_cgroup), 2.5)
+        self.assertEqual(cgroup_memory_limit(root, self.proc_cgroup), 4 * GB)
+
+    def test_no_limits(self):
+        self.write("cgroup", "0::/\n")
+        self.write("fs/cpu.max", "max 100000\n")
+        root = os.path.join(self.tmp_dir, "fs")
+        self.assertIsNone(cgroup_cpu_limit(root, self.proc_cgroup))
+        self.assertIsNone(cgroup_memory_limit(root, self.proc_cgroup))
+
+    def test_size_workers(self):
+        sizing = size_workers(worker_bytes=GB, reserve_bytes=GB, cpus=8, memory_limit=64 * GB)
+        self.assertEqual((sizing.workers, sizing.memory_bound), (8, False))
+
+        # 96 host CPUs, but 16 GB only fit 7 workers next to the parent
+        sizing = size_workers(worker_bytes=2 * GB, reserve_bytes=2 * GB, cpus=96, memory_limit=16 * GB)
+        self.assertEqual((sizing.workers, sizing.memory_bound), (7, True))
+
+        sizing = size_workers(worker_bytes=GB, reserve_bytes=GB, cpus=4, memory_limit=64 * GB, max_workers=8)
+        self.assertEqual(sizing.workers, 8)
+        self.assertEqual(size_workers(worker_bytes=GB, reserve_bytes=GB, cpus=4, memory_limit=GB).workers, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import os
+import tempfile
+from unittest import mock
+from src.core import search
+from src.core.interfaces import Chunk
+from src.core.search import SearchIndex, SearchReader, tokenize
+
+def _file_chunks(file_path, methods):
+    """A class chunk with one method chunk per (name, code)."""
+    class_id = f"{file_path}::Main"
+    children = [Chunk(id=f"{class_id}::{name}", file_path=file_path, language="java", kind="method",
+                      code=code, name=name, signature=f"void {name}()", parent_id=class_id)
+                for name, code in methods]
+    return Chunk(id=class_id, file_path=file_path, language="java", kind="class", code="",
+                 name="Main", children=children)
+
+class TestSearch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index_dir = os.path.join(self.tmp.name, "search")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _run(self, files, retain=None):
+        index = SearchIndex(self.index_dir)
+        for file_path, methods in files.items():
+            index.write([_file_chunks(file_path, methods)], self.tmp.name)
+        if retain is not None:
+            index.retain(retain)
+        index.close()
+
+    def _ids(self, query, limit=10):
+        return [hit.chunk_id for hit in SearchReader(self.index_dir).search(query, limit=limit)]
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("parseHTTPResponse(user_id)"),
+                         ["parse", "http", "response", "parsehttpresponse", "user", "id", "user_id"])
+        self.assertEqual(tokenize("public static void x()"), [])
+
+    def test_ranking(self):
+        self._run({"A.java": [("loadUser", "return userRepository.findUser(id);"),
+                              ("save", "store.write(data);")],
+                   "B.java": [("close", "connection.close();")]})
+        self.assertEqual(self._ids("user")[0], "A.java::Main::loadUser")
+        self.assertEqual(self._ids("findUser")[0], "A.java::Main::loadUser")
+        self.assertEqual(self._ids("nothing matches"), [])
+        # The class chunk is indexed by its method signatures
+        self.assertIn("B.java::Main", self._ids("close"))
+
+    def test_merge_from(self):
+        shard_dir = os.path.join(self.tmp.name, "shard")
+        self._run({"A.java": [("alpha", "alphaValue();")]})
+        shard = SearchIndex(shard_dir)
+        shard.write([_file_chunks("B.java", [("beta", "betaValue();")])], self.tmp.name)
+        shard.close()
+        shard = SearchIndex(shard_dir)
+        shard.write([_file_chunks("B.java", [("gamma", "gammaValue();")])], self.tmp.name)
+        shard.close()
+
+        # Merging twice replaces the documents of the first merge
+        for _ in range(2):
+            index = SearchIndex(self.index_dir)
+            index.merge_from(shard_dir)
+            index.close()
+        self.assertEqual(self._ids("alpha value")[0], "A.java::Main::alpha")
+        self.assertEqual(self._ids("beta"), [])
+        self.assertEqual(self._ids("gamma"), ["B.java::Main::gamma", "B.java::Main"])
+
+    def test_incremental_updates(self):
+        self._run({"A.java": [("alpha", "alphaValue();")], "B.java": [("beta", "betaValue();")]})
+        # Only A is reprocessed; B keeps its documents from the first segment
+        self._run({"A.java": [("gamma", "gammaValue();")]})
+        self.assertEqual(self._ids("alpha"), [])
+        self.assertEqual(self._ids("gamma value")[0], "A.java::Main::gamma")
+        self.assertEqual(self._ids("beta value")[0], "B.java::Main::beta")
+
+        self._run({}, retain=["A.java"])
+        self.assertEqual(self._ids("beta"), [])
+        self.assertTrue(self._ids("gamma"))
+
+    def test_segments_are_merged(self):
+        with mock.patch.object(search, "SEGMENT_DOCS", 2), mock.patch.object(search, "MAX_SEGMENTS", 2):
+            self._run({f"F{i}.java": [(f"method{i}", f"call{i}();")] for i in range(5)})
+            self.assertEqual(len(SearchReader(self.index_dir).segments), 1)
+            self._run({"F1.java": [("renamed", "other();")]})
+        reader = SearchReader(self.index_dir)
+        self.assertEqual(len(reader.segments), 2)
+        self.assertEqual(reader.doc_count, 10)
+        self.assertNotIn("F1.java::Main::method1", self._ids("method1"))
+        self.assertEqual(self._ids("method3")[0], "F3.java::Main::method3")
+        self.assertEqual(self._ids("renamed")[0], "F1.java::Main::renamed")
+        segments = [name for name in os.listdir(self.index_dir) if name.startswith("seg-")]
+        self.assertEqual(len(segments), 3) # Two segments and the deletions of the older one
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import argparse
+import os
+import tempfile
+import shutil
+from src.core.sharding import (parse_shard, select_shard, write_manifest, load_manifest,
+                               merge_manifests, copy_output_tree)
+
+class TestSharding(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.source_dir = os.path.join(self.tmp_dir, "src")
+        self.files = []
+        for i in range(40):
+            path = os.path.join(self.source_dir, f"pkg{i % 4}", f"A{i}.java")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write("x" * (i * 10))
+            self.files.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/5"), (2, 5))
+        for spec in ("5/5", "-1/2", "1", "a/b", "0/0"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_shard(spec)
+
+    def test_partition(self):
+        for by_size in (False, True):
+            shards = [select_shard(self.files, self.source_dir, i, 3, by_size=by_size) for i in range(3)]
+            self.assertEqual(sorted(sum(shards, [])), sorted(self.files))
+            # Independent of scan order and of where the tree is checked out
+            moved = [path.replace(self.source_dir, "/elsewhere") for path in reversed(self.files)]
+            moved_shard = select_shard(moved, "/elsewhere", 1, 3, by_size=False)
+            if not by_size:
+                self.assertEqual(sorted(p.replace("/elsewhere", self.source_dir) for p in moved_shard),
+                                 sorted(shards[1]))
+
+    def test_size_balanced(self):
+        sizes = []
+        for i in range(3):
+            shard = select_shard(self.files, self.source_dir, i, 3, by_size=True)
+            sizes.append(sum(os.path.getsize(p) for p in shard))
+        self.assertLessEqual(max(sizes) - min(sizes), 390)
+
+    def test_merge_manifests(self):
+        out_dirs = []
+        for i in range(2):
+            out_dir = os.path.join(self.tmp_dir, f"out{i}")
+            write_manifest(out_dir, self.source_dir, select_shard(self.files, self.source_dir, i, 2),
+                           "json", shard=(i, 2))
+            out_dirs.append(out_dir)
+        manifests = [load_manifest(d) for d in out_dirs]
+
+        merged = merge_manifests(manifests)
+        self.assertEqual(merged["files"], sorted(self.files))
+        self.assertEqual([s["index"] for s in merged["merged_from"]], [0, 1])
+
+        with self.assertRaisesRegex(ValueError, "missing shard"):
+            merge_manifests(manifests[:1])
+        self.assertEqual(len(merge_manifests(manifests[:1], allow_partial=True)["files"]), len(manifests[0]["files"]))
+        with self.assertRaisesRegex(ValueError, "more than once"):
+            merge_manifests([manifests[0], manifests[0]])
+
+    def test_copy_output_tree(self):
+        shard_dir = os.path.join(self.tmp_dir, "shard")
+        os.makedirs(os.path.join(shard_dir, ".code-graph"))
+        os.makedirs(os.path.join(shard_dir, "a"))
+        for name in ("a/A.java.json", "a/B.java.json.tmp.12.34", ".code-graph/metrics.json"):
+            with open(os.path.join(shard_dir, name), 'w') as f:
+                f.write("{}")
+
+        dest = os.path.join(self.tmp_dir, "merged")
+        self.assertEqual(copy_output_tree(shard_dir, dest), 1)
+        self.assertEqual(os.listdir(os.path.join(dest, "a")), ["A.java.json"])
+        self.assertFalse(os.path.exists(os.path.join(dest, ".code-graph")))
+
+if __name__ == '__main__':
+    unittest.main()
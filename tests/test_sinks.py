@@ -0,0 +1,89 @@
+import unittest
+import time
+from src.core.interfaces import Chunk
+from src.core.sinks import AsyncFunctionSink, AsyncMemorySink, FunctionSink, MemorySink, SinkWriter, load_sink
+
+def _chunk(name, code="x", methods=0):
+    children = [Chunk(id=f"{name}::m{i}", file_path=name, language="java", kind="method", code=code)
+                for i in range(methods)]
+    return Chunk(id=name, file_path=name, language="java", kind="class", code=code, children=children)
+
+class CountingSink(MemorySink):
+    """Records the most batches it was sent at once."""
+    def __init__(self):
+        super().__init__(latency_s=0.02)
+        self.active = 0
+        self.max_active = 0
+
+    def send(self, batch):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        super().send(batch)
+        with self._lock:
+            self.active -= 1
+
+collected = []
+
+async def collect(batch):
+    collected.append(batch)
+
+class TestSinks(unittest.TestCase):
+    def _run(self, sink, chunks, **limits):
+        writer = SinkWriter(sink, **limits)
+        for chunk in chunks:
+            writer.write([chunk], "out")
+        writer.close()
+        return writer
+
+    def test_batch_limits(self):
+        sink = MemorySink()
+        # A class and its methods count together; the large file goes alone
+        chunks = [_chunk("A", methods=2), _chunk("B"), _chunk("C", methods=9), _chunk("D"), _chunk("E", "y" * 100)]
+        writer = self._run(sink, chunks, max_batch_chunks=4, max_batch_bytes=50)
+        self.assertEqual(sorted([c.id for c in batch] for batch in sink.batches), [["A", "B"], ["C"], ["D"], ["E"]])
+        self.assertEqual((writer.batches_sent, writer.chunks_sent), (4, 16))
+        self.assertTrue(sink.closed)
+
+    def test_retries(self):
+        sink = MemorySink(fail_first=2)
+        sink.backoff_s = 0
+        writer = self._run(sink, [_chunk("A"), _chunk("B")], max_batch_chunks=1, concurrency=1)
+        self.assertEqual(writer.retried, 2)
+        self.assertEqual([c.id for c in sink.chunks], ["A", "B"])
+
+        sink = MemorySink(fail_first=10)
+        sink.backoff_s = 0
+        with self.assertRaises(ConnectionError):
+            self._run(sink, [_chunk("A")], retries=2)
+        self.assertEqual(sink.calls, 3)
+
+    def test_concurrency_limit(self):
+        sink = CountingSink()
+        self._run(sink, [_chunk(f"F{i}") for i in range(12)], max_batch_chunks=1, concurrency=3)
+        self.assertEqual(len(sink.batches), 12)
+        self.assertEqual(sink.max_active, 3)
+
+    def test_async_sink(self):
+        sink = AsyncMemorySink(latency_s=0.05)
+        t0 = time.perf_counter()
+        self._run(sink, [_chunk(f"F{i}") for i in range(8)], max_batch_chunks=1, concurrency=8)
+        # The batches wait on the event loop together, not one after another
+        self.assertLess(time.perf_counter() - t0, 0.3)
+        self.assertEqual(sorted(c.id for c in sink.chunks), [f"F{i}" for i in range(8)])
+
+    def test_load_sink(self):
+        self.assertIsInstance(load_sink("src.core.sinks:MemorySink"), MemorySink)
+        self.assertIsInstance(load_sink("tests.test_sinks:collect"), AsyncFunctionSink)
+        self.assertIsInstance(load_sink("builtins:print"), FunctionSink)
+        with self.assertRaises(ValueError):
+            load_sink("src.core.sinks")
+        with self.assertRaises(AttributeError):
+            load_sink("src.core.sinks:Missing")
+
+        collected.clear()
+        self._run(load_sink("tests.test_sinks:collect"), [_chunk("A")])
+        self.assertEqual([[c.id for c in batch] for batch in collected], [["A"]])
+
+if __name__ == '__main__':
+    unittest.main()
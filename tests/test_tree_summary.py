@@ -0,0 +1,99 @@
+import unittest
+import os
+import tempfile
+import time
+from src.core.tree_summary import TreeSummaryStore, scan_tree
+
+EXTENSIONS = (".java",)
+# Everything written by the tests is recent; treat none of it as racy unless a test says so
+NOT_RACY = time.time_ns() + 10**12
+
+class TestTreeSummary(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "src")
+        self.db_path = os.path.join(self.tmp.name, "tree.sqlite")
+        for rel in ("A.java", "a/B.java", "a/b/C.java", "c/D.java", "c/notes.txt", ".git/E.java"):
+            self._write(rel, "class X {}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, rel, text, mtime_ns=10**18):
+        path = os.path.join(self.root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+        return path
+
+    def _scan(self, fingerprint="v1", redo=(), racy_after_ns=NOT_RACY):
+        """Scans against the stored summaries, then stores the new ones; returns (scan, no-op?)."""
+        store = TreeSummaryStore(self.db_path, fingerprint)
+        try:
+            scan = scan_tree(self.root, EXTENSIONS, store)
+            no_op = scan.digest == store.root_digest
+            store.save(scan, set(redo), racy_after_ns)
+        finally:
+            store.close()
+        return scan, no_op
+
+    def _changed(self, scan):
+        return sorted(os.path.relpath(path, self.root) for path in scan.changed)
+
+    def test_unchanged_tree_is_a_no_op(self):
+        scan, no_op = self._scan()
+        self.assertFalse(no_op)
+        self.assertEqual(self._changed(scan), ["A.java", "a/B.java", "a/b/C.java", "c/D.java"])
+        scan, no_op = self._scan()
+        self.assertTrue(no_op)
+        self.assertEqual(scan.changed, [])
+        self.assertEqual(len(scan.files), 4)
+        self.assertEqual(scan.unchanged_dirs, len(scan.dirs))
+
+    def test_only_changed_files_are_reported(self):
+        self._scan()
+        self._write("a/b/C.java", "class X { int y; }")
+        self._write("c/New.java", "class Y {}")
+        os.remove(os.path.join(self.root, "A.java"))
+        scan, no_op = self._scan()
+        self.assertFalse(no_op)
+        self.assertEqual(self._changed(scan), ["a/b/C.java", "c/New.java"])
+        # Every directory has a change in its subtree
+        self.assertEqual(scan.unchanged_dirs, 0)
+        self._write("c/D.java", "class Z {}", mtime_ns=10**18 + 1)
+        scan, _ = self._scan()
+        self.assertEqual(self._changed(scan), ["c/D.java"])
+        self.assertEqual(scan.unchanged_dirs, 2) # a and a/b
+
+    def test_removed_directories_are_forgotten(self):
+        self._scan()
+        os.remove(os.path.join(self.root, "a/b/C.java"))
+        os.rmdir(os.path.join(self.root, "a/b"))
+        scan, no_op = self._scan()
+        self.assertFalse(no_op)
+        self.assertEqual(scan.changed, [])
+        store = TreeSummaryStore(self.db_path, "v1")
+        self.assertEqual(sorted(store.digests), ["", "a", "c"])
+        store.close()
+
+    def test_failed_and_racy_files_are_rechecked(self):
+        scan, _ = self._scan(redo=[os.path.join(self.root, "a/B.java")])
+        scan, no_op = self._scan(racy_after_ns=10**18)
+        self.assertFalse(no_op)
+        self.assertEqual(self._changed(scan), ["a/B.java"])
+        # Everything was modified at or after the racy cut-off, so all of it is looked at again
+        scan, no_op = self._scan()
+        self.assertFalse(no_op)
+        self.assertEqual(len(scan.changed), 4)
+        scan, no_op = self._scan()
+        self.assertTrue(no_op)
+
+    def test_other_options_start_over(self):
+        self._scan()
+        scan, no_op = self._scan(fingerprint="v2")
+        self.assertFalse(no_op)
+        self.assertEqual(len(scan.changed), 4)
+
+if __name__ == '__main__':
+    unittest.main()
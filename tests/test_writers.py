@@ -1,8 +1,11 @@
 import unittest
+import io
 import os
 import json
 import shutil
-from src.core.writers import JSONWriter, TextWriter
+from dataclasses import asdict
+from src.core.writers import JSONWriter, TextWriter, NDJSONWriter, ThreadedWriter
+from src.core.changes import read_output, read_streamed_output
 from src.core.interfaces import Chunk, Dependency
 
 class TestWriters(unittest.TestCase):
@@ -50,5 +53,104 @@ class TestWriters(unittest.TestCase):
             self.assertIn("junit:4.12 (maven)", content)
             self.assertIn("public class Test {}", content)
 
+    def test_ndjson_writer(self):
+        stream = io.BytesIO()
+        writer = NDJSONWriter(stream)
+        child = Chunk(id="src/Test.java::Test::run", file_path="src/Test.java", language="java",
+                      kind="method", code="void run() {}", parent_id=self.chunk.id)
+        self.chunk.children = [child]
+        writer.write([self.chunk], "ignored")
+        writer.write([], "ignored")
+        writer.write([Chunk(id="B.java::B", file_path="B.java", language="java", kind="class", code="")], "ignored")
+
+        lines = stream.getvalue().decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 2)
+        record = json.loads(lines[0])
+        self.assertEqual(record["id"], "src/Test.java::Test")
+        self.assertEqual(record["children"][0]["id"], "src/Test.java::Test::run")
+        self.assertEqual(writer.bytes_written, len(stream.getvalue()))
+        self.assertFalse(os.path.exists(self.output_dir))
+
+    def test_threaded_writer(self):
+        chunks = [Chunk(id=f"pkg{i % 3}/A{i}.java::A{i}", file_path=f"pkg{i % 3}/A{i}.java",
+                        language="java", kind="class", code="") for i in range(50)]
+        writer = ThreadedWriter(JSONWriter(fsync=True, fsync_batch=8), threads=3, max_pending=4)
+        writer.write(chunks, self.output_dir)
+        writer.close()
+
+        written = []
+        for root, _, files in os.walk(self.output_dir):
+            written.extend(files)
+        # Every file is committed and no temporary file is left behind
+        self.assertEqual(sorted(written), sorted(f"A{i}.java.json" for i in range(50)))
+        self.assertEqual(writer.bytes_written, sum(
+            os.path.getsize(os.path.join(self.output_dir, c.file_path + ".json")) for c in chunks))
+
+    def test_failed_write_keeps_previous_file(self):
+        writer = JSONWriter()
+        writer.write([self.chunk], self.output_dir)
+        expected_file = os.path.join(self.output_dir, "src", "Test.java.json")
+        with open(expected_file, 'rb') as f:
+            before = f.read()
+
+        broken = Chunk(id=self.chunk.id, file_path=self.chunk.file_path, language="java",
+                       kind="class", code="", metadata={"bad": object()})
+        threaded = ThreadedWriter(JSONWriter())
+        threaded.write([broken], self.output_dir)
+        with self.assertRaises(TypeError):
+            threaded.close()
+
+        with open(expected_file, 'rb') as f:
+            self.assertEqual(f.read(), before)
+        self.assertEqual(os.listdir(os.path.dirname(expected_file)), ["Test.java.json"])
+
+    def _streamed_chunk(self):
+        children = [Chunk(id=f"src/Test.java::Test::m{i}", file_path="src/Test.java", language="java",
+                          kind="method", code=f"void m{i}() {{\r\n}}", content_hash=f"h{i}",
+                          parent_id=self.chunk.id) for i in range(3)]
+        self.chunk.metadata = {"streamed": True}
+        self.chunk.content_hash = "h"
+        self.chunk.code = 'public class Test {\r\n  String s = "\u00e9\\"";\n}'
+        return children
+
+    def test_streamed_json_matches_regular(self):
+        children = self._streamed_chunk()
+        pieces = [self.chunk.code[i:i + 5] for i in range(0, len(self.chunk.code), 5)]
+        writer = JSONWriter()
+        size = writer.write_streamed(self.chunk, pieces, iter(children), self.output_dir)
+
+        path = os.path.join(self.output_dir, "src", "Test.java.json")
+        self.assertEqual(size, os.path.getsize(path))
+        with open(path, 'r') as f:
+            data = json.load(f)
+        self.chunk.children = children
+        self.assertEqual(data, asdict(self.chunk))
+
+        header, hashes = read_streamed_output(path)
+        self.assertNotIn("code", header)
+        self.assertEqual(hashes, {self.chunk.id: "h", **{c.id: c.content_hash for c in children}})
+        self.assertEqual(read_output(path)[1], hashes)
+
+        # The parent's writer leaves the streamed file alone
+        writer.write([Chunk(id=self.chunk.id, file_path="src/Test.java", language="java", kind="class",
+                            code="", metadata={"streamed": True})], self.output_dir)
+        with open(path, 'r') as f:
+            self.assertEqual(json.load(f), data)
+
+    def test_read_streamed_output_ignores_regular_files(self):
+        JSONWriter().write([self.chunk], self.output_dir)
+        path = os.path.join(self.output_dir, "src", "Test.java.json")
+        self.assertIsNone(read_streamed_output(path))
+        self.assertEqual(read_output(path)[1], {self.chunk.id: ""})
+
+    def test_streamed_text_matches_regular(self):
+        children = self._streamed_chunk()
+        TextWriter().write_streamed(self.chunk, [self.chunk.code[:20], self.chunk.code[20:]], children,
+                                    self.output_dir)
+        with open(os.path.join(self.output_dir, "src", "Test.java.txt"), 'r') as f:
+            streamed = f.read()
+        self.chunk.children = children
+        self.assertEqual(streamed, TextWriter().render(self.chunk))
+
 if __name__ == '__main__':
     unittest.main()